@@ -1,13 +1,39 @@
+import argparse
+import cProfile
+import os
 import random
-from faker import Faker
-from datetime import datetime, timedelta
-import math
+from datetime import date, datetime, timedelta
+from functools import partial
+import hashlib
+import string
+from array import array
+import multiprocessing
+from multiprocessing import Pool
+from time import perf_counter
 
-fake = Faker()
-random.seed(42)
-Faker.seed(42)
+from schema import MODELS, PARTITIONED, RangePartitions
+from sinks import SqlScriptSink, BulkSink, SqliteSink, OdbcSink, ParquetSink, FanOutSink
+from relations import RelationshipIndex
+from columns import ColumnTable
+from star import star_part, star_lookups, date_rows
+from aggregates import ResultSums, watch_certificates, watch_freelance, merge_sums, aggregate_rows
+from unique import NameCounter, SerialPermutation, distinct_second
+from streams import CounterRandom, row_key
+from distributions import RELATIONSHIPS, make_sampler, make_date_sampler, parse_spec, sample_distinct, np_sample_distinct
+from textpool import TextPool
+from dimcache import DimensionCache, chain_key, source_key, source_hash
+from plan import print_plan, projected_output_rows
+from state import run_state, save_state, load_state
+from checkpoint import Checkpoint, rng_digest, shard_parts, part_paths
+from metrics import Metrics, Laps, Progress, timed_rows, counted_rows, path_bytes, profile_shard, merge_profiles
+
+try:
+    import numpy as np
+except ImportError:  # only needed for BACKEND = "numpy"
+    np = None
 
 # ---------- Configuration (change if needed) ----------
+SEED = 42
 N_BRANCH = 10
 N_TRACK = 30
 N_DEPT = 10
@@ -24,8 +50,98 @@ AVG_EXAMS_PER_STUDENT = 5
 N_CERT = 3000
 N_FREELANCE = 2000
 
+OUTPUT_FORMAT = "sql"  # "sql": one INSERT script; "bulk": delimited files + bcp format files + BULK INSERT driver;
+                       # "sqlite" / "odbc": insert straight into a database; "parquet": one dataset per table
+# more formats written from the same rows in the same run, each by its own writer thread fed
+# through bounded queues (sinks.FanOutSink), e.g. ["bulk", "parquet"]; outputs as configured below
+ALSO_FORMATS = []
 OUT_SQL_FILE = "iti_bigdata.sql"
 BATCH_INSERT_SIZE = 500  # number of rows per single INSERT VALUES group
+BULK_OUT_DIR = "iti_bulk"
+BULK_BATCH_SIZE = 100000  # BULK INSERT ... BATCHSIZE
+BULK_DATA_PATH = None  # directory SQL Server reads the data files from, if not BULK_OUT_DIR itself
+SQLITE_DB = "iti_bigdata.db"
+ODBC_CONN_STR = ("DRIVER={ODBC Driver 18 for SQL Server};SERVER=localhost;DATABASE=ITI;"
+                 "Trusted_Connection=yes;TrustServerCertificate=yes")
+DB_BATCH_SIZE = 5000  # rows per executemany call
+DB_COMMIT_EVERY = 50000  # rows per transaction on each connection
+DB_CONNECTIONS = 2  # connections (threads) loading each shard part; parts of other tables run in other workers
+PARQUET_OUT_DIR = "iti_parquet"
+PARQUET_ROW_GROUP_SIZE = 100000
+PARQUET_COMPRESSION = "zstd"  # any pyarrow codec: "snappy", "gzip", "zstd", "none"
+
+# Large tables (Student, Phone_Student, Question, Question_Choices, Result, Certificate, Freelance, ...)
+# are split into N_WORKERS ID-range shards, each with its own seed derived from SEED, and generated
+# on a process pool. The output only depends on SEED and N_WORKERS, never on scheduling.
+N_WORKERS = 1
+MERGE_PARTS = True  # False: keep the ordered part files and reference them with sqlcmd ":r"
+SQL_COMPRESSION = None  # None, "gzip" or "zstd" (pip install zstandard); merged output gets a .gz / .zst suffix
+# Roll each table's shard over to a new numbered part file after this many rows / uncompressed bytes.
+# Every part file is a self-contained batch (own transaction and IDENTITY_INSERT); OUT_SQL_FILE becomes
+# a sqlcmd driver and the parts are kept under OUT_SQL_FILE.parts regardless of MERGE_PARTS.
+SQL_SPLIT_ROWS = None
+SQL_SPLIT_BYTES = None  # e.g. 256 * 2**20
+
+# Free text (names of places, words, sentences, passwords) is sampled from Faker pools built once
+# per seed; TEXT_POOL_CACHE keeps them on disk so later runs never call Faker (None to disable)
+TEXT_POOL_SIZE = 5000
+TEXT_POOL_CACHE = ".textpool_cache"
+
+# Generated dimension tables are cached per stage under DIMENSION_CACHE (None to disable), keyed
+# by the seed and the settings each stage reads: runs that only change the large tables, the
+# format or the model load them instead (dimcache.py). Least recently used entries are evicted
+# past DIMENSION_CACHE_BYTES.
+DIMENSION_CACHE = ".dimension_cache"
+DIMENSION_CACHE_BYTES = 256 * 2**20
+
+# "python": one random call per field (reference implementation)
+# "numpy":  whole columns per shard with NumPy - same schema and value domains, orders of magnitude faster
+# "counter": the python generators with one counter-based stream per row (streams.py): row i of a
+#           table depends on (SEED, table, i) only, so rowsource.RowSource can produce any row alone
+BACKEND = "python"
+NP_RESULT_BLOCK = 2000  # students per vectorized Result block; bounds the numpy backend's memory
+
+# Every run records ID high-water marks and the keys new rows may reference in STATE_FILE.
+# --delta reads it and generates only a new intake on top: its Track_Branch_Intake rows,
+# DELTA_EXAMS exams (with questions), DELTA_STUDENTS students and their results, IDs continuing
+# after the previous run. Database formats append to the existing database, file formats write
+# a rows-only script / dataset next to the full one (<output>.deltaN).
+STATE_FILE = "iti_state.json"
+DELTA_STUDENTS = 200
+DELTA_EXAMS = 20
+DELTA = 0  # number of the delta being generated, 0 for a full run
+
+# Record every finished shard under <output>.checkpoint so a killed run can continue with --resume
+# and still produce the same output (file formats; database loads always start over)
+CHECKPOINT = True
+
+# "oltp": the Examination System tables; "star": the warehouse model of the DWH design (date
+# dimension, denormalized dimensions with surrogate keys, exam/certificate/freelance facts),
+# generated in the same pass instead of the OLTP tables
+MODEL = "oltp"
+STAR_DATE_YEARS = (2010, 2025)  # Dim_Date covers every date the generators draw (hires from 2010)
+
+# dashboard summary tables (pass rate per exam and track, per-student degrees, certificates per
+# platform, freelance revenue per student and country), summed while the rows are generated
+AGGREGATES = False
+
+# per-relationship key distributions for hot-key and skew testing, e.g.
+# {"Student.Track_Branch_Intake": "zipf:1.2", "Certificate.student_id": "pareto:1.16",
+#  "Exam.Exam_Date": "months:4,1,1,1,1,4,1,1,1,1,1,1"}; see distributions.py. Unlisted ones stay uniform
+DISTRIBUTIONS = {}
+
+# Student.National_ID is YYMMDD + an 8-digit serial unique per student, so at most this many students
+NATIONAL_ID_SERIALS = 10**8
+
+# > 0: the model's exam fact table (Result, Fact_ExamActivity) is partitioned on its exam ID into this
+# many equal ID ranges (sql and bulk formats). Each partition's rows load into their own staging table,
+# independently of the others, and are attached with ALTER TABLE ... SWITCH once loaded.
+RESULT_PARTITIONS = 0
+
+# True: tables are created as bare heaps and loaded with TABLOCK; primary keys, unique constraints,
+# covering indexes for the dashboard join paths, the foreign keys (WITH CHECK, one pass per table)
+# and statistics follow once the data is in (sql, bulk and odbc formats)
+LOAD_OPTIMIZED_DDL = False
 
 # ---------- Useful lists (Egyptian-style names transliterated) ----------
 first_names_m = ["Ahmed","Mohamed","Omar","Khaled","Karim","Youssef","Hassan","Mostafa","Amr","Ibrahim",
@@ -45,185 +161,182 @@ company_samples = ["Valeo Egypt","Orange Egypt","ITIDA Labs","Vodafone Egypt","E
 course_bases = ["Python Programming","Database Systems","Power BI","Cybersecurity Basics","Web Development",
                 "Machine Learning","Cloud Fundamentals","DevOps Essentials","UI/UX Design","Data Structures"]
 
+question_types = ["MCQ","TrueFalse","Short","Essay"]
+answer_options = {"MCQ": ["A","B","C","D"], "TrueFalse": ["True","False"]}
+
 # ---------- Helper functions ----------
-def rand_date(start_year=2020, end_year=2025):
+def rand_date(start_year=2020, end_year=2025, rng=random):
     start = datetime(start_year,1,1)
     end = datetime(end_year,12,31)
     delta = (end - start).days
-    return (start + timedelta(days=random.randint(0, delta))).date()
+    return (start + timedelta(days=rng.randint(0, delta))).date()
 
-def rand_birth(min_age=20, max_age=30):
-    today = datetime.today()
+def rand_birth(min_age=20, max_age=30, rng=random, today=None):
+    today = today or datetime.today()
     start = today - timedelta(days=365*max_age)
     end = today - timedelta(days=365*min_age)
     delta = (end - start).days
-    return (start + timedelta(days=random.randint(0, delta))).date()
+    return (start + timedelta(days=rng.randint(0, delta))).date()
 
-def national_id_from_birth(birth_date):
-    # Egyptian-like 14 digits: YYMMDD + 8 random digits
-    return birth_date.strftime("%y%m%d") + "".join(str(random.randint(0,9)) for _ in range(8))
+def national_id_from_birth(birth_date, serial):
+    # Egyptian-like 14 digits: YYMMDD + an 8-digit serial, unique per student (see national_id_serials())
+    return birth_date.strftime("%y%m%d") + f"{serial:08d}"
 
-def phone_number():
-    return random.choice(["010","011","012","015"]) + "".join(str(random.randint(0,9)) for _ in range(8))
+def national_id_serials():
+    # National_ID is UNIQUE: the serial is a seed-keyed permutation of the student ID, distinct for
+    # every student of every shard and delta without any coordination
+    return SerialPermutation(f"{SEED}:National_ID", NATIONAL_ID_SERIALS)
+
+def phone_number(rng=random):
+    return rng.choice(["010","011","012","015"]) + "".join(str(rng.randint(0,9)) for _ in range(8))
+
+def skew(rel, n):
+    # the relationship's Sampler over n keys, or None while its picks stay uniform
+    return make_sampler(rel, DISTRIBUTIONS.get(rel, "uniform"), n)
+
+def skew_dates(rel, start_year, end_year):
+    # a Sampler of day offsets over the years rand_date(start_year, end_year) draws from
+    return make_date_sampler(rel, DISTRIBUTIONS.get(rel, "uniform"), date(start_year,1,1), date(end_year,12,31))
+
+def skewed_date(sampler, start_year, rng):
+    return date(start_year,1,1) + timedelta(days=sampler.pick(rng))
+
+def exam_weights(first_exam):
+    # Result.Exam_ID weights indexed by exam ID (exams before first_exam weigh 0), or None
+    sampler = skew("Result.Exam_ID", N_EXAM - first_exam + 1)
+    if sampler is None:
+        return None
+    return array("d", bytes(8 * first_exam)) + array("d", map(sampler.weight, range(len(sampler))))
 
 def email_from_name(fn, ln, domain="student.iti.local"):
     # lower, replace spaces
     return f"{fn.lower()}.{ln.lower()}@{domain}"
 
-def chunked(iterable, n):
-    for i in range(0, len(iterable), n):
-        yield iterable[i:i+n]
+def derive_seed(table, shard):
+    # stable across runs and platforms (unlike hash()), independent of scheduling
+    key = f"{SEED}:delta{DELTA}:{table}:{shard}" if DELTA else f"{SEED}:{table}:{shard}"
+    digest = hashlib.sha256(key.encode()).digest()
+    return int.from_bytes(digest[:8], "big")
 
-# ---------- Prepare SQL file and write helper ----------
-def write_line(f, s=""):
-    f.write(s + "\n")
+def shard_ranges(first, last, n_shards):
+    # split the ID range [first, last] into n_shards contiguous (lo, hi) half-open ranges
+    total = last - first + 1
+    bounds = [first + total * k // n_shards for k in range(n_shards + 1)]
+    return [(bounds[k], bounds[k+1]) for k in range(n_shards)]
 
-def escape(s):
-    if s is None:
-        return "NULL"
-    return "'" + str(s).replace("'", "''") + "'"
+def format_sink(fmt):
+    if fmt == "sql":
+        return SqlScriptSink(OUT_SQL_FILE, BATCH_INSERT_SIZE, MERGE_PARTS, SQL_COMPRESSION, SQL_SPLIT_ROWS, SQL_SPLIT_BYTES)
+    if fmt == "bulk":
+        return BulkSink(BULK_OUT_DIR, BULK_BATCH_SIZE, BULK_DATA_PATH)
+    if fmt == "sqlite":
+        return SqliteSink(SQLITE_DB, DB_BATCH_SIZE, DB_COMMIT_EVERY, DB_CONNECTIONS)
+    if fmt == "odbc":
+        return OdbcSink(ODBC_CONN_STR, DB_BATCH_SIZE, DB_COMMIT_EVERY, DB_CONNECTIONS)
+    if fmt == "parquet":
+        return ParquetSink(PARQUET_OUT_DIR, PARQUET_ROW_GROUP_SIZE, PARQUET_COMPRESSION)
+    raise SystemExit(f"unknown OUTPUT_FORMAT {fmt!r}")
 
-# ---------- Generate basic metadata entities ----------
-# Branches
-branches = []
-for i in range(1, N_BRANCH+1):
-    branches.append({
-        "Branch_ID": i,
-        "Branch_Name": f"{fake.city()} Branch",
-        "Branch_Loc": f"{fake.street_address()}, {random.choice(governorates)}"
-    })
-
-# Departments
-departments = []
-for i in range(1, N_DEPT+1):
-    departments.append({"Dept_id": i, "Name": f"Department of {fake.word().capitalize()}"})
-
-# Faculties
-faculties = []
-unis = ["Cairo University","Ain Shams University","Alexandria University","AUC","Mansoura University"]
-for i in range(1, N_FACULTY+1):
-    faculties.append({
-        "Faculty_ID": i,
-        "Faculty_Name": f"Faculty of {fake.word().capitalize()}",
-        "University_Name": random.choice(unis),
-        "city": random.choice(governorates)
-    })
-
-# Tracks
-tracks = []
-for i in range(1, N_TRACK+1):
-    tracks.append({
-        "Track_ID": i,
-        "Track_Name": f"{random.choice(['FullStack','DataScience','Cloud','Cybersecurity','AI','UIUX'])} Track {i}",
-        "Description": fake.sentence(nb_words=8),
-        "supervisor_instruct": None,  # assign later
-        "Dept_id": random.randint(1,N_DEPT)
-    })
-
-# Intake
-intakes = []
-for i in range(1, N_INTAKE+1):
-    s = rand_date(2020,2024)
-    e = s + timedelta(days=random.randint(60,240))
-    intakes.append({"id": i, "Start_date": s, "End_date": e, "Type": random.choice(["Full-time","Evening","Part-time"])})
-
-# Courses
-courses = []
-for i in range(1, N_COURSE+1):
-    base = random.choice(course_bases)
-    courses.append({
-        "Crs_ID": i,
-        "Crs_Name": f"{base} {i}",
-        "Description": fake.sentence(nb_words=10),
-        "Hours": random.choice([30,40,50,60,80]),
-        "Dept_id": random.randint(1,N_DEPT)
-    })
-
-# Companies
-companies = []
-for i in range(1, N_COMPANY+1):
-    name = random.choice(company_samples) + ("" if i<=len(company_samples) else f" {i}")
-    companies.append({"company_id": i, "name": name, "city": random.choice(governorates)})
-
-# Instructors
-instructors = []
-for i in range(1, N_INSTRUCTOR+1):
-    gender = random.choice(["M","F"])
-    fn = random.choice(first_names_m) if gender=="M" else random.choice(first_names_f)
-    ln = random.choice(last_names)
-    hire = rand_date(2010,2024)
-    instructors.append({
-        "Instructor_ID": i,
-        "First_Name": fn,
-        "Last_Name": ln,
-        "Gender": gender,
-        "Email": f"{fn.lower()}.{ln.lower()}@iti.edu.eg",
-        "Phone": phone_number(),
-        "Hire_Date": hire,
-        "salary": round(random.uniform(8000,35000),2),
-        "Dept_id": random.randint(1,N_DEPT),
-        "user_id": f"instr{i}",
-        "Password": fake.password(length=10),
-        "city": random.choice(governorates),
-        "working_status": random.choice(["Full-time","Part-time","Visiting"])
-    })
-
-# assign supervisors randomly to tracks
-for t in tracks:
-    t["supervisor_instruct"] = random.randint(1, N_INSTRUCTOR)
-
-# Instructor_Branch mapping
-instr_branch = []
-for instr in instructors:
-    n = random.randint(1,3)
-    brs = random.sample(range(1,N_BRANCH+1), n)
-    for b in brs:
-        instr_branch.append({"Instructor_ID": instr["Instructor_ID"], "Branch_ID": b})
-
-# Teach & instructor_crs (map courses to instructors)
-teach = []
-instr_crs = []
-for crs in courses:
-    n = random.randint(1,4)
-    insts = random.sample(range(1,N_INSTRUCTOR+1), n)
-    for inst in insts:
-        teach.append({"Instructor_id": inst, "Crs_ID": crs["Crs_ID"]})
-        instr_crs.append({"Crs_ID": crs["Crs_ID"], "Instructor_ID": inst})
-
-# crs_track mapping
-crs_track = []
-for c in courses:
-    n = random.randint(1,3)
-    tks = random.sample(range(1,N_TRACK+1), n)
-    for tk in tks:
-        crs_track.append({"Track_ID": tk, "Crs_ID": c["Crs_ID"]})
-
-# Track_Branch_Intake
-track_branch_intake = []
-for t in range(1,N_TRACK+1):
-    brs = random.sample(range(1,N_BRANCH+1), random.randint(1,3))
-    its = random.sample(range(1,N_INTAKE+1), random.randint(1,3))
-    for b in brs:
-        for it in its:
-            track_branch_intake.append({"Branch_ID": b, "intake_id": it, "Track_ID": t})
-
-# Students
-students = []
-phone_students = []
-for i in range(1, N_STUDENT+1):
-    gender = random.choice(["M","F"])
-    fn = random.choice(first_names_m) if gender=="M" else random.choice(first_names_f)
-    ln = random.choice(last_names)
-    bd = rand_birth(20,30)
-    nid = national_id_from_birth(bd)
-    branch_id = random.randint(1,N_BRANCH)
-    track_id = random.randint(1,N_TRACK)
-    faculty_id = random.randint(1,N_FACULTY)
-    intake_id = random.randint(1,N_INTAKE)
-    company_id = random.choice([None] + list(range(1,N_COMPANY+1)))
-    gpa = round(random.uniform(2.0,4.0),2)
-    grad = random.choice(["Graduated","Studying","Dropped"])
-    students.append({
+def make_sink():
+    sinks = [format_sink(fmt) for fmt in [OUTPUT_FORMAT] + ALSO_FORMATS]
+    sink = sinks[0] if len(sinks) == 1 else FanOutSink(sinks)
+    sink.append = bool(DELTA)
+    sink.model = MODEL
+    sink.aggregates = AGGREGATES
+    sink.load_optimized = LOAD_OPTIMIZED_DDL
+    if RESULT_PARTITIONS:
+        table, column = PARTITIONED[MODEL]
+        bounds = [lo for lo, _ in shard_ranges(1, N_EXAM, min(RESULT_PARTITIONS, N_EXAM))]
+        sink.partitions = RangePartitions(table, column, bounds)
+    return sink
+
+# ---------- Shard workers (large tables) ----------
+# Each worker gets the shared, read-only context (including the output sink) once through the pool
+# initializer and hands its tables to the sink as shard parts; the sink assembles them in shard order.
+_ctx = {}
+
+def init_worker(ctx):
+    # command-line settings reach spawned workers (Windows, macOS) through the context too
+    globals().update(ctx["config"])
+    _ctx.clear()
+    _ctx.update(ctx)
+    ctx["sink"].metrics = ctx["metrics"]
+
+def shard_rng(table, shard):
+    return random.Random(derive_seed(table, shard))
+
+def row_rng(table, i):
+    return CounterRandom(row_key(SEED, table, i))
+
+def shard_stream(table, shard):
+    # the RNG row i of a shard draws from: the python backend's rows take turns on the shard's one
+    # stream, the counter backend gives each row its own, so a row depends on (SEED, table, i) only
+    if BACKEND == "counter":
+        return partial(row_rng, table)
+    rng = shard_rng(table, shard)
+    return lambda i: rng
+
+def write_part(table, shard, rows):
+    if MODEL == "star":
+        # tables the star schema folds into its dimensions are generated (they draw from the
+        # shard's RNG) but never written
+        star_table, rows = star_part(table, rows, _ctx)
+        if star_table is None:
+            return table, shard, None, 0
+        table = star_table
+    if _ctx["progress"] is not None:
+        rows = counted_rows(rows, _ctx["progress"])
+    m = _ctx["metrics"]
+    if m is None:
+        path, n = _ctx["sink"].write_part(table, shard, rows)
+        return table, shard, path, n
+    gen = f"time.generate.{table}"
+    before = m.data.get(gen, 0)
+    start = perf_counter()
+    path, n = _ctx["sink"].write_part(table, shard, timed_rows(rows, m, gen))
+    m.add(f"time.write.{table}", perf_counter() - start - (m.data[gen] - before))
+    m.add(f"rows.{table}", n)
+    for p in part_paths([(table, shard, path, n)]):
+        m.add(f"bytes.{table}", path_bytes(p))
+    return table, shard, path, n
+
+def result_parts(shard, lo, hi, rows):
+    # with AGGREGATES a Result shard also writes the final sums of its own students and hands
+    # back the per exam/track sums, which span shards
+    if not AGGREGATES:
+        return [write_part("Result", shard, rows)]
+    sums = ResultSums(lo, hi, _ctx["q_marks"], _ctx["student_track"])
+    parts = [write_part("Result", shard, sums.watch(rows)),
+             write_part("Agg_Student", shard, sums.student_rows())]
+    return parts, {"Agg_Exam_Track": sums.exam_track}
+
+def summed_parts(table, shard, rows, watch):
+    if not AGGREGATES:
+        return [write_part(table, shard, rows)]
+    sums = {}
+    return [write_part(table, shard, watch(rows, sums))], sums
+
+def student_row(i, rng, serials):
+    # Student i and its phones
+    text = _ctx["text"]
+    tbi = _ctx["tbi"]
+    tbi_skew, faculty_skew, company_skew = (_ctx["skew"][r] for r in
+                                            ("Student.Track_Branch_Intake", "Student.Faculty_ID", "Student.company_id"))
+    gender = rng.choice(["M","F"])
+    fn = rng.choice(first_names_m) if gender=="M" else rng.choice(first_names_f)
+    ln = rng.choice(last_names)
+    bd = rand_birth(20,30, rng, _ctx["today"])
+    nid = national_id_from_birth(bd, serials(i - 1))
+    # only (branch, intake, track) combinations that exist in Track_Branch_Intake
+    branch_id, intake_id, track_id = rng.choice(tbi) if tbi_skew is None else tbi[tbi_skew.pick(rng)]
+    faculty_id = rng.randint(1,N_FACULTY) if faculty_skew is None else 1 + faculty_skew.pick(rng)
+    if company_skew is None:
+        company_id = rng.choice([None] + list(range(1,N_COMPANY+1)))
+    else:
+        company_id = company_skew.pick(rng) or None  # key 0 is "no company"
+    gpa = round(rng.uniform(2.0,4.0),2)
+    grad = rng.choice(["Graduated","Studying","Dropped"])
+    student = {
         "Student_ID": i,
         "Student_First_Name": fn,
         "Student_Last_Name": ln,
@@ -231,7 +344,7 @@ for i in range(1, N_STUDENT+1):
         "Birth_date": bd,
         "Email": email_from_name(fn, ln),
         "National_ID": nid,
-        "governorate": random.choice(governorates),
+        "governorate": rng.choice(governorates),
         "Gpa": gpa,
         "Graduation_Status": grad,
         "Branch_ID": branch_id,
@@ -240,481 +353,1103 @@ for i in range(1, N_STUDENT+1):
         "intack_id": intake_id,
         "company_id": company_id,
         "user_id": f"stud{i}",
-        "Password": fake.password(length=10),
+        "Password": text.password(rng),
         "student_url": f"https://iti.example.com/students/{i}"
-    })
-    # 1-2 phones
-    for _ in range(random.choice([1,1,2])):
-        phone_students.append({"Student_ID": i, "Phone": phone_number()})
-
-# Exams
-exams = []
-for i in range(1, N_EXAM+1):
-    crs = random.randint(1,N_COURSE)
-    # pick instructor who teaches this course if possible
-    insts = [t["Instructor_id"] for t in teach if t["Crs_ID"]==crs]
-    inst_id = random.choice(insts) if insts else random.randint(1,N_INSTRUCTOR)
-    exam_date = rand_date(2020,2025)
-    exams.append({
-        "Exam_ID": i,
-        "Exam_Name": f"{random.choice(['Midterm','Final','Quiz'])} - Course {crs}",
-        "Exam_Type": random.choice(["Written","Practical","Online"]),
-        "Exam_Date": exam_date,
-        "Duration": random.choice([60,90,120]),
-        "Total_degree": 100,
-        "Crs_ID": crs,
-        "No_question": AVG_Q_PER_EXAM,
-        "instructor_id": inst_id
-    })
-
-# Questions
-questions = []
-question_id = 1
-for ex in exams:
-    nq = random.randint(max(5, AVG_Q_PER_EXAM-4), AVG_Q_PER_EXAM+4)
-    for _ in range(nq):
-        qtype = random.choice(["MCQ","TrueFalse","Short","Essay"])
-        difficulty = random.choice(["Easy","Medium","Hard"])
-        marks = random.choice([1,2,3,4,5])
-        correct = ""
-        if qtype=="MCQ":
-            correct = random.choice(["A","B","C","D"])
-        elif qtype=="TrueFalse":
-            correct = random.choice(["True","False"])
-        topic = fake.word().capitalize()
-        questions.append({
-            "Question_ID": question_id,
-            "Exam_ID": ex["Exam_ID"],
-            "Question_Type": qtype,
-            "Question_Difficulty": difficulty,
-            "Marks": marks,
-            "Correct_Answer": correct,
-            "Crs_id": ex["Crs_ID"],
-            "question_topic": topic
-        })
-        question_id += 1
-
-# Question choices for MCQs
-question_choices = []
-for q in questions:
-    if q["Question_Type"]=="MCQ":
-        question_choices.append({
-            "Question_ID": q["Question_ID"],
-            "choices_id": q["Question_ID"],
-            "A": fake.sentence(nb_words=5),
-            "B": fake.sentence(nb_words=5),
-            "C": fake.sentence(nb_words=5),
-            "D": fake.sentence(nb_words=5)
-        })
+    }
+    # 1-2 phones, distinct as (Student_ID, Phone) is the key
+    phones = [phone_number(rng) for _ in range(rng.choice([1,1,2]))]
+    if len(phones) == 2:
+        phones[1] = distinct_second(*phones)
+    return student, [{"Student_ID": i, "Phone": phone} for phone in phones]
+
+def student_shard(task):
+    shard, lo, hi = task
+    rngs = shard_stream("Student", shard)
+    serials = national_id_serials()
+    students = ColumnTable("Student")
+    phone_students = ColumnTable("Phone_Student")
+    for i in range(lo, hi):
+        student, phones = student_row(i, rngs(i), serials)
+        students.add(student)
+        for phone in phones:
+            phone_students.add(phone)
+    parts = [write_part("Student", shard, students.rows()),
+             write_part("Phone_Student", shard, phone_students.rows())]
+    return parts, array("l", students.column("Track_ID"))
+
+def question_row(question_id, exam_id, rng):
+    # the Question row and, for an MCQ, its Question_Choices row (else None)
+    text = _ctx["text"]
+    qtype = rng.choice(question_types)
+    difficulty = rng.choice(["Easy","Medium","Hard"])
+    marks = rng.choice([1,2,3,4,5])
+    correct = ""
+    if qtype=="MCQ":
+        correct = rng.choice(["A","B","C","D"])
+    elif qtype=="TrueFalse":
+        correct = rng.choice(["True","False"])
+    topic = text.word(rng).capitalize()
+    question = {
+        "Question_ID": question_id,
+        "Exam_ID": exam_id,
+        "Question_Type": qtype,
+        "Question_Difficulty": difficulty,
+        "Marks": marks,
+        "Correct_Answer": correct,
+        "Crs_id": _ctx["exam_crs"][exam_id],
+        "question_topic": topic
+    }
+    # Question choices for MCQs
+    if qtype!="MCQ":
+        return question, None
+    return question, {
+        "Question_ID": question_id,
+        "choices_id": question_id,
+        "A": text.sentence(rng, 5),
+        "B": text.sentence(rng, 5),
+        "C": text.sentence(rng, 5),
+        "D": text.sentence(rng, 5)
+    }
+
+def question_attributes(question):
+    # (marks, kind, correct option) as Result generation looks them up
+    qtype, correct = question["Question_Type"], question["Correct_Answer"]
+    return (question["Marks"], question_types.index(qtype),
+            answer_options[qtype].index(correct) if correct else -1)
+
+def question_shard(task):
+    # questions (+ choices, Exam_Question, Topic) for the exams in [lo, hi); question IDs come
+    # from the exam's precomputed first_q so every shard numbers its questions independently
+    shard, lo, hi = task
+    rngs = shard_stream("Question", shard)
+    exam_first_q, exam_nq = _ctx["exam_first_q"], _ctx["exam_nq"]
+    questions = ColumnTable("Question")
+    question_choices = ColumnTable("Question_Choices")
+    # compact per-question attributes handed back for Result generation
+    q_marks, q_kind, q_correct = array("b"), array("b"), array("b")
+    for exam_id in range(lo, hi):
+        first = exam_first_q[exam_id]
+        for question_id in range(first, first + exam_nq[exam_id]):
+            question, choices = question_row(question_id, exam_id, rngs(question_id))
+            questions.add(question)
+            if choices is not None:
+                question_choices.add(choices)
+            marks, kind, correct = question_attributes(question)
+            q_marks.append(marks)
+            q_kind.append(kind)
+            q_correct.append(correct)
+    parts = [
+        write_part("Question", shard, questions.rows()),
+        write_part("Question_Choices", shard, question_choices.rows()),
+        # Exam_Question mapping (redundant since Question has Exam_ID)
+        write_part("Exam_Question", shard, zip(questions.column("Question_ID"), questions.column("Exam_ID"))),
+        # Topic table derived from questions
+        write_part("Topic", shard, zip(*(questions.column(c) for c in ("Question_ID", "question_topic", "Crs_id")))),
+    ]
+    return parts, (q_marks, q_kind, q_correct)
+
+def student_results(sid, rng):
+    # one row per (exam, question) the student answered; a student's exams are distinct so the
+    # (student_id, Exam_ID, questions_id) key never repeats
+    exam_first_q, exam_nq = _ctx["exam_first_q"], _ctx["exam_nq"]
+    q_marks, q_kind, q_correct = _ctx["q_marks"], _ctx["q_kind"], _ctx["q_correct"]
+    text = _ctx["text"]
+    exam_weights = _ctx["exam_weights"]
+    skill = rng.uniform(0.35, 0.95)  # chance of answering a question correctly
+    # exams of the courses in the student's own track
+    open_exams = _ctx["track_exams"][_ctx["student_track"][sid-1]]
+    if exam_weights is None:
+        taken = rng.sample(open_exams, min(AVG_EXAMS_PER_STUDENT, len(open_exams)))
+    else:
+        taken = sample_distinct(rng, open_exams, exam_weights.__getitem__, AVG_EXAMS_PER_STUDENT)
+    for exam_id in taken:
+        first = exam_first_q[exam_id]
+        for qid in range(first, first + exam_nq[exam_id]):
+            marks = q_marks[qid-1]
+            qtype = question_types[q_kind[qid-1]]
+            if qtype=="MCQ" or qtype=="TrueFalse":
+                options = answer_options[qtype]
+                correct = options[q_correct[qid-1]]
+                if rng.random() < skill:
+                    ans = correct
+                else:
+                    ans = rng.choice([o for o in options if o != correct])
+                degree = marks if ans == correct else 0
+            else:
+                # Short/Essay have no Correct_Answer: partial credit around the student's skill
+                ans = text.sentence(rng, 6)
+                degree = round(marks * min(1.0, max(0.0, rng.gauss(skill, 0.2))), 2)
+            yield (sid, exam_id, qid, degree, ans, 1 if degree*2 >= marks else 0)
 
-# Exam_Question mapping (redundant since Question has Exam_ID)
-# Results generation (this can be very large)
-results = []
-# We'll not keep all in memory as a list to avoid explosion; we'll stream writing results to SQL directly later.
+def iter_results(lo, hi, rngs):
+    for sid in range(lo, hi):
+        yield from student_results(sid, rngs(sid))
 
-# Certificates
-certs = []
-for i in range(1, N_CERT+1):
-    st = random.randint(1, N_STUDENT)
-    certs.append({
+def result_shard(task):
+    # Result rows are never kept in memory: iter_results() is consumed by write_inserts in
+    # BATCH_INSERT_SIZE chunks, so memory stays flat at any volume
+    shard, lo, hi = task
+    return result_parts(shard, lo, hi, iter_results(lo, hi, shard_stream("Result", shard)))
+
+def certificate_row(i, rng):
+    student_skew, date_skew = _ctx["skew"]["Certificate.student_id"], _ctx["skew"]["Certificate.issued_date"]
+    st = rng.randint(1, N_STUDENT) if student_skew is None else 1 + student_skew.pick(rng)
+    return {
         "Certificate_ID": i,
-        "Name": f"ITI Diploma - {random.choice([t['Track_Name'] for t in tracks])}",
-        "platform": random.choice(["ITI","Coursera","Udemy","LinkedIn"]),
-        "duration": random.choice([40,60,80,100]),
-        "issued_date": rand_date(2020,2025),
-        "level": random.choice(["Beginner","Intermediate","Advanced"]),
+        "Name": f"ITI Diploma - {_ctx['track_names'][_ctx['student_track'][st-1]]}",
+        "platform": rng.choice(["ITI","Coursera","Udemy","LinkedIn"]),
+        "duration": rng.choice([40,60,80,100]),
+        "issued_date": rand_date(2020,2025, rng) if date_skew is None else skewed_date(date_skew, 2020, rng),
+        "level": rng.choice(["Beginner","Intermediate","Advanced"]),
         "student_id": st
-    })
+    }
+
+def certificate_shard(task):
+    shard, lo, hi = task
+    rngs = shard_stream("Certificate", shard)
+    certs = ColumnTable("Certificate")
+    for i in range(lo, hi):
+        certs.add(certificate_row(i, rngs(i)))
+    return summed_parts("Certificate", shard, certs.rows(), watch_certificates)
 
-# Freelance
-freelances = []
-for i in range(1, N_FREELANCE+1):
-    frel_st = random.randint(1, N_STUDENT)
-    freelances.append({
+def freelance_row(i, rng):
+    student_skew = _ctx["skew"]["Freelance.student_id"]
+    frel_st = rng.randint(1, N_STUDENT) if student_skew is None else 1 + student_skew.pick(rng)
+    return {
         "freelance_id": i,
-        "platform": random.choice(["Upwork","Freelancer","Fiverr","Local"]),
-        "payment": round(random.uniform(1000,30000),2),
-        "revenue": round(random.uniform(500,20000),2),
-        "duration": random.choice([7,14,30,60]),
-        "client_country": random.choice(["Egypt","UAE","KSA","USA","UK"]),
-        "Date": rand_date(2020,2025),
-        "Rating": random.randint(1,5),
+        "platform": rng.choice(["Upwork","Freelancer","Fiverr","Local"]),
+        "payment": round(rng.uniform(1000,30000),2),
+        "revenue": round(rng.uniform(500,20000),2),
+        "duration": rng.choice([7,14,30,60]),
+        "client_country": rng.choice(["Egypt","UAE","KSA","USA","UK"]),
+        "Date": rand_date(2020,2025, rng),
+        "Rating": rng.randint(1,5),
         "student_id": frel_st
-    })
+    }
+
+def freelance_shard(task):
+    shard, lo, hi = task
+    rngs = shard_stream("Freelance", shard)
+    freelances = ColumnTable("Freelance")
+    for i in range(lo, hi):
+        freelances.add(freelance_row(i, rngs(i)))
+    return summed_parts("Freelance", shard, freelances.rows(), watch_freelance)
+
+# ---------- NumPy backend ----------
+# Columnar versions of the shard workers above. Every column is drawn in one call and rows are
+# only assembled (via .tolist(), so the writers see plain Python values) right before writing.
+password_classes = [string.ascii_lowercase, string.ascii_uppercase, string.digits, "!@#$%^&*()_+"]
+
+def np_rng(table, shard):
+    return np.random.default_rng(derive_seed(table, shard))
+
+def np_pick(rng, values, n):
+    return np.asarray(values)[rng.integers(0, len(values), n)]
+
+def np_dates(rng, start, end, n):
+    # uniform datetime64[D] values in [start, end]
+    return np.datetime64(start, "D") + rng.integers(0, (end - start).days + 1, n)
+
+def np_skewed(rng, sampler, lo, hi, n):
+    # rng.integers(lo, hi, n), or keys lo.. drawn through the relationship's Sampler
+    return rng.integers(lo, hi, n) if sampler is None else lo + sampler.np_pick(rng, n)
+
+def np_skewed_dates(rng, sampler, start, end, n):
+    return np_dates(rng, start, end, n) if sampler is None else np.datetime64(start, "D") + sampler.np_pick(rng, n)
+
+def np_digits(rng, n, width):
+    return np.char.zfill(rng.integers(0, 10**width, n).astype(str), width)
+
+def np_phones(rng, n):
+    return np.char.add(np_pick(rng, ["010","011","012","015"], n), np_digits(rng, n, 8))
+
+def np_national_ids(ids, birth):
+    # YYMMDD of the birth date + the student's 8-digit serial, as national_id_from_birth()
+    years = birth.astype("datetime64[Y]")
+    months = birth.astype("datetime64[M]")
+    yymmdd = ((years.astype(int) + 1970) % 100) * 10000 \
+        + (months - years).astype(int) * 100 + 100 \
+        + (birth - months).astype(int) + 1
+    serials = national_id_serials().np_apply(ids - 1)
+    return np.char.add(np.char.zfill(yymmdd.astype(str), 6), np.char.zfill(serials.astype(str), 8))
+
+def np_passwords(rng, n, length=10):
+    # like Faker.password(): at least one lower, upper, digit and special char, shuffled
+    alphabet = "".join(password_classes)
+    idx = rng.integers(0, len(alphabet), (n, length))
+    offset = 0
+    for k, chars in enumerate(password_classes):
+        idx[:, k] = offset + rng.integers(0, len(chars), n)
+        offset += len(chars)
+    idx = np.take_along_axis(idx, rng.random((n, length)).argsort(axis=1), axis=1)
+    codes = np.frombuffer(alphabet.encode(), dtype=np.uint8)[idx]
+    return np.ascontiguousarray(codes).view(f"S{length}").ravel().astype(str)
+
+def np_rows(*columns):
+    return zip(*[c.tolist() if hasattr(c, "tolist") else c for c in columns])
+
+def np_student_shard(task):
+    shard, lo, hi = task
+    rng = np_rng("Student", shard)
+    n = hi - lo
+    ids = np.arange(lo, hi)
+    male = rng.random(n) < 0.5
+    fn = np.where(male, np_pick(rng, first_names_m, n), np_pick(rng, first_names_f, n))
+    ln = np_pick(rng, last_names, n)
+    today = _ctx["today"]
+    bd = np_dates(rng, (today - timedelta(days=365*30)).date(), (today - timedelta(days=365*20)).date(), n)
+    email = np.char.add(np.char.add(np.char.add(np.char.lower(fn), "."), np.char.lower(ln)), "@student.iti.local")
+    skew = _ctx["skew"]
+    tbi_pick = np_skewed(rng, skew["Student.Track_Branch_Intake"], 0, len(_ctx["tbi"]), n)
+    branch, intake, track = np.asarray(_ctx["tbi"])[tbi_pick].T
+    company = np_skewed(rng, skew["Student.company_id"], 0, N_COMPANY+1, n)
+    students = np_rows(
+        ids, fn, ln, np.where(male, "M", "F"), bd.astype(str), email, np_national_ids(ids, bd),
+        np_pick(rng, governorates, n), np.round(rng.uniform(2.0, 4.0, n), 2),
+        np_pick(rng, ["Graduated","Studying","Dropped"], n),
+        branch, track, np_skewed(rng, skew["Student.Faculty_ID"], 1, N_FACULTY+1, n), intake,
+        np.where(company == 0, None, company),
+        np.char.add("stud", ids.astype(str)), np_passwords(rng, n),
+        np.char.add("https://iti.example.com/students/", ids.astype(str)))
+    # 1-2 phones (2 with probability 1/3, as random.choice([1,1,2])); a second phone equal to the
+    # first gets its last digit stepped, as distinct_second()
+    phone_ids = np.repeat(ids, np.where(rng.random(n) < 1/3, 2, 1))
+    numbers = np_phones(rng, len(phone_ids))
+    repeat = np.nonzero((phone_ids[1:] == phone_ids[:-1]) & (numbers[1:] == numbers[:-1]))[0] + 1
+    for k in repeat:
+        numbers[k] = distinct_second(numbers[k-1], numbers[k])
+    phones = np_rows(phone_ids, numbers)
+    parts = [write_part("Student", shard, students),
+             write_part("Phone_Student", shard, phones)]
+    return parts, array("l", track.tolist())
+
+def np_question_shard(task):
+    shard, lo, hi = task
+    rng = np_rng("Question", shard)
+    words = np.char.capitalize(np.asarray(_ctx["text"].pools["word"]))
+    sentences = np.asarray(_ctx["text"].pools["sentence_5"])
+    nq = np.asarray(_ctx["exam_nq"][lo:hi])
+    total = int(nq.sum())
+    exam_ids = np.repeat(np.arange(lo, hi), nq)
+    first = _ctx["exam_first_q"][lo] if lo < hi else 1
+    qids = np.arange(first, first + total)
+    kind = rng.integers(0, len(question_types), total)
+    marks = rng.integers(1, 6, total)
+    correct = np.where(kind == 0, rng.integers(0, 4, total), np.where(kind == 1, rng.integers(0, 2, total), -1))
+    # index into A,B,C,D,True,False,"" so both answer kinds share one lookup
+    answers = np.asarray(["A","B","C","D","True","False",""])
+    correct_text = answers[np.where(kind == 0, correct, np.where(kind == 1, 4 + correct, 6))]
+    crs = np.asarray(_ctx["exam_crs"])[exam_ids]
+    topic = words[rng.integers(0, len(words), total)]
+    mcq = qids[kind == 0]
+    m = len(mcq)
+    parts = [
+        write_part("Question", shard, np_rows(
+            qids, exam_ids, np.asarray(question_types)[kind], np_pick(rng, ["Easy","Medium","Hard"], total),
+            marks, correct_text, crs, topic)),
+        write_part("Question_Choices", shard, np_rows(
+            mcq, mcq, *[sentences[rng.integers(0, len(sentences), m)] for _ in "ABCD"])),
+        write_part("Exam_Question", shard, np_rows(qids, exam_ids)),
+        write_part("Topic", shard, np_rows(qids, topic, crs)),
+    ]
+    compact = [array("b", a.astype(np.int8).tobytes()) for a in (marks, kind, correct)]
+    return parts, tuple(compact)
+
+def np_csr(lists):
+    # ragged list-of-lists (index 0 unused) as (offsets, flat values) arrays
+    offsets = np.concatenate([[0], np.cumsum([len(v) for v in lists[1:]])]).astype(np.int64)
+    return offsets, np.asarray([x for v in lists[1:] for x in v], dtype=np.int64)
+
+def np_sample_track_exams(rng, tracks, offsets, flat, k):
+    # up to k distinct exams from each student's track list; rows whose track has k or fewer
+    # exams take them all, the rest rejection-resample rows that drew a duplicate
+    n = len(tracks)
+    start, length = offsets[tracks - 1], offsets[tracks] - offsets[tracks - 1]
+    valid = np.arange(k) < np.minimum(length, k)[:, None]
+    pos = np.where(length[:, None] <= k, np.arange(k), (rng.random((n, k)) * length[:, None]).astype(np.int64))
+    while True:
+        # invalid slots get distinct negative sentinels so they never count as duplicates
+        ordered = np.sort(np.where(valid, pos, -1 - np.arange(k)), axis=1)
+        dup = (ordered[:, 1:] == ordered[:, :-1]).any(axis=1)
+        if not dup.any():
+            break
+        pos[dup] = (rng.random((int(dup.sum()), k)) * length[dup, None]).astype(np.int64)
+    rows = np.nonzero(valid)[0]
+    return rows, flat[(start[:, None] + pos)[valid]]
+
+def np_iter_results(lo, hi, rng):
+    exam_first_q = np.asarray(_ctx["exam_first_q"])
+    exam_nq = np.asarray(_ctx["exam_nq"])
+    q_marks = np.frombuffer(_ctx["q_marks"], dtype=np.int8)
+    q_kind = np.frombuffer(_ctx["q_kind"], dtype=np.int8)
+    q_correct = np.frombuffer(_ctx["q_correct"], dtype=np.int8)
+    free_text_answers = _ctx["text"].pools["sentence_6"]
+    answers = np.asarray(["A","B","C","D","True","False"] + free_text_answers)
+    offsets, flat = np_csr(_ctx["track_exams"])
+    student_track = np.asarray(_ctx["student_track"])
+    exam_weights = None if _ctx["exam_weights"] is None else np.frombuffer(_ctx["exam_weights"])
+    for b_lo in range(lo, hi, NP_RESULT_BLOCK):
+        b_hi = min(b_lo + NP_RESULT_BLOCK, hi)
+        n = b_hi - b_lo
+        skill = rng.uniform(0.35, 0.95, n)
+        # exams of the courses in each student's own track
+        if exam_weights is None:
+            pair_row, pair_exam = np_sample_track_exams(rng, student_track[b_lo-1:b_hi-1], offsets, flat,
+                                                        AVG_EXAMS_PER_STUDENT)
+        else:
+            pair_row, pair_exam = np_sample_distinct(rng, student_track[b_lo-1:b_hi-1], offsets, flat,
+                                                     exam_weights, AVG_EXAMS_PER_STUDENT)
+        counts = exam_nq[pair_exam]
+        sid = np.repeat(b_lo + pair_row, counts)
+        eid = np.repeat(pair_exam, counts)
+        # question IDs: exam's first question + position within the exam
+        within = np.arange(int(counts.sum())) - np.repeat(np.cumsum(counts) - counts, counts)
+        qid = np.repeat(exam_first_q[pair_exam], counts) + within
+        sk = np.repeat(skill[pair_row], counts)
+        m = len(qid)
+        kind, marks, correct = q_kind[qid-1], q_marks[qid-1], q_correct[qid-1]
+        # MCQ/TrueFalse: right with probability skill, otherwise one of the other options
+        n_opts = np.where(kind == 0, 4, 2)
+        right = rng.random(m) < sk
+        picked = np.where(right, correct, (correct + 1 + rng.integers(0, 3, m) % (n_opts - 1)) % n_opts)
+        objective = kind < 2
+        # Short/Essay: partial credit around the student's skill
+        partial_marks = np.round(marks * np.clip(rng.normal(sk, 0.2), 0.0, 1.0), 2)
+        degree = np.where(objective, np.where(right, marks, 0), partial_marks)
+        ans = np.where(objective, np.where(kind == 0, picked, 4 + picked),
+                       6 + rng.integers(0, len(free_text_answers), m))
+        yield from np_rows(sid, eid, qid, degree, answers[ans], (degree * 2 >= marks).astype(np.int8))
+
+def np_result_shard(task):
+    shard, lo, hi = task
+    return result_parts(shard, lo, hi, np_iter_results(lo, hi, np_rng("Result", shard)))
+
+def np_certificate_shard(task):
+    shard, lo, hi = task
+    rng = np_rng("Certificate", shard)
+    n = hi - lo
+    names = np.char.add("ITI Diploma - ", np.asarray(_ctx["track_names"][1:]))
+    student_track = np.asarray(_ctx["student_track"])
+    students = np_skewed(rng, _ctx["skew"]["Certificate.student_id"], 1, N_STUDENT+1, n)
+    certs = np_rows(
+        np.arange(lo, hi), names[student_track[students-1] - 1], np_pick(rng, ["ITI","Coursera","Udemy","LinkedIn"], n),
+        np_pick(rng, [40,60,80,100], n),
+        np_skewed_dates(rng, _ctx["skew"]["Certificate.issued_date"], datetime(2020,1,1), datetime(2025,12,31), n).astype(str),
+        np_pick(rng, ["Beginner","Intermediate","Advanced"], n), students)
+    return summed_parts("Certificate", shard, certs, watch_certificates)
 
-# Topic table derived from questions
-topics = []
-for q in questions:
-    topics.append({"topic_id": q["Question_ID"], "topic_name": q["question_topic"], "crs_id": q["Crs_id"]})
+def np_freelance_shard(task):
+    shard, lo, hi = task
+    rng = np_rng("Freelance", shard)
+    n = hi - lo
+    freelances = np_rows(
+        np.arange(lo, hi), np_pick(rng, ["Upwork","Freelancer","Fiverr","Local"], n),
+        np.round(rng.uniform(1000, 30000, n), 2), np.round(rng.uniform(500, 20000, n), 2),
+        np_pick(rng, [7,14,30,60], n), np_pick(rng, ["Egypt","UAE","KSA","USA","UK"], n),
+        np_dates(rng, datetime(2020,1,1), datetime(2025,12,31), n).astype(str),
+        rng.integers(1, 6, n), np_skewed(rng, _ctx["skew"]["Freelance.student_id"], 1, N_STUDENT+1, n))
+    return summed_parts("Freelance", shard, freelances, watch_freelance)
+
+SHARD_FUNCS = {
+    "python": {"Question": question_shard, "Student": student_shard, "Result": result_shard,
+               "Certificate": certificate_shard, "Freelance": freelance_shard},
+    "numpy": {"Question": np_question_shard, "Student": np_student_shard, "Result": np_result_shard,
+              "Certificate": np_certificate_shard, "Freelance": np_freelance_shard},
+}
+# the python generators, drawing each row from its own stream (see shard_stream)
+SHARD_FUNCS["counter"] = SHARD_FUNCS["python"]
+
+def run_shard(table, task):
+    # one shard of `table` (plus the tables generated alongside it); with metrics on, the time
+    # not spent writing or producing lazy rows is the shard's up-front generation
+    func = SHARD_FUNCS[BACKEND][table]
+    if _ctx["profile"]:
+        # per-shard profiles are merged into the main one at the end of the run
+        func = lambda task, func=func: profile_shard(func, task, f"{_ctx['profile']}.{table}.{task[0]:04d}")
+    m = _ctx["metrics"]
+    if m is None:
+        return func(task), None
+    m.data.clear()
+    start = perf_counter()
+    result = func(task)
+    # time.io is part of time.write, not counted twice
+    spent = sum(v for k, v in m.data.items() if k.startswith(("time.generate.", "time.write.")))
+    m.add(f"time.generate.{table}", perf_counter() - start - spent)
+    return result, dict(m.data)
+
+def run_indexed(item):
+    i, table, task = item
+    return i, run_shard(table, task)
+
+def run_tasks(table_tasks, ctx, metrics, checkpoint=None):
+    # run (table, task) shards; results come back in submission order either way. Shards the
+    # checkpoint has on record are taken from it, the others recorded as soon as they finish
+    done = [checkpoint.load(table, task[0]) if checkpoint else None for table, task in table_tasks]
+    todo = [(i, table, task) for i, (table, task) in enumerate(table_tasks) if done[i] is None]
+    if len(todo) < len(done):
+        print(f"Resuming: {len(done) - len(todo)} of {len(done)} shards taken from the checkpoint")
+        if ctx["progress"] is not None:
+            with ctx["progress"].get_lock():
+                ctx["progress"].value += sum(n for d in done if d for *_, n in shard_parts(d[0]))
+
+    def record(finished):
+        for i, result in finished:
+            if checkpoint:
+                checkpoint.save(table_tasks[i][0], table_tasks[i][1][0], result)
+            done[i] = result
+
+    if N_WORKERS <= 1:
+        init_worker(ctx)
+        record(map(run_indexed, todo))
+    else:
+        with Pool(N_WORKERS, initializer=init_worker, initargs=(ctx,)) as pool:
+            record(pool.imap_unordered(run_indexed, todo))
+    for _, data in done:
+        if data:
+            metrics.merge(data)
+    return [result for result, _ in done]
+
+# ---------- Generate basic metadata entities ----------
+# The dimensions are generated in stages, in DIMENSION_STAGES order, all drawing from the global
+# `random` seeded by SEED. Each stage adds its tables to `dims`; the settings it reads key it in
+# the dimension cache (dimcache.py), so a stage is only regenerated when they or an earlier
+# stage's change.
+def gen_branches(dims, text):
+    branches = dims["Branch"] = ColumnTable("Branch")
+    for i in range(1, N_BRANCH+1):
+        branches.add({
+            "Branch_ID": i,
+            "Branch_Name": f"{text.city(random)} Branch",
+            "Branch_Loc": f"{text.street_address(random)}, {random.choice(governorates)}"
+        })
+
+def gen_departments(dims, text):
+    departments = dims["Department"] = ColumnTable("Department")
+    for i in range(1, N_DEPT+1):
+        departments.add({"Dept_id": i, "Name": f"Department of {text.word(random).capitalize()}"})
+
+def gen_faculties(dims, text):
+    faculties = dims["Faculty"] = ColumnTable("Faculty")
+    unis = ["Cairo University","Ain Shams University","Alexandria University","AUC","Mansoura University"]
+    for i in range(1, N_FACULTY+1):
+        faculties.add({
+            "Faculty_ID": i,
+            "Faculty_Name": f"Faculty of {text.word(random).capitalize()}",
+            "University_Name": random.choice(unis),
+            "city": random.choice(governorates)
+        })
+
+def gen_tracks(dims, text):
+    tracks = dims["Track"] = ColumnTable("Track")
+    for i in range(1, N_TRACK+1):
+        tracks.add({
+            "Track_ID": i,
+            "Track_Name": f"{random.choice(['FullStack','DataScience','Cloud','Cybersecurity','AI','UIUX'])} Track {i}",
+            "Description": text.sentence(random, 8),
+            "supervisor_instruct": None,  # assign later
+            "Dept_id": random.randint(1,N_DEPT)
+        })
+
+def gen_intakes(dims, text):
+    intakes = dims["Intake"] = ColumnTable("Intake")
+    for i in range(1, N_INTAKE+1):
+        s = rand_date(2020,2024)
+        e = s + timedelta(days=random.randint(60,240))
+        intakes.add({"id": i, "Start_date": s, "End_date": e, "Type": random.choice(["Full-time","Evening","Part-time"])})
+
+def gen_courses(dims, text):
+    courses = dims["Course"] = ColumnTable("Course")
+    for i in range(1, N_COURSE+1):
+        base = random.choice(course_bases)
+        courses.add({
+            "Crs_ID": i,
+            "Crs_Name": f"{base} {i}",
+            "Description": text.sentence(random, 10),
+            "Hours": random.choice([30,40,50,60,80]),
+            "Dept_id": random.randint(1,N_DEPT)
+        })
+
+def gen_companies(dims, text):
+    companies = dims["Company"] = ColumnTable("Company")
+    for i in range(1, N_COMPANY+1):
+        name = random.choice(company_samples) + ("" if i<=len(company_samples) else f" {i}")
+        companies.add({"company_id": i, "name": name, "city": random.choice(governorates)})
+
+def gen_instructors(dims, text):
+    # Email is UNIQUE: repeats of a name are numbered, mona.gamal2@...
+    instructors = dims["Instructor"] = ColumnTable("Instructor")
+    emails = NameCounter()
+    for i in range(1, N_INSTRUCTOR+1):
+        gender = random.choice(["M","F"])
+        fn = random.choice(first_names_m) if gender=="M" else random.choice(first_names_f)
+        ln = random.choice(last_names)
+        hire = rand_date(2010,2024)
+        instructors.add({
+            "Instructor_ID": i,
+            "First_Name": fn,
+            "Last_Name": ln,
+            "Gender": gender,
+            "Email": emails.allocate(f"{fn.lower()}.{ln.lower()}") + "@iti.edu.eg",
+            "Phone": phone_number(),
+            "Hire_Date": hire,
+            "salary": round(random.uniform(8000,35000),2),
+            "Dept_id": random.randint(1,N_DEPT),
+            "user_id": f"instr{i}",
+            "Password": text.password(random),
+            "city": random.choice(governorates),
+            "working_status": random.choice(["Full-time","Part-time","Visiting"])
+        })
+
+def gen_instructor_branches(dims, text):
+    instr_branch = dims["Instructor_Branch"] = ColumnTable("Instructor_Branch")
+    for instr_id in dims["Instructor"].column("Instructor_ID"):
+        n = random.randint(1,3)
+        brs = random.sample(range(1,N_BRANCH+1), n)
+        for b in brs:
+            instr_branch.add({"Instructor_ID": instr_id, "Branch_ID": b})
+
+def gen_teach(dims, text):
+    # Teach & instructor_crs (map courses to instructors)
+    teach = dims["Teach"] = ColumnTable("Teach")
+    instr_crs = dims["Instructor_Crs"] = ColumnTable("Instructor_Crs")
+    for crs in dims["Course"].column("Crs_ID"):
+        n = random.randint(1,4)
+        insts = random.sample(range(1,N_INSTRUCTOR+1), n)
+        for inst in insts:
+            teach.add({"Instructor_id": inst, "Crs_ID": crs})
+            instr_crs.add({"Crs_ID": crs, "Instructor_ID": inst})
+
+def gen_crs_tracks(dims, text):
+    crs_track = dims["Crs_Track"] = ColumnTable("Crs_Track")
+    for crs in dims["Course"].column("Crs_ID"):
+        n = random.randint(1,3)
+        tks = random.sample(range(1,N_TRACK+1), n)
+        for tk in tks:
+            crs_track.add({"Track_ID": tk, "Crs_ID": crs})
+
+def gen_track_branch_intakes(dims, text):
+    track_branch_intake = dims["Track_Branch_Intake"] = ColumnTable("Track_Branch_Intake")
+    for t in range(1,N_TRACK+1):
+        brs = random.sample(range(1,N_BRANCH+1), random.randint(1,3))
+        its = random.sample(range(1,N_INTAKE+1), random.randint(1,3))
+        for b in brs:
+            for it in its:
+                track_branch_intake.add({"Branch_ID": b, "intake_id": it, "Track_ID": t})
+
+def relationships(dims):
+    return RelationshipIndex(dims["Teach"], dims["Crs_Track"], dims["Instructor_Branch"], dims["Track_Branch_Intake"])
+
+def gen_supervisors(dims, text):
+    # assign supervisors to tracks, preferring instructors at a branch the track runs in
+    rel = relationships(dims)
+    supervisors = []
+    for t in dims["Track"].column("Track_ID"):
+        insts = rel.track_instructors(t)
+        supervisors.append(random.choice(insts) if insts else random.randint(1, N_INSTRUCTOR))
+    dims["Track"].set_column("supervisor_instruct", supervisors)
+
+def gen_exams(dims, text):
+    rel = relationships(dims)
+    crs_skew, date_skew = skew("Exam.Crs_ID", N_COURSE), skew_dates("Exam.Exam_Date", 2020, 2025)
+    exams = dims["Exam"] = ColumnTable("Exam")
+    for i in range(1, N_EXAM+1):
+        crs = random.randint(1,N_COURSE) if crs_skew is None else 1 + crs_skew.pick(random)
+        # pick instructor who teaches this course if possible
+        insts = rel.course_instructors.get(crs)
+        inst_id = random.choice(insts) if insts else random.randint(1,N_INSTRUCTOR)
+        exam_date = rand_date(2020,2025) if date_skew is None else skewed_date(date_skew, 2020, random)
+        exams.add({
+            "Exam_ID": i,
+            "Exam_Name": f"{random.choice(['Midterm','Final','Quiz'])} - Course {crs}",
+            "Exam_Type": random.choice(["Written","Practical","Online"]),
+            "Exam_Date": exam_date,
+            "Duration": random.choice([60,90,120]),
+            "Total_degree": 100,
+            "Crs_ID": crs,
+            "No_question": AVG_Q_PER_EXAM,
+            "instructor_id": inst_id
+        })
+
+# (stage, tables it writes, settings and skewed relationships it reads); its time is the first table's
+DIMENSION_STAGES = [
+    (gen_branches, ["Branch"], ["N_BRANCH"]),
+    (gen_departments, ["Department"], ["N_DEPT"]),
+    (gen_faculties, ["Faculty"], ["N_FACULTY"]),
+    (gen_tracks, ["Track"], ["N_TRACK", "N_DEPT"]),
+    (gen_intakes, ["Intake"], ["N_INTAKE"]),
+    (gen_courses, ["Course"], ["N_COURSE", "N_DEPT"]),
+    (gen_companies, ["Company"], ["N_COMPANY"]),
+    (gen_instructors, ["Instructor"], ["N_INSTRUCTOR", "N_DEPT"]),
+    (gen_instructor_branches, ["Instructor_Branch"], ["N_BRANCH"]),
+    (gen_teach, ["Teach", "Instructor_Crs"], ["N_INSTRUCTOR"]),
+    (gen_crs_tracks, ["Crs_Track"], ["N_TRACK"]),
+    (gen_track_branch_intakes, ["Track_Branch_Intake"], ["N_TRACK", "N_BRANCH", "N_INTAKE"]),
+    (gen_supervisors, ["Track"], ["N_INSTRUCTOR"]),
+    (gen_exams, ["Exam"], ["N_EXAM", "N_COURSE", "N_INSTRUCTOR", "AVG_Q_PER_EXAM", "Exam.Crs_ID", "Exam.Exam_Date"]),
+]
+
+# the modules dimension rows are drawn, sampled, laid out or cached by, besides this script:
+# their source is part of the first cache key
+DIMENSION_SOURCES = ["unique", "relations", "distributions", "columns", "textpool", "dimcache"]
+
+def stage_keys(text):
+    # the cache key of every stage, chained from the seed, the text pool and the generator's source
+    here = os.path.dirname(os.path.abspath(__file__))
+    sources = [__file__] + [os.path.join(here, f"{name}.py") for name in DIMENSION_SOURCES]
+    key = source_key(SEED, text.key, source_hash(sources))
+    keys = []
+    for stage, _, reads in DIMENSION_STAGES:
+        settings = {name: DISTRIBUTIONS.get(name, "uniform") if name in RELATIONSHIPS else globals()[name]
+                    for name in reads}
+        key = chain_key(key, stage.__name__, settings)
+        keys.append(key)
+    return keys
+
+def generate_dimensions(text, metrics):
+    random.seed(SEED)
+    laps = Laps(metrics)
+    cache = DimensionCache(DIMENSION_CACHE, DIMENSION_CACHE_BYTES) if DIMENSION_CACHE else None
+    keys = stage_keys(text) if cache else []
+    dims = {}
+    # the leading stages already on disk are loaded, with the RNG state they left behind
+    loaded = 0
+    for key in keys:
+        entry = cache.load(key)
+        if entry is None:
+            break
+        tables, state = entry
+        dims.update(tables)
+        random.setstate(state)
+        loaded += 1
+    if loaded:
+        laps.lap("time.phase.dimension_cache")
+        print(f"Dimensions: {loaded} of {len(DIMENSION_STAGES)} stages loaded from {DIMENSION_CACHE}")
+    for k, (stage, tables, _) in enumerate(DIMENSION_STAGES[loaded:], loaded):
+        stage(dims, text)
+        laps.lap(f"time.generate.{tables[0]}")
+        if cache:
+            cache.store(keys[k], {table: dims[table] for table in tables}, random.getstate())
+    if cache:
+        cache.evict()
+
+    rel = relationships(dims)
+    rel.add_exams(dims["Exam"])
+    laps.lap("time.phase.relationship_index")
+    # in load order, as the dimension parts are written
+    return rel, {table: dims[table] for table in ("Branch", "Department", "Faculty", "Track", "Intake", "Course",
+                                                 "Company", "Instructor", "Instructor_Branch", "Teach", "Crs_Track",
+                                                 "Instructor_Crs", "Exam", "Track_Branch_Intake")}
+
+# ---------- Delta: a new intake on top of an earlier run ----------
+def generate_delta_dimensions(state, metrics):
+    # the new intake starts after the last one; its exams fall inside it and use courses that
+    # belong to a track, taught by their existing instructors
+    random.seed(derive_seed("dimensions", 0))
+    laps = Laps(metrics)
+
+    start = datetime.fromisoformat(state["last_intake_start"]).date() + timedelta(days=random.randint(30,120))
+    end = start + timedelta(days=random.randint(60,240))
+    intakes = ColumnTable("Intake")
+    intakes.add({"id": N_INTAKE, "Start_date": start, "End_date": end, "Type": random.choice(["Full-time","Evening","Part-time"])})
+    laps.lap("time.generate.Intake")
+
+    # every track opens the new intake at the branches it already runs in
+    track_branch_intake = ColumnTable("Track_Branch_Intake")
+    for t, brs in sorted(state["track_branches"].items()):
+        for b in brs:
+            track_branch_intake.add({"Branch_ID": b, "intake_id": N_INTAKE, "Track_ID": t})
+    laps.lap("time.generate.Track_Branch_Intake")
+
+    # the earlier run's bridge tables, rebuilt from the keys kept in the state
+    teach = ColumnTable("Teach")
+    for c, insts in state["course_instructors"].items():
+        for i in insts:
+            teach.add({"Instructor_id": i, "Crs_ID": c})
+    crs_track = ColumnTable("Crs_Track")
+    for t, crs in state["track_courses"].items():
+        for c in crs:
+            crs_track.add({"Track_ID": t, "Crs_ID": c})
+    rel = RelationshipIndex(teach, crs_track, ColumnTable("Instructor_Branch"), track_branch_intake)
+    laps.lap("time.phase.relationship_index")
+
+    track_courses = sorted({c for crs in rel.track_courses.values() for c in crs})
+    exams = ColumnTable("Exam")
+    for i in range(N_EXAM - DELTA_EXAMS + 1, N_EXAM+1):
+        crs = random.choice(track_courses)
+        insts = rel.course_instructors.get(crs)
+        inst_id = random.choice(insts) if insts else random.randint(1,N_INSTRUCTOR)
+        exams.add({
+            "Exam_ID": i,
+            "Exam_Name": f"{random.choice(['Midterm','Final','Quiz'])} - Course {crs}",
+            "Exam_Type": random.choice(["Written","Practical","Online"]),
+            "Exam_Date": start + timedelta(days=random.randint(0, (end - start).days)),
+            "Duration": random.choice([60,90,120]),
+            "Total_degree": 100,
+            "Crs_ID": crs,
+            "No_question": AVG_Q_PER_EXAM,
+            "instructor_id": inst_id
+        })
+    laps.lap("time.generate.Exam")
+
+    rel.add_exams(exams)
+    laps.lap("time.phase.relationship_index")
+
+    return rel, {"Intake": intakes, "Exam": exams, "Track_Branch_Intake": track_branch_intake}
 
 # --------- Write SQL file ----------
-print(f"Writing SQL to {OUT_SQL_FILE} ...")
-with open(OUT_SQL_FILE, "w", encoding="utf-8") as f:
-    # header
-    write_line(f, "-- ITI Examination System large dataset SQL (generated)")
-    write_line(f, f"-- Generated on: {datetime.now().isoformat()}")
-    write_line(f, "SET NOCOUNT ON;")
-    write_line(f, "")
-
-    # CREATE TABLE statements (T-SQL)
-    write_line(f, "-- CREATE TABLES")
-    write_line(f, "CREATE TABLE Branch (Branch_ID INT IDENTITY(1,1) PRIMARY KEY, Branch_Name NVARCHAR(100) NOT NULL, Branch_Loc NVARCHAR(150) NOT NULL);")
-    write_line(f, "CREATE TABLE Department (Dept_id INT IDENTITY(1,1) PRIMARY KEY, Name NVARCHAR(150) NOT NULL);")
-    write_line(f, "CREATE TABLE Faculty (Faculty_ID INT IDENTITY(1,1) PRIMARY KEY, Faculty_Name NVARCHAR(150), University_Name NVARCHAR(150), city NVARCHAR(100));")
-    write_line(f, "CREATE TABLE Track (Track_ID INT IDENTITY(1,1) PRIMARY KEY, Track_Name NVARCHAR(150) NOT NULL, Description NVARCHAR(250), supervisor_instruct INT NULL, Dept_id INT NULL);")
-    write_line(f, "CREATE TABLE Intake (id INT IDENTITY(1,1) PRIMARY KEY, Start_date DATE, End_date DATE, Type NVARCHAR(50));")
-    write_line(f, "CREATE TABLE Course (Crs_ID INT IDENTITY(1,1) PRIMARY KEY, Crs_Name NVARCHAR(150) NOT NULL, Description NVARCHAR(250), Hours INT, Dept_id INT);")
-    write_line(f, "CREATE TABLE Instructor (Instructor_ID INT IDENTITY(1,1) PRIMARY KEY, First_Name NVARCHAR(50), Last_Name NVARCHAR(50), Gender CHAR(1), Email NVARCHAR(100) UNIQUE, Phone NVARCHAR(20), Hire_Date DATE, salary DECIMAL(12,2), Dept_id INT, user_id NVARCHAR(50), Password NVARCHAR(100), city NVARCHAR(100), working_status NVARCHAR(50));")
-    write_line(f, "CREATE TABLE Instructor_Branch (Instructor_ID INT, Branch_ID INT, PRIMARY KEY (Instructor_ID, Branch_ID));")
-    write_line(f, "CREATE TABLE Student (Student_ID INT IDENTITY(1,1) PRIMARY KEY, Student_First_Name NVARCHAR(50), Student_Last_Name NVARCHAR(50), Gender CHAR(1), Birth_date DATE, Email NVARCHAR(100), National_ID VARCHAR(14) UNIQUE, governorate NVARCHAR(50), Gpa DECIMAL(3,2), Graduation_Status NVARCHAR(50), Branch_ID INT, Track_ID INT, Faculty_ID INT, intack_id INT, company_id INT NULL, user_id NVARCHAR(50), Password NVARCHAR(100), student_url NVARCHAR(250));")
-    write_line(f, "CREATE TABLE Phone_Student (Student_ID INT, Phone NVARCHAR(20), PRIMARY KEY (Student_ID, Phone));")
-    write_line(f, "CREATE TABLE Teach (Instructor_id INT, Crs_ID INT, PRIMARY KEY (Instructor_id, Crs_ID));")
-    write_line(f, "CREATE TABLE Crs_Track (Track_ID INT, Crs_ID INT, PRIMARY KEY (Track_ID, Crs_ID));")
-    write_line(f, "CREATE TABLE Instructor_Crs (Crs_ID INT, Instructor_ID INT, PRIMARY KEY (Crs_ID, Instructor_ID));")
-    write_line(f, "CREATE TABLE Company (company_id INT IDENTITY(1,1) PRIMARY KEY, name NVARCHAR(150), city NVARCHAR(100));")
-    write_line(f, "CREATE TABLE Exam (Exam_ID INT IDENTITY(1,1) PRIMARY KEY, Exam_Name NVARCHAR(200), Exam_Type NVARCHAR(50), Exam_Date DATE, Duration INT, Total_degree INT, Crs_ID INT, No_question INT, instructor_id INT);")
-    write_line(f, "CREATE TABLE Question (Question_ID INT PRIMARY KEY, Exam_ID INT, Question_Type NVARCHAR(50), Question_Difficulty NVARCHAR(20), Marks INT, Correct_Answer NVARCHAR(50), Crs_id INT, question_topic NVARCHAR(100));")
-    write_line(f, "CREATE TABLE Question_Choices (Question_ID INT, choices_id INT, A NVARCHAR(500), B NVARCHAR(500), C NVARCHAR(500), D NVARCHAR(500), PRIMARY KEY (Question_ID, choices_id));")
-    write_line(f, "CREATE TABLE Exam_Question (Question_ID INT, Exam_ID INT, PRIMARY KEY (Question_ID, Exam_ID));")
-    write_line(f, "CREATE TABLE Result (student_id INT, Exam_ID INT, questions_id INT, degree DECIMAL(6,2), student_ans NVARCHAR(500), pass BIT, PRIMARY KEY (student_id, Exam_ID, questions_id));")
-    write_line(f, "CREATE TABLE Certificate (Certificate_ID INT IDENTITY(1,1) PRIMARY KEY, Name NVARCHAR(200), platform NVARCHAR(100), duration INT, issued_date DATE, level NVARCHAR(50), student_id INT);")
-    write_line(f, "CREATE TABLE Freelance (freelance_id INT IDENTITY(1,1) PRIMARY KEY, platform NVARCHAR(100), payment DECIMAL(12,2), revenue DECIMAL(12,2), duration INT, client_country NVARCHAR(100), Date DATE, Rating INT, student_id INT);")
-    write_line(f, "CREATE TABLE Topic (topic_id INT PRIMARY KEY, topic_name NVARCHAR(200), crs_id INT);")
-    write_line(f, "CREATE TABLE Track_Branch_Intake (Branch_ID INT, intake_id INT, Track_ID INT, PRIMARY KEY (Branch_ID, intake_id, Track_ID));")
-    write_line(f, "")
-
-    # Foreign key constraints (add after tables creation)
-    write_line(f, "-- FOREIGN KEYS")
-    # simple FK additions
-    write_line(f, "ALTER TABLE Track ADD CONSTRAINT FK_Track_Dept FOREIGN KEY (Dept_id) REFERENCES Department(Dept_id);")
-    write_line(f, "ALTER TABLE Track ADD CONSTRAINT FK_Track_Supervisor FOREIGN KEY (supervisor_instruct) REFERENCES Instructor(Instructor_ID);")
-    write_line(f, "ALTER TABLE Course ADD CONSTRAINT FK_Course_Dept FOREIGN KEY (Dept_id) REFERENCES Department(Dept_id);")
-    write_line(f, "ALTER TABLE Instructor ADD CONSTRAINT FK_Instr_Dept FOREIGN KEY (Dept_id) REFERENCES Department(Dept_id);")
-    write_line(f, "ALTER TABLE Student ADD CONSTRAINT FK_Student_Branch FOREIGN KEY (Branch_ID) REFERENCES Branch(Branch_ID);")
-    write_line(f, "ALTER TABLE Student ADD CONSTRAINT FK_Student_Track FOREIGN KEY (Track_ID) REFERENCES Track(Track_ID);")
-    write_line(f, "ALTER TABLE Student ADD CONSTRAINT FK_Student_Faculty FOREIGN KEY (Faculty_ID) REFERENCES Faculty(Faculty_ID);")
-    write_line(f, "ALTER TABLE Student ADD CONSTRAINT FK_Student_Intake FOREIGN KEY (intack_id) REFERENCES Intake(id);")
-    write_line(f, "ALTER TABLE Student ADD CONSTRAINT FK_Student_Company FOREIGN KEY (company_id) REFERENCES Company(company_id);")
-    write_line(f, "ALTER TABLE Teach ADD CONSTRAINT FK_Teach_Instr FOREIGN KEY (Instructor_id) REFERENCES Instructor(Instructor_ID);")
-    write_line(f, "ALTER TABLE Teach ADD CONSTRAINT FK_Teach_Crs FOREIGN KEY (Crs_ID) REFERENCES Course(Crs_ID);")
-    write_line(f, "ALTER TABLE Crs_Track ADD CONSTRAINT FK_CrsTrack_Track FOREIGN KEY (Track_ID) REFERENCES Track(Track_ID);")
-    write_line(f, "ALTER TABLE Crs_Track ADD CONSTRAINT FK_CrsTrack_Crs FOREIGN KEY (Crs_ID) REFERENCES Course(Crs_ID);")
-    write_line(f, "ALTER TABLE Instructor_Branch ADD CONSTRAINT FK_InstrBranch_Instr FOREIGN KEY (Instructor_ID) REFERENCES Instructor(Instructor_ID);")
-    write_line(f, "ALTER TABLE Instructor_Branch ADD CONSTRAINT FK_InstrBranch_Branch FOREIGN KEY (Branch_ID) REFERENCES Branch(Branch_ID);")
-    write_line(f, "ALTER TABLE Instructor_Crs ADD CONSTRAINT FK_InstrCrs_Crs FOREIGN KEY (Crs_ID) REFERENCES Course(Crs_ID);")
-    write_line(f, "ALTER TABLE Instructor_Crs ADD CONSTRAINT FK_InstrCrs_Instr FOREIGN KEY (Instructor_ID) REFERENCES Instructor(Instructor_ID);")
-    write_line(f, "ALTER TABLE Exam ADD CONSTRAINT FK_Exam_Crs FOREIGN KEY (Crs_ID) REFERENCES Course(Crs_ID);")
-    write_line(f, "ALTER TABLE Exam ADD CONSTRAINT FK_Exam_Instr FOREIGN KEY (instructor_id) REFERENCES Instructor(Instructor_ID);")
-    write_line(f, "ALTER TABLE Question ADD CONSTRAINT FK_Question_Exam FOREIGN KEY (Exam_ID) REFERENCES Exam(Exam_ID);")
-    write_line(f, "ALTER TABLE Question ADD CONSTRAINT FK_Question_Crs FOREIGN KEY (Crs_id) REFERENCES Course(Crs_ID);")
-    write_line(f, "ALTER TABLE Question_Choices ADD CONSTRAINT FK_QChoices_Q FOREIGN KEY (Question_ID) REFERENCES Question(Question_ID);")
-    write_line(f, "ALTER TABLE Exam_Question ADD CONSTRAINT FK_ExamQuestion_Q FOREIGN KEY (Question_ID) REFERENCES Question(Question_ID);")
-    write_line(f, "ALTER TABLE Exam_Question ADD CONSTRAINT FK_ExamQuestion_Exam FOREIGN KEY (Exam_ID) REFERENCES Exam(Exam_ID);")
-    write_line(f, "ALTER TABLE Result ADD CONSTRAINT FK_Result_Student FOREIGN KEY (student_id) REFERENCES Student(Student_ID);")
-    write_line(f, "ALTER TABLE Result ADD CONSTRAINT FK_Result_Exam FOREIGN KEY (Exam_ID) REFERENCES Exam(Exam_ID);")
-    write_line(f, "ALTER TABLE Result ADD CONSTRAINT FK_Result_Q FOREIGN KEY (questions_id) REFERENCES Question(Question_ID);")
-    write_line(f, "ALTER TABLE Certificate ADD CONSTRAINT FK_Cert_Student FOREIGN KEY (student_id) REFERENCES Student(Student_ID);")
-    write_line(f, "ALTER TABLE Freelance ADD CONSTRAINT FK_Freelance_Student FOREIGN KEY (student_id) REFERENCES Student(Student_ID);")
-    write_line(f, "ALTER TABLE Topic ADD CONSTRAINT FK_Topic_Crs FOREIGN KEY (crs_id) REFERENCES Course(Crs_ID);")
-    write_line(f, "ALTER TABLE Track_Branch_Intake ADD CONSTRAINT FK_TBI_Track FOREIGN KEY (Track_ID) REFERENCES Track(Track_ID);")
-    write_line(f, "ALTER TABLE Track_Branch_Intake ADD CONSTRAINT FK_TBI_Branch FOREIGN KEY (Branch_ID) REFERENCES Branch(Branch_ID);")
-    write_line(f, "ALTER TABLE Track_Branch_Intake ADD CONSTRAINT FK_TBI_Intake FOREIGN KEY (intake_id) REFERENCES Intake(id);")
-    write_line(f, "")
-
-    # INSERTS (use IDENTITY_INSERT and explicit ids)
-    write_line(f, "/* ---------- INSERT DATA ---------- */")
-    write_line(f, "BEGIN TRANSACTION;")
-    write_line(f, "")
-
-    # Branch
-    write_line(f, "SET IDENTITY_INSERT Branch ON;")
-    rows = []
-    for b in branches:
-        rows.append(f"({b['Branch_ID']}, {escape(b['Branch_Name'])}, {escape(b['Branch_Loc'])})")
-    for chunk in chunked(rows, BATCH_INSERT_SIZE):
-        write_line(f, "INSERT INTO Branch (Branch_ID, Branch_Name, Branch_Loc) VALUES")
-        write_line(f, ",\n".join(chunk) + ";")
-    write_line(f, "SET IDENTITY_INSERT Branch OFF;")
-    write_line(f, "")
-
-    # Department
-    write_line(f, "SET IDENTITY_INSERT Department ON;")
-    rows = []
-    for d in departments:
-        rows.append(f"({d['Dept_id']}, {escape(d['Name'])})")
-    for chunk in chunked(rows, BATCH_INSERT_SIZE):
-        write_line(f, "INSERT INTO Department (Dept_id, Name) VALUES")
-        write_line(f, ",\n".join(chunk) + ";")
-    write_line(f, "SET IDENTITY_INSERT Department OFF;")
-    write_line(f, "")
-
-    # Faculty
-    write_line(f, "SET IDENTITY_INSERT Faculty ON;")
-    rows = []
-    for fac in faculties:
-        rows.append(f"({fac['Faculty_ID']}, {escape(fac['Faculty_Name'])}, {escape(fac['University_Name'])}, {escape(fac['city'])})")
-    for chunk in chunked(rows, BATCH_INSERT_SIZE):
-        write_line(f, "INSERT INTO Faculty (Faculty_ID, Faculty_Name, University_Name, city) VALUES")
-        write_line(f, ",\n".join(chunk) + ";")
-    write_line(f, "SET IDENTITY_INSERT Faculty OFF;")
-    write_line(f, "")
-
-    # Track
-    write_line(f, "SET IDENTITY_INSERT Track ON;")
-    rows = []
-    for t in tracks:
-        sup = t['supervisor_instruct'] if t['supervisor_instruct'] is not None else "NULL"
-        rows.append(f"({t['Track_ID']}, {escape(t['Track_Name'])}, {escape(t['Description'])}, {sup}, {t['Dept_id']})")
-    for chunk in chunked(rows, BATCH_INSERT_SIZE):
-        write_line(f, "INSERT INTO Track (Track_ID, Track_Name, Description, supervisor_instruct, Dept_id) VALUES")
-        write_line(f, ",\n".join(chunk) + ";")
-    write_line(f, "SET IDENTITY_INSERT Track OFF;")
-    write_line(f, "")
-
-    # Intake
-    write_line(f, "SET IDENTITY_INSERT Intake ON;")
-    rows = []
-    for it in intakes:
-        rows.append(f"({it['id']}, {escape(it['Start_date'])}, {escape(it['End_date'])}, {escape(it['Type'])})")
-    for chunk in chunked(rows, BATCH_INSERT_SIZE):
-        write_line(f, "INSERT INTO Intake (id, Start_date, End_date, Type) VALUES")
-        write_line(f, ",\n".join(chunk) + ";")
-    write_line(f, "SET IDENTITY_INSERT Intake OFF;")
-    write_line(f, "")
-
-    # Course
-    write_line(f, "SET IDENTITY_INSERT Course ON;")
-    rows = []
-    for c in courses:
-        rows.append(f"({c['Crs_ID']}, {escape(c['Crs_Name'])}, {escape(c['Description'])}, {c['Hours']}, {c['Dept_id']})")
-    for chunk in chunked(rows, BATCH_INSERT_SIZE):
-        write_line(f, "INSERT INTO Course (Crs_ID, Crs_Name, Description, Hours, Dept_id) VALUES")
-        write_line(f, ",\n".join(chunk) + ";")
-    write_line(f, "SET IDENTITY_INSERT Course OFF;")
-    write_line(f, "")
-
-    # Company
-    write_line(f, "SET IDENTITY_INSERT Company ON;")
-    rows = []
-    for c in companies:
-        rows.append(f"({c['company_id']}, {escape(c['name'])}, {escape(c['city'])})")
-    for chunk in chunked(rows, BATCH_INSERT_SIZE):
-        write_line(f, "INSERT INTO Company (company_id, name, city) VALUES")
-        write_line(f, ",\n".join(chunk) + ";")
-    write_line(f, "SET IDENTITY_INSERT Company OFF;")
-    write_line(f, "")
-
-    # Instructor
-    write_line(f, "SET IDENTITY_INSERT Instructor ON;")
-    rows = []
-    for ins in instructors:
-        rows.append(f"({ins['Instructor_ID']}, {escape(ins['First_Name'])}, {escape(ins['Last_Name'])}, {escape(ins['Gender'])}, {escape(ins['Email'])}, {escape(ins['Phone'])}, {escape(ins['Hire_Date'])}, {ins['salary']}, {ins['Dept_id']}, {escape(ins['user_id'])}, {escape(ins['Password'])}, {escape(ins['city'])}, {escape(ins['working_status'])})")
-    for chunk in chunked(rows, BATCH_INSERT_SIZE):
-        write_line(f, "INSERT INTO Instructor (Instructor_ID, First_Name, Last_Name, Gender, Email, Phone, Hire_Date, salary, Dept_id, user_id, Password, city, working_status) VALUES")
-        write_line(f, ",\n".join(chunk) + ";")
-    write_line(f, "SET IDENTITY_INSERT Instructor OFF;")
-    write_line(f, "")
-
-    # Instructor_Branch
-    rows = []
-    for ib in instr_branch:
-        rows.append(f"({ib['Instructor_ID']}, {ib['Branch_ID']})")
-    for chunk in chunked(rows, BATCH_INSERT_SIZE):
-        write_line(f, "INSERT INTO Instructor_Branch (Instructor_ID, Branch_ID) VALUES")
-        write_line(f, ",\n".join(chunk) + ";")
-    write_line(f, "")
-
-    # Teach
-    rows = []
-    for t in teach:
-        rows.append(f"({t['Instructor_id']}, {t['Crs_ID']})")
-    for chunk in chunked(rows, BATCH_INSERT_SIZE):
-        write_line(f, "INSERT INTO Teach (Instructor_id, Crs_ID) VALUES")
-        write_line(f, ",\n".join(chunk) + ";")
-    write_line(f, "")
-
-    # Crs_Track
-    rows = []
-    for ct in crs_track:
-        rows.append(f"({ct['Track_ID']}, {ct['Crs_ID']})")
-    for chunk in chunked(rows, BATCH_INSERT_SIZE):
-        write_line(f, "INSERT INTO Crs_Track (Track_ID, Crs_ID) VALUES")
-        write_line(f, ",\n".join(chunk) + ";")
-    write_line(f, "")
-
-    # Instructor_Crs
-    rows = []
-    for ic in instr_crs:
-        rows.append(f"({ic['Crs_ID']}, {ic['Instructor_ID']})")
-    for chunk in chunked(rows, BATCH_INSERT_SIZE):
-        write_line(f, "INSERT INTO Instructor_Crs (Crs_ID, Instructor_ID) VALUES")
-        write_line(f, ",\n".join(chunk) + ";")
-    write_line(f, "")
-
-    # Student
-    write_line(f, "SET IDENTITY_INSERT Student ON;")
-    rows = []
-    for s in students:
-        comp = s['company_id'] if s['company_id'] is not None else "NULL"
-        rows.append("(" + ",".join([
-            str(s['Student_ID']),
-            escape(s['Student_First_Name']),
-            escape(s['Student_Last_Name']),
-            escape(s['Gender']),
-            escape(s['Birth_date']),
-            escape(s['Email']),
-            escape(s['National_ID']),
-            escape(s['governorate']),
-            str(s['Gpa']),
-            escape(s['Graduation_Status']),
-            str(s['Branch_ID']),
-            str(s['Track_ID']),
-            str(s['Faculty_ID']),
-            str(s['intack_id']),
-            (str(comp) if comp!="NULL" else "NULL"),
-            escape(s['user_id']),
-            escape(s['Password']),
-            escape(s['student_url'])
-        ]) + ")")
-    # write in batches to avoid extremely long SQL lines
-    for chunk in chunked(rows, BATCH_INSERT_SIZE):
-        write_line(f, "INSERT INTO Student (Student_ID, Student_First_Name, Student_Last_Name, Gender, Birth_date, Email, National_ID, governorate, Gpa, Graduation_Status, Branch_ID, Track_ID, Faculty_ID, intack_id, company_id, user_id, Password, student_url) VALUES")
-        write_line(f, ",\n".join(chunk) + ";")
-    write_line(f, "SET IDENTITY_INSERT Student OFF;")
-    write_line(f, "")
-
-    # Phone_Student
-    rows = []
-    for p in phone_students:
-        rows.append(f"({p['Student_ID']}, {escape(p['Phone'])})")
-    for chunk in chunked(rows, BATCH_INSERT_SIZE):
-        write_line(f, "INSERT INTO Phone_Student (Student_ID, Phone) VALUES")
-        write_line(f, ",\n".join(chunk) + ";")
-    write_line(f, "")
-
-    # Exam
-    write_line(f, "SET IDENTITY_INSERT Exam ON;")
-    rows = []
-    for e in exams:
-        rows.append("(" + ",".join([
-            str(e['Exam_ID']),
-            escape(e['Exam_Name']),
-            escape(e['Exam_Type']),
-            escape(e['Exam_Date']),
-            str(e['Duration']),
-            str(e['Total_degree']),
-            str(e['Crs_ID']),
-            str(e['No_question']),
-            str(e['instructor_id'])
-        ]) + ")")
-    for chunk in chunked(rows, BATCH_INSERT_SIZE):
-        write_line(f, "INSERT INTO Exam (Exam_ID, Exam_Name, Exam_Type, Exam_Date, Duration, Total_degree, Crs_ID, No_question, instructor_id) VALUES")
-        write_line(f, ",\n".join(chunk) + ";")
-    write_line(f, "SET IDENTITY_INSERT Exam OFF;")
-    write_line(f, "")
-
-    # Question and Question_Choices
-    # Questions: primary keys are explicit (Question_ID)
-    rows_q = []
-    for q in questions:
-        rows_q.append("(" + ",".join([
-            str(q['Question_ID']),
-            str(q['Exam_ID']),
-            escape(q['Question_Type']),
-            escape(q['Question_Difficulty']),
-            str(q['Marks']),
-            escape(q['Correct_Answer']),
-            str(q['Crs_id']),
-            escape(q['question_topic'])
-        ]) + ")")
-    for chunk in chunked(rows_q, BATCH_INSERT_SIZE):
-        write_line(f, "INSERT INTO Question (Question_ID, Exam_ID, Question_Type, Question_Difficulty, Marks, Correct_Answer, Crs_id, question_topic) VALUES")
-        write_line(f, ",\n".join(chunk) + ";")
-    write_line(f, "")
-
-    rows_qc = []
-    for qc in question_choices:
-        rows_qc.append("(" + ",".join([
-            str(qc['Question_ID']),
-            str(qc['choices_id']),
-            escape(qc['A']),
-            escape(qc['B']),
-            escape(qc['C']),
-            escape(qc['D'])
-        ]) + ")")
-    for chunk in chunked(rows_qc, BATCH_INSERT_SIZE):
-        write_line(f, "INSERT INTO Question_Choices (Question_ID, choices_id, A, B, C, D) VALUES")
-        write_line(f, ",\n".join(chunk) + ";")
-    write_line(f, "")
-
-    # Exam_Question
-    rows_eq = []
-    for q in questions:
-        rows_eq.append(f"({q['Question_ID']}, {q['Exam_ID']})")
-    for chunk in chunked(rows_eq, BATCH_INSERT_SIZE):
-        write_line(f, "INSERT INTO Exam_Question (Question_ID, Exam_ID) VALUES")
-        write_line(f, ",\n".join(chunk) + ";")
-    write_line(f, "")
-
-    # Topic
-    rows_t = []
-    for t in topics:
-        rows_t.append(f"({t['topic_id']}, {escape(t['topic_name'])}, {t['crs_id']})")
-    for chunk in chunked(rows_t, BATCH_INSERT_SIZE):
-        write_line(f, "INSERT INTO Topic (topic_id, topic_name, crs_id) VALUES")
-        write_line(f, ",\n".join(chunk) + ";")
-    write_line(f, "")
-
-    # Certificate
-    write_line(f, "SET IDENTITY_INSERT Certificate ON;")
-    rows = []
-    for c in certs:
-        rows.append("(" + ",".join([
-            str(c['Certificate_ID']),
-            escape(c['Name']),
-            escape(c['platform']),
-            str(c['duration']),
-            escape(c['issued_date']),
-            escape(c['level']),
-            str(c['student_id'])
-        ]) + ")")
-    for chunk in chunked(rows, BATCH_INSERT_SIZE):
-        write_line(f, "INSERT INTO Certificate (Certificate_ID, Name, platform, duration, issued_date, level, student_id) VALUES")
-        write_line(f, ",\n".join(chunk) + ";")
-    write_line(f, "SET IDENTITY_INSERT Certificate OFF;")
-    write_line(f, "")
-
-    # Freelance
-    write_line(f, "SET IDENTITY_INSERT Freelance ON;")
-    rows = []
-    for fr in freelances:
-        rows.append("(" + ",".join([
-            str(fr['freelance_id']),
-            escape(fr['platform']),
-            str(fr['payment']),
-            str(fr['revenue']),
-            str(fr['duration']),
-            escape(fr['client_country']),
-            escape(fr['Date']),
-            str(fr['Rating']),
-            str(fr['student_id'])
-        ]) + ")")
-    for chunk in chunked(rows, BATCH_INSERT_SIZE):
-        write_line(f, "INSERT INTO Freelance (freelance_id, platform, payment, revenue, duration, client_country, Date, Rating, student_id) VALUES")
-        write_line(f, ",\n".join(chunk) + ";")
-    write_line(f, "SET IDENTITY_INSERT Freelance OFF;")
-    write_line(f, "")
-
-    # Track_Branch_Intake
-    rows = []
-    for tbi in track_branch_intake:
-        rows.append(f"({tbi['Branch_ID']}, {tbi['intake_id']}, {tbi['Track_ID']})")
-    for chunk in chunked(rows, BATCH_INSERT_SIZE):
-        write_line(f, "INSERT INTO Track_Branch_Intake (Branch_ID, intake_id, Track_ID) VALUES")
-        write_line(f, ",\n".join(chunk) + ";")
-    write_line(f, "")
-
-    # Finalize transaction
-    write_line(f, "COMMIT;")
-    write_line(f, "-- End of generated data")
-print("Done. SQL file generated.")
+def question_counts(exams, first_q):
+    # question counts are drawn up front so question IDs are known before the shards run;
+    # returns (exam_nq, exam_first_q) indexed by exam ID and the next free question ID
+    exam_nq = [0] * (N_EXAM + 1)
+    exam_first_q = [0] * (N_EXAM + 1)
+    next_q = first_q
+    for exam_id in exams.column("Exam_ID"):
+        exam_nq[exam_id] = random.randint(max(5, AVG_Q_PER_EXAM-4), AVG_Q_PER_EXAM+4)
+        exam_first_q[exam_id] = next_q
+        next_q += exam_nq[exam_id]
+    return exam_nq, exam_first_q, next_q
+
+def row_context(rel, dims, text, today, exam_nq, exam_first_q):
+    # the part of the worker context the row generators read (phase 1 adds the question and
+    # student attributes); rowsource.RowSource builds the same for random access
+    first_exam = N_EXAM - len(dims["Exam"]) + 1
+    return {
+        "today": today,
+        "exam_crs": [0] * first_exam + list(dims["Exam"].column("Crs_ID")),
+        "exam_first_q": exam_first_q,
+        "exam_nq": exam_nq,
+        "track_names": [None] + (list(dims["Track"].column("Track_Name")) if "Track" in dims else []),
+        "tbi": rel.tbi,
+        # Samplers of the skewed relationships (None: uniform), and Result's exam weights by exam ID
+        "skew": {
+            "Student.Track_Branch_Intake": skew("Student.Track_Branch_Intake", len(rel.tbi)),
+            "Student.Faculty_ID": skew("Student.Faculty_ID", N_FACULTY),
+            "Student.company_id": skew("Student.company_id", N_COMPANY + 1),
+            "Certificate.student_id": skew("Certificate.student_id", N_STUDENT),
+            "Freelance.student_id": skew("Freelance.student_id", N_STUDENT),
+            "Certificate.issued_date": skew_dates("Certificate.issued_date", 2020, 2025),
+        },
+        "exam_weights": exam_weights(first_exam),
+        # exams open to each track's students (every exam if none of its courses has one)
+        "track_exams": [None] + [rel.track_exams.get(t) or list(range(first_exam, N_EXAM+1)) for t in range(1, N_TRACK+1)],
+        "text": text,
+    }
+
+def open_checkpoint(args, sink, today):
+    # called once the dimensions and question counts are drawn: a resumed run must agree with
+    # the interrupted one on every setting and on the main RNG state at this point
+    if {OUTPUT_FORMAT, *ALSO_FORMATS} & {"sqlite", "odbc"}:
+        if args.resume:
+            raise SystemExit("--resume needs a file format (sql, bulk, parquet): database loads commit as they go")
+        return None
+    if not (CHECKPOINT or args.resume):
+        return None
+    settings = {k: v for k, v in globals().items()
+                if k.isupper() and isinstance(v, (bool, int, float, str, type(None)))}
+    settings["DISTRIBUTIONS"] = DISTRIBUTIONS
+    settings["ALSO_FORMATS"] = ALSO_FORMATS  # a shard records one path, or one per format
+    run = {"settings": settings, "rng": rng_digest(random.getstate()),
+           "today": today.isoformat(), "started": sink.started.isoformat()}
+    path = sink.out + ".checkpoint"
+    if not args.resume:
+        return Checkpoint.start(path, run)
+    checkpoint = Checkpoint.resume(path, run)
+    sink.resume = checkpoint.resumed
+    return checkpoint
+
+# ---------- Command line ----------
+# every setting above can also be given on the command line; the module values are the defaults
+TABLE_SIZES = {
+    "Branch": "N_BRANCH", "Track": "N_TRACK", "Department": "N_DEPT", "Faculty": "N_FACULTY",
+    "Course": "N_COURSE", "Instructor": "N_INSTRUCTOR", "Intake": "N_INTAKE", "Student": "N_STUDENT",
+    "Company": "N_COMPANY", "Exam": "N_EXAM", "Certificate": "N_CERT", "Freelance": "N_FREELANCE",
+}
+# the generators sample up to 3 distinct branches, tracks and intakes and up to 4 instructors
+MIN_ROWS = {"Branch": 3, "Track": 3, "Intake": 3, "Instructor": 4}
+# settings recorded in the metrics file, so benchmark runs can be told apart
+METRIC_SETTINGS = ["SEED", "BACKEND", "OUTPUT_FORMAT", "MODEL", "AGGREGATES", "DISTRIBUTIONS", "RESULT_PARTITIONS", "LOAD_OPTIMIZED_DDL", "N_WORKERS", "SQL_COMPRESSION", "DELTA", "ALSO_FORMATS"] + list(TABLE_SIZES.values())
+OUTPUT_SETTINGS = {"sql": "OUT_SQL_FILE", "bulk": "BULK_OUT_DIR", "sqlite": "SQLITE_DB",
+                   "odbc": "ODBC_CONN_STR", "parquet": "PARQUET_OUT_DIR"}
+# tables a delta adds rows to, besides one Intake and its Track_Branch_Intake rows
+DELTA_SIZES = {"Student": "DELTA_STUDENTS", "Exam": "DELTA_EXAMS"}
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Generate the ITI Examination System dataset.")
+    p.add_argument("-s", "--scale-factor", type=float, default=1.0,
+                   help="multiply every table size; 1 is the sizes configured in the script")
+    p.add_argument("--rows", action="append", default=[], metavar="TABLE=N",
+                   help=f"exact size of one table, applied after scaling (repeatable): {', '.join(TABLE_SIZES)}")
+    p.add_argument("-o", "--output", help="output file or directory (ODBC connection string for --format odbc)")
+    p.add_argument("-f", "--format", choices=sorted(OUTPUT_SETTINGS), help=f"default {OUTPUT_FORMAT}")
+    p.add_argument("--also", action="append", default=[], metavar="FORMAT[=OUTPUT]",
+                   help="also write the same rows in FORMAT, to OUTPUT or its configured output (repeatable): "
+                        "generated once, written by one thread per format")
+    p.add_argument("-m", "--model", choices=sorted(MODELS),
+                   help=f"oltp: the Examination System tables; star: the DWH star schema instead, default {MODEL}")
+    p.add_argument("--aggregates", action="store_true", default=None,
+                   help="also write dashboard summary tables (Agg_*), summed while the rows are generated")
+    p.add_argument("--skew", action="append", default=[], metavar="REL=SPEC",
+                   help="key distribution of one relationship (repeatable), SPEC uniform, zipf:S, pareto:A, "
+                        f"weights:W1,W2,... or, for dates, months:W1,...,W12; REL one of {', '.join(RELATIONSHIPS)}")
+    p.add_argument("--partitions", type=int, metavar="N",
+                   help="partition the exam fact table on its exam ID into N ranges, each loaded through a staging "
+                        "table switched into its partition (sql and bulk formats)")
+    p.add_argument("--load-optimized-ddl", action="store_true", default=None,
+                   help="create bare tables, load them with TABLOCK, then add keys, dashboard indexes, checked "
+                        "foreign keys and statistics (sql, bulk and odbc formats)")
+    p.add_argument("-j", "--workers", type=int, help=f"default {N_WORKERS}")
+    p.add_argument("--backend", choices=sorted(SHARD_FUNCS), help=f"default {BACKEND}")
+    p.add_argument("--seed", type=int, help=f"default {SEED}")
+    p.add_argument("--no-dimension-cache", action="store_true",
+                   help=f"generate every dimension stage instead of loading it from {DIMENSION_CACHE}")
+    p.add_argument("--plan", action="store_true",
+                   help="print projected rows, bytes, peak memory and runtime per table, then exit")
+    p.add_argument("--metrics", metavar="PATH",
+                   help="write per-table rows, bytes and generate/write/io times, phase times and peak RSS as JSON; "
+                        "refreshed with progress while the run is going")
+    p.add_argument("--progress", action="store_true", help="show rows written, rate and ETA on stderr")
+    p.add_argument("--profile", metavar="PATH",
+                   help="cProfile the run (main process and every shard) into one pstats file")
+    p.add_argument("--delta", action="store_true",
+                   help="add a new intake with its students, exams, questions and results to the dataset of an "
+                        "earlier run, continuing its IDs; --scale-factor and --rows Student=N/Exam=N size the delta")
+    p.add_argument("--state", default=STATE_FILE, metavar="PATH",
+                   help=f"run state written by every run and read by --delta, default {STATE_FILE}")
+    p.add_argument("--resume", action="store_true",
+                   help="continue an interrupted run with the same settings from <output>.checkpoint; "
+                        "the output is identical to an uninterrupted run")
+    return p.parse_args(argv)
+
+def configure(args, state=None):
+    # returns the settings that differ from the module defaults, after applying them here
+    config = {}
+    if args.scale_factor <= 0:
+        raise SystemExit("--scale-factor must be positive")
+    if state is not None:
+        if (args.model or MODEL) == "star":
+            raise SystemExit("--delta adds rows to the OLTP tables only: the star schema is generated by full runs")
+        configure_delta(args, state, config)
+    else:
+        configure_sizes(args, config)
+    if config.get("N_STUDENT", N_STUDENT) > NATIONAL_ID_SERIALS:
+        raise SystemExit(f"at most {NATIONAL_ID_SERIALS} students: every one needs a distinct 8-digit National_ID serial")
+    for name, value in [("OUTPUT_FORMAT", args.format), ("MODEL", args.model), ("AGGREGATES", args.aggregates),
+                        ("RESULT_PARTITIONS", args.partitions), ("LOAD_OPTIMIZED_DDL", args.load_optimized_ddl),
+                        ("N_WORKERS", args.workers), ("BACKEND", args.backend), ("SEED", args.seed)]:
+        if value is not None:
+            config[name] = value
+    if args.no_dimension_cache:
+        config["DIMENSION_CACHE"] = None
+    if args.skew:
+        config["DISTRIBUTIONS"] = dict(DISTRIBUTIONS)
+        for spec in args.skew:
+            rel, _, dist = spec.partition("=")
+            config["DISTRIBUTIONS"][rel] = dist
+    for rel, dist in config.get("DISTRIBUTIONS", DISTRIBUTIONS).items():
+        parse_spec(rel, dist)
+    if args.also:
+        config["ALSO_FORMATS"] = list(ALSO_FORMATS)
+        for spec in args.also:
+            fmt, _, out = spec.partition("=")
+            if fmt not in OUTPUT_SETTINGS:
+                raise SystemExit(f"--also expects FORMAT[=OUTPUT] with FORMAT one of {', '.join(sorted(OUTPUT_SETTINGS))}, got {spec!r}")
+            config["ALSO_FORMATS"].append(fmt)
+            if out:
+                config[OUTPUT_SETTINGS[fmt]] = out
+    formats = [config.get("OUTPUT_FORMAT", OUTPUT_FORMAT)] + config.get("ALSO_FORMATS", ALSO_FORMATS)
+    if len(set(formats)) < len(formats):
+        raise SystemExit(f"--also: each format is written once per run, got {', '.join(formats)}")
+    partitions = config.get("RESULT_PARTITIONS", RESULT_PARTITIONS)
+    if partitions < 0:
+        raise SystemExit("--partitions must be 0 (no partitioning) or more")
+    if partitions:
+        if not set(formats) <= {"sql", "bulk"}:
+            raise SystemExit("--partitions writes partition switching T-SQL: use --format (and --also) sql or bulk")
+        if SQL_SPLIT_ROWS or SQL_SPLIT_BYTES:
+            raise SystemExit("--partitions can't be combined with SQL_SPLIT_ROWS / SQL_SPLIT_BYTES")
+        if state is not None:
+            raise SystemExit("--partitions is for full runs: a delta's rows are inserted into the existing partitions")
+    if config.get("LOAD_OPTIMIZED_DDL", LOAD_OPTIMIZED_DDL):
+        if not set(formats) <= {"sql", "bulk", "odbc"}:
+            raise SystemExit("--load-optimized-ddl writes SQL Server DDL: use --format (and --also) sql, bulk or odbc")
+        if state is not None:
+            raise SystemExit("--load-optimized-ddl is for full runs: a delta loads into tables that already have their keys")
+    for k, fmt in enumerate(formats):
+        setting = OUTPUT_SETTINGS[fmt]
+        if k == 0 and args.output:
+            config[setting] = args.output
+        elif state is not None and setting in ("OUT_SQL_FILE", "BULK_OUT_DIR", "PARQUET_OUT_DIR") and setting not in config:
+            # file outputs of a delta go next to the full run's, never over them
+            root, ext = os.path.splitext(globals()[setting])
+            config[setting] = f"{root}.delta{config['DELTA']}{ext}"
+    globals().update(config)
+    return config
+
+def configure_sizes(args, config):
+    for table, name in TABLE_SIZES.items():
+        if args.scale_factor != 1:
+            config[name] = max(MIN_ROWS.get(table, 1), round(globals()[name] * args.scale_factor))
+    for spec in args.rows:
+        table, _, n = spec.partition("=")
+        if table not in TABLE_SIZES or not n.isdigit():
+            raise SystemExit(f"--rows expects TABLE=N with TABLE one of {', '.join(TABLE_SIZES)}, got {spec!r}")
+        if int(n) < MIN_ROWS.get(table, 1):
+            raise SystemExit(f"--rows {spec}: {table} needs at least {MIN_ROWS.get(table, 1)} rows")
+        config[TABLE_SIZES[table]] = int(n)
+
+def configure_delta(args, state, config):
+    # the earlier run's tables keep their sizes; N_* become the highest IDs after this delta
+    for table, name in DELTA_SIZES.items():
+        config[name] = max(1, round(globals()[name] * args.scale_factor))
+    for spec in args.rows:
+        table, _, n = spec.partition("=")
+        if table not in DELTA_SIZES or not n.isdigit() or int(n) < 1:
+            raise SystemExit(f"--delta: --rows expects Student=N or Exam=N, got {spec!r}")
+        config[DELTA_SIZES[table]] = int(n)
+    for table, name in TABLE_SIZES.items():
+        config[name] = state["max_id"][table]
+    config["N_STUDENT"] += config["DELTA_STUDENTS"]
+    config["N_EXAM"] += config["DELTA_EXAMS"]
+    config["N_INTAKE"] += 1
+    config["DELTA"] = state["deltas"] + 1
+    config["SEED"] = state["seed"]
+
+def main(argv=None):
+    args = parse_args(argv)
+    state = load_state(args.state) if args.delta else None
+    config = configure(args, state)
+    if args.plan:
+        print_plan(globals(), globals()[OUTPUT_SETTINGS[OUTPUT_FORMAT]])
+        return
+    started = perf_counter()
+    metrics = Metrics()
+    profiler = cProfile.Profile() if args.profile else None
+    if profiler is not None:
+        profiler.enable()
+    # rows written so far, shared with the workers; drives the progress line and metrics snapshots
+    counter = multiprocessing.Value("q", 0) if args.progress or args.metrics else None
+    if counter is None:
+        sink = generate(args, config, metrics, None, state)
+    else:
+        expected = sum(projected_output_rows(globals()).values())
+        with Progress(counter, expected, metrics, show=args.progress, metrics_path=args.metrics):
+            sink = generate(args, config, metrics, counter, state)
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(args.profile)
+        merge_profiles(args.profile).sort_stats("cumulative").print_stats(25)
+    if args.metrics:
+        outputs = {p for s in getattr(sink, "sinks", [sink]) for p in (s.out, s.parts_dir, s.out + getattr(s, "ext", ""))}
+        metrics.write(args.metrics, status="done", config={k: globals()[k] for k in sorted(METRIC_SETTINGS)},
+                      wall_s=perf_counter() - started, output_bytes=sum(path_bytes(p) for p in outputs))
+
+def generate(args, config, metrics, counter, state=None):
+    if BACKEND == "numpy" and np is None:
+        raise SystemExit('BACKEND = "numpy" needs NumPy: pip install numpy')
+    with metrics.timer("time.phase.text_pool"):
+        text = TextPool(SEED, TEXT_POOL_SIZE, TEXT_POOL_CACHE)
+    with metrics.timer("time.phase.dimensions"):
+        if state is None:
+            rel, dims = generate_dimensions(text, metrics)
+        else:
+            rel, dims = generate_delta_dimensions(state, metrics)
+    # first IDs of the tables the shards generate: 1, or right after the earlier run's
+    first_exam = N_EXAM - len(dims["Exam"]) + 1
+    first_student = N_STUDENT - DELTA_STUDENTS + 1 if DELTA else 1
+    first_q = state["max_id"]["Question"] + 1 if DELTA else 1
+    exam_nq, exam_first_q, next_q = question_counts(dims["Exam"], first_q)
+
+    sink = make_sink()
+    today = datetime.today()
+    checkpoint = open_checkpoint(args, sink, today)
+    if checkpoint is not None and checkpoint.resumed:
+        # the interrupted run's clock: birth dates and the "Generated on" header depend on it
+        today = datetime.fromisoformat(checkpoint.run["today"])
+        sink.started = datetime.fromisoformat(checkpoint.run["started"])
+    sink.open()
+    ctx = {
+        **row_context(rel, dims, text, today, exam_nq, exam_first_q),
+        "config": config,
+        "sink": sink,
+        # dimension attributes the star tables denormalize
+        "star": star_lookups(dims) if MODEL == "star" else None,
+        # per-shard counters only when asked for: timing every lazily produced row costs ~5%
+        "metrics": Metrics() if args.metrics else None,
+        "progress": counter,
+        # inline shards already run under the main profiler, and cProfile doesn't nest
+        "profile": args.profile if N_WORKERS > 1 else None,
+    }
+
+    print(f"Generating {f'delta {DELTA} of the' if DELTA else 'the'} large tables with {N_WORKERS} worker(s), {BACKEND} backend ...")
+    parts = []
+    # phase 1: questions and students; their compact attributes feed Result and Certificate
+    # (a delta pads them for the earlier run's IDs, so they stay indexed by ID)
+    q_marks, q_kind, q_correct = (array("b", bytes(first_q - 1)) for _ in range(3))
+    student_track = array("l", [0]) * (first_student - 1)
+    exam_shards = shard_ranges(first_exam, N_EXAM, N_WORKERS)
+    student_shards = shard_ranges(first_student, N_STUDENT, N_WORKERS)
+    with metrics.timer("time.phase.questions_students"):
+        phase1 = run_tasks([("Question", (k, lo, hi)) for k, (lo, hi) in enumerate(exam_shards)]
+                           + [("Student", (k, lo, hi)) for k, (lo, hi) in enumerate(student_shards)],
+                           ctx, metrics, checkpoint)
+    for result, (marks, kind, correct) in phase1[:len(exam_shards)]:
+        parts += result
+        q_marks += marks
+        q_kind += kind
+        q_correct += correct
+    for result, tracks in phase1[len(exam_shards):]:
+        parts += result
+        student_track += tracks
+    ctx.update(q_marks=q_marks, q_kind=q_kind, q_correct=q_correct, student_track=student_track)
+
+    # phase 2: everything keyed by student; a delta's new students only have results so far
+    tasks = []
+    phase2 = [("Result", first_student, N_STUDENT)]
+    if not DELTA:
+        phase2 += [("Certificate", 1, N_CERT), ("Freelance", 1, N_FREELANCE)]
+    for table, first, last in phase2:
+        tasks += [(table, (k, lo, hi)) for k, (lo, hi) in enumerate(shard_ranges(first, last, N_WORKERS))]
+    sums = {}  # aggregate sums spanning shards
+    with metrics.timer("time.phase.results"):
+        for result in run_tasks(tasks, ctx, metrics, checkpoint):
+            parts += shard_parts(result)
+            if isinstance(result, tuple):
+                merge_sums(sums, result[1])
+
+    # dimensions are small: one part each, written from the main process
+    init_worker(ctx)
+    if ctx["metrics"]:
+        ctx["metrics"].data.clear()  # inline runs leave the last shard's counters behind
+    with metrics.timer("time.phase.dimension_write"):
+        for table, rows in dims.items():
+            parts.append(write_part(table, 0, rows.rows()))
+        if MODEL == "star":
+            first, last = STAR_DATE_YEARS
+            parts.append(write_part("Dim_Date", 0, date_rows(date(first, 1, 1), date(last, 12, 31))))
+        for table, rows in aggregate_rows(sums):
+            parts.append(write_part(table, 0, rows))
+    if ctx["metrics"]:
+        metrics.merge(ctx["metrics"].data)
+
+    part_files = {}
+    output_tables = sink.load_order
+    for table, shard, path, n in sorted(parts, key=lambda p: (p[0], p[1])):
+        if table in output_tables:
+            part_files.setdefault(table, []).append((path, n))
+    with metrics.timer("time.phase.close"):
+        sink.close(part_files)
+    if checkpoint is not None:
+        checkpoint.remove()
+
+    if MODEL == "oltp":
+        # the state describes OLTP tables a later --delta extends; a star run leaves it alone
+        max_id = {table: globals()[name] for table, name in TABLE_SIZES.items()}
+        max_id["Question"] = next_q - 1
+        save_state(args.state, run_state(SEED, DELTA, max_id, max(dims["Intake"].column("Start_date")),
+                                         rel.track_branches, rel.track_courses, rel.course_instructors))
+    print("Done. Output generated.")
+    return sink
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# ---------- Streaming aggregates ----------
+# The dashboard summaries of schema.AGGREGATE_TABLES, summed while the shards' rows go by on their
+# way to the sink: no extra pass over the data. Per-student sums are final within a Result shard
+# (it owns a contiguous student range) and are written as that shard's Agg_Student part; the
+# other tables are {key: [sums]} dicts the shards hand back, added up in the main process and
+# written once at the end.
+
+from array import array
+
+
+class ResultSums:
+    # Result rows of the students in [lo, hi): a student's answers to one exam arrive together
+    def __init__(self, lo, hi, q_marks, student_track):
+        self.lo = lo
+        self.q_marks = q_marks
+        self.student_track = student_track
+        n = hi - lo
+        self.exams, self.answers, self.marks = (array("i", bytes(4 * n)) for _ in range(3))
+        self.degree = array("d", bytes(8 * n))
+        self.exam_track = {}  # (exam, track) -> [sittings, passed, sum of percents]
+
+    def watch(self, rows):
+        # passes the rows through, closing each (student, exam) sitting when the next one starts
+        q_marks = self.q_marks
+        sitting = None
+        for row in rows:
+            if row[:2] != sitting:
+                if sitting is not None:
+                    self.sitting(sitting, answers, degree, marks)
+                sitting, answers, degree, marks = row[:2], 0, 0, 0
+            answers += 1
+            degree += row[3]
+            marks += q_marks[row[2]-1]
+            yield row
+        if sitting is not None:
+            self.sitting(sitting, answers, degree, marks)
+
+    def sitting(self, key, answers, degree, marks):
+        sid, exam_id = key
+        i = sid - self.lo
+        self.exams[i] += 1
+        self.answers[i] += answers
+        self.degree[i] += degree
+        self.marks[i] += marks
+        sums = self.exam_track.setdefault((exam_id, self.student_track[sid-1]), [0, 0, 0.0])
+        sums[0] += 1
+        sums[1] += degree * 2 >= marks  # passed: half the exam's marks, as Result.pass per question
+        sums[2] += 100 * degree / marks
+
+    def student_rows(self):
+        for i, exams in enumerate(self.exams):
+            if exams:
+                degree, marks, answers = self.degree[i], self.marks[i], self.answers[i]
+                yield (self.lo + i, exams, answers, round(degree, 2), marks,
+                       round(degree / answers, 2), round(100 * degree / marks, 2))
+
+
+def watch_certificates(rows, sums):
+    by_platform = sums.setdefault("Agg_Certificate_Platform", {})
+    for row in rows:
+        s = by_platform.setdefault((row[2], row[5]), [0, 0])
+        s[0] += 1
+        s[1] += row[3]
+        yield row
+
+
+def watch_freelance(rows, sums):
+    by_student = sums.setdefault("Agg_Freelance_Student_Country", {})
+    for row in rows:
+        s = by_student.setdefault((row[8], row[5]), [0, 0.0, 0.0, 0])
+        s[0] += 1
+        s[1] += row[2]
+        s[2] += row[3]
+        s[3] += row[7]
+        yield row
+
+
+def merge_sums(total, sums):
+    for table, groups in sums.items():
+        into = total.setdefault(table, {})
+        for key, values in groups.items():
+            have = into.get(key)
+            if have is None:
+                into[key] = list(values)
+            else:
+                for k, v in enumerate(values):
+                    have[k] += v
+
+
+def aggregate_rows(total):
+    # (table, rows) of the tables summed across shards, in key order
+    finish = {
+        "Agg_Exam_Track": lambda n, passed, percent: (n, passed, round(100 * passed / n, 2), round(percent / n, 2)),
+        "Agg_Certificate_Platform": lambda n, duration: (n, round(duration / n, 2)),
+        "Agg_Freelance_Student_Country": lambda n, payment, revenue, rating: (n, round(payment, 2), round(revenue, 2), round(rating / n, 2)),
+    }
+    for table, f in finish.items():
+        if table in total:
+            yield table, finished_rows(total[table], f)
+
+
+def finished_rows(groups, finish):
+    for key in sorted(groups):
+        yield key + finish(*groups[key])
@@ -0,0 +1,158 @@
+# ---------- Generation benchmark ----------
+# Runs the generator at several scale factors with --metrics and reports rows/s and bytes/s per
+# table, generation vs. writing time, phase times and peak RSS. A run can be saved as a JSON
+# baseline and later runs compared against it:
+#
+#   python benchmark.py -s 0.5 1 4 --save baseline.json
+#   python benchmark.py -s 0.5 1 4 --compare baseline.json --threshold 0.10
+#
+# Per-table rates use the busy time of the shards that produced the table (summed over workers),
+# the totals use wall time. Tables below MIN_COMPARE_ROWS are reported but never compared.
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Python Script.py")
+MIN_COMPARE_ROWS = 10000
+
+
+def run_generator(sf, args, workdir):
+    out = os.path.join(workdir, f"sf{sf}")
+    metrics_path = os.path.join(workdir, f"sf{sf}.json")
+    # the run's --state goes to the workdir too: a later --delta must not pick up the benchmark's
+    cmd = [sys.executable, SCRIPT, "--scale-factor", str(sf), "--output", out, "--metrics", metrics_path,
+           "--state", os.path.join(workdir, f"sf{sf}.state.json"), "--no-dimension-cache"]
+    for flag, value in [("--backend", args.backend), ("--format", args.format), ("--workers", args.workers)]:
+        if value is not None:
+            cmd += [flag, str(value)]
+    # run next to the script so the cached text pools are shared between runs; the cached dimension
+    # tables are not used, or every run after the first would skip generating them
+    subprocess.run(cmd, check=True, cwd=os.path.dirname(SCRIPT), stdout=subprocess.DEVNULL)
+    with open(metrics_path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def summarize(m):
+    tables = {}
+    for table, t in m["tables"].items():
+        busy = t.get("generate_s", 0) + t.get("write_s", 0)
+        tables[table] = {
+            "rows": t.get("rows", 0), "bytes": t.get("bytes", 0),
+            "rows_per_s": t.get("rows", 0) / busy if busy else None,
+            "bytes_per_s": t.get("bytes", 0) / busy if busy else None,
+        }
+    rows = sum(t["rows"] for t in tables.values())
+    phases = m["phases"]
+    return {
+        "wall_s": m["wall_s"],
+        "generate_s": sum(t.get("generate_s", 0) for t in m["tables"].values()),
+        "write_s": phases.get("close", 0) + sum(t.get("write_s", 0) for t in m["tables"].values()),
+        "io_s": sum(t.get("io_s", 0) for t in m["tables"].values()),
+        "rows": rows,
+        "bytes": m["output_bytes"],
+        "rows_per_s": rows / m["wall_s"],
+        "bytes_per_s": m["output_bytes"] / m["wall_s"],
+        "peak_rss_bytes": m["peak_rss_bytes"],
+        "phases": phases,
+        "tables": tables,
+        "config": m["config"],
+    }
+
+
+def fmt_rate(v, unit):
+    if v is None:
+        return "-"
+    for prefix in ("", "k", "M", "G"):
+        if v < 1000 or prefix == "G":
+            return f"{v:.1f} {prefix}{unit}/s"
+        v /= 1000
+
+
+def print_summary(sf, s):
+    print(f"\nscale factor {sf}: {s['rows']} rows, {s['bytes'] / 1e6:.1f} MB in {s['wall_s']:.2f}s wall "
+          f"({fmt_rate(s['rows_per_s'], 'rows')}, {fmt_rate(s['bytes_per_s'], 'B')})")
+    print(f"  generation {s['generate_s']:.2f}s, writing {s['write_s']:.2f}s (I/O {s['io_s']:.2f}s) busy; "
+          + ", ".join(f"{k} {v:.2f}s" for k, v in s["phases"].items()))
+    if s["peak_rss_bytes"]:
+        print(f"  peak RSS {s['peak_rss_bytes'] / 2**20:.0f} MiB")
+    print(f"  {'Table':<22}{'Rows':>10}{'Rows/s':>16}{'Bytes/s':>14}")
+    for table, t in sorted(s["tables"].items(), key=lambda kv: -kv[1]["rows"]):
+        print(f"  {table:<22}{t['rows']:>10}{fmt_rate(t['rows_per_s'], 'rows'):>16}{fmt_rate(t['bytes_per_s'], 'B'):>14}")
+
+
+def compare(baseline, runs, threshold):
+    # lower throughput or higher peak RSS than the baseline by more than threshold is a regression
+    regressions = []
+    for sf, s in runs.items():
+        base = baseline["runs"].get(sf)
+        if base is None:
+            print(f"\nscale factor {sf}: not in the baseline, skipped")
+            continue
+        checks = [("total rows/s", base["rows_per_s"], s["rows_per_s"], False)]
+        if base["peak_rss_bytes"] and s["peak_rss_bytes"]:
+            checks.append(("peak RSS", base["peak_rss_bytes"], s["peak_rss_bytes"], True))
+        for table, t in sorted(s["tables"].items()):
+            b = base["tables"].get(table)
+            if b and b["rows_per_s"] and t["rows_per_s"] and t["rows"] >= MIN_COMPARE_ROWS:
+                checks.append((f"{table} rows/s", b["rows_per_s"], t["rows_per_s"], False))
+        print(f"\nscale factor {sf} vs baseline:")
+        for name, old, new, lower_is_better in checks:
+            change = (new - old) / old
+            worse = change > threshold if lower_is_better else change < -threshold
+            if worse:
+                regressions.append((sf, name))
+            print(f"  {name:<28}{old:>14.1f}{new:>14.1f}{change:>+9.1%}{'  REGRESSION' if worse else ''}")
+    return regressions
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Benchmark the ITI dataset generator.")
+    p.add_argument("-s", "--scale-factors", type=float, nargs="+", default=[0.5, 1, 4])
+    p.add_argument("--backend")
+    p.add_argument("-f", "--format")
+    p.add_argument("-j", "--workers", type=int)
+    p.add_argument("--repeat", type=int, default=1, help="runs per scale factor; the fastest is kept")
+    p.add_argument("--save", metavar="PATH", help="store the results as a JSON baseline")
+    p.add_argument("--compare", metavar="PATH", help="compare against a saved baseline")
+    p.add_argument("--threshold", type=float, default=0.10,
+                   help="relative slowdown (or RSS growth) counted as a regression, default 0.10")
+    args = p.parse_args(argv)
+
+    runs = {}
+    with tempfile.TemporaryDirectory(prefix="iti-bench-") as workdir:
+        for sf in args.scale_factors:
+            best = min((summarize(run_generator(sf, args, workdir)) for _ in range(args.repeat)),
+                       key=lambda s: s["wall_s"])
+            runs[str(sf)] = best
+            print_summary(sf, best)
+
+    result = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "runs": runs,
+    }
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"\nBaseline written to {args.save}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, runs, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}: "
+                  + ", ".join(f"{name} @ sf {sf}" for sf, name in regressions))
+            sys.exit(1)
+        print(f"\nNo regressions over {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# ---------- Checkpoints ----------
+# A run's shards are independent and seeded from (SEED, table, shard), so a killed run only loses
+# the shards that hadn't finished. Every finished shard is recorded under <output>.checkpoint as
+# one pickle (its part files, row counts, the compact attributes handed to later phases and its
+# metrics); run.json pins the settings, the main RNG state after the dimensions and the run's
+# clock. --resume regenerates the dimensions, checks they match, and only runs missing shards.
+
+import hashlib
+import json
+import os
+import pickle
+import shutil
+
+
+def rng_digest(rng_state):
+    return hashlib.sha256(repr(rng_state).encode()).hexdigest()
+
+
+def shard_parts(result):
+    # the (table, shard, path, rows) parts of a shard result; phase 1 shards return (parts, attributes)
+    return result[0] if isinstance(result, tuple) else result
+
+
+def part_paths(parts):
+    # every file a shard's parts point at; split SQL parts are lists of (path, rows), and a
+    # FanOutSink part is a tuple of its sinks' paths
+    for table, shard, path, n in parts:
+        if isinstance(path, tuple):
+            yield from part_paths([(table, shard, p, n) for p in path])
+        elif isinstance(path, list):
+            yield from (p for p, _ in path)
+        elif path is not None:
+            yield path
+
+
+class Checkpoint:
+    resumed = False  # True when taken over from an interrupted run
+
+    def __init__(self, path, run):
+        self.path = path
+        self.run = run  # settings, RNG digest, today and started, as written to run.json
+
+    @classmethod
+    def start(cls, path, run):
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path)
+        cp = cls(path, run)
+        cp.dump("run.json", json.dumps(run, indent=2, sort_keys=True).encode())
+        return cp
+
+    @classmethod
+    def resume(cls, path, run):
+        # run: what this invocation would do; it must agree with the interrupted one on everything
+        # but the clock, which is taken over from the checkpoint
+        try:
+            with open(os.path.join(path, "run.json"), encoding="utf-8") as f:
+                saved = json.load(f)
+        except FileNotFoundError:
+            print(f"No checkpoint at {path}, starting from scratch")
+            return cls.start(path, run)
+        old, new = saved["settings"], run["settings"]
+        changed = sorted(k for k in set(old) | set(new) if old.get(k) != new.get(k))
+        if changed:
+            raise SystemExit(f"cannot resume {path}: settings differ from the interrupted run ({', '.join(changed)})")
+        if saved["rng"] != run["rng"]:
+            raise SystemExit(f"cannot resume {path}: the dimensions no longer come out as in the interrupted run")
+        cp = cls(path, saved)
+        cp.resumed = True
+        return cp
+
+    def shard_file(self, table, shard):
+        return os.path.join(self.path, f"{table}.{shard:04d}.pickle")
+
+    def load(self, table, shard):
+        # (result, metrics data) of a finished shard, or None when it has to run (again)
+        try:
+            with open(self.shard_file(table, shard), "rb") as f:
+                done = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        if not all(os.path.exists(p) for p in part_paths(shard_parts(done[0]))):
+            return None
+        return done
+
+    def save(self, table, shard, done):
+        self.dump(os.path.basename(self.shard_file(table, shard)), pickle.dumps(done, pickle.HIGHEST_PROTOCOL))
+
+    def dump(self, name, data):
+        # written atomically: a shard counts as done only once its record is complete
+        path = os.path.join(self.path, name)
+        with open(path + ".tmp", "wb") as f:
+            f.write(data)
+        os.replace(path + ".tmp", path)
+
+    def remove(self):
+        shutil.rmtree(self.path, ignore_errors=True)
@@ -0,0 +1,147 @@
+# ---------- Compact column tables ----------
+# Generated rows are held one typed array per column instead of one dict per row, which costs
+# a fraction of the memory: INT/DECIMAL/BIT as array("i"/"d"/"b"), DATE as day ordinals, repeated strings
+# (names, enums, pool text) as codes into a list of distinct values, and strings that are unique
+# per row (TEXT_COLUMNS) packed into one UTF-8 buffer. Column kinds come from the schema, and
+# rows() gives back the same plain Python values the rows were added with, for the sinks.
+
+from array import array
+from datetime import date
+from itertools import accumulate, islice
+from operator import itemgetter
+
+from schema import TABLES_BY_NAME
+
+# string columns with (nearly) one distinct value per row: interning them would only add overhead
+TEXT_COLUMNS = {"Email", "National_ID", "Phone", "user_id", "student_url", "Crs_Name", "Track_Name", "Branch_Loc", "name"}
+NULL_INT = -2**31  # stands for NULL in nullable INT columns (SQL INT is 32-bit, so never a value)
+
+
+class NumberColumn:
+    def __init__(self, typecode, nullable=False):
+        self.data = array(typecode)
+        self.nullable = nullable
+
+    def extend(self, values):
+        if self.nullable:
+            values = (NULL_INT if v is None else v for v in values)
+        self.data.extend(values)
+
+    def __iter__(self):
+        if self.nullable:
+            return (None if v == NULL_INT else v for v in self.data)
+        return iter(self.data)
+
+
+class DateColumn:
+    def __init__(self):
+        self.data = array("i")
+
+    def extend(self, values):
+        self.data.extend(map(date.toordinal, values))
+
+    def __iter__(self):
+        return map(date.fromordinal, self.data)
+
+
+class Codes(dict):
+    # value -> code, handing out the next code to values not seen before
+    def __init__(self):
+        super().__init__()
+        self.values = []
+
+    def __missing__(self, v):
+        code = self[v] = len(self.values)
+        self.values.append(v)
+        return code
+
+
+class CategoryColumn:
+    def __init__(self):
+        self.codes = array("H")
+        self.index = Codes()
+
+    def extend(self, values):
+        codes = list(map(self.index.__getitem__, values))
+        if len(self.index.values) > 0xFFFF and self.codes.typecode == "H":
+            self.codes = array("i", self.codes)  # more distinct values than 16-bit codes hold
+        self.codes.extend(codes)
+
+    def __iter__(self):
+        return map(self.index.values.__getitem__, self.codes)
+
+
+class TextColumn:
+    def __init__(self):
+        self.buf = bytearray()
+        self.ends = array("q")
+
+    def extend(self, values):
+        encoded = [v.encode() for v in values]
+        self.ends.extend(islice(accumulate(map(len, encoded), initial=len(self.buf)), 1, None))
+        self.buf += b"".join(encoded)
+
+    def __iter__(self):
+        buf, start = self.buf, 0
+        for end in self.ends:
+            yield buf[start:end].decode()
+            start = end
+
+
+def make_column(name, sql_type, modifier):
+    if sql_type == "INT":
+        return NumberColumn("i", nullable=modifier == "NULL")
+    if sql_type.startswith("DECIMAL"):
+        return NumberColumn("d")
+    if sql_type == "BIT":
+        return NumberColumn("b")
+    if sql_type == "DATE":
+        return DateColumn()
+    return TextColumn() if name in TEXT_COLUMNS else CategoryColumn()
+
+
+class ColumnTable:
+    # add() buffers up to FLUSH_ROWS rows as tuples and moves them into the columns in one
+    # extend() per column, which keeps the per-row cost at a single itemgetter call
+    FLUSH_ROWS = 4096
+
+    def __init__(self, table):
+        self.name = table
+        self.columns = {name: make_column(name, sql_type, modifier)
+                        for name, sql_type, modifier in TABLES_BY_NAME[table].columns}
+        self.get = itemgetter(*self.columns)
+        self.pending = []
+        self.size = 0
+
+    def __len__(self):
+        return self.size + len(self.pending)
+
+    def add(self, row):
+        # row: {column: value} for every column of the table
+        self.pending.append(self.get(row))
+        if len(self.pending) >= self.FLUSH_ROWS:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        for col, values in zip(self.columns.values(), zip(*self.pending)):
+            col.extend(values)
+        self.size += len(self.pending)
+        self.pending = []
+
+    def column(self, name):
+        self.flush()
+        return iter(self.columns[name])
+
+    def set_column(self, name, values):
+        # replaces a whole column, e.g. one filled in after the rows were added
+        self.flush()
+        _, sql_type, modifier = next(c for c in TABLES_BY_NAME[self.name].columns if c[0] == name)
+        col = make_column(name, sql_type, modifier)
+        col.extend(values)
+        self.columns[name] = col
+
+    def rows(self):
+        self.flush()
+        return zip(*self.columns.values())
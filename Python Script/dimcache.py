@@ -0,0 +1,164 @@
+# ---------- Dimension table cache ----------
+# The dimension tables are generated stage by stage (Branch, Department, ..., Exam) from the one
+# `random` stream seeded by SEED, so a stage's rows depend on its own settings and on everything
+# drawn before it. Each stage is cached under a content address chaining both:
+#   key(stage) = sha256(key(previous stage), stage name, settings the stage reads)
+# with the first key covering the seed, the text pool and the generator's source. A run loads the
+# longest run of leading stages whose keys are on disk, restores the RNG state saved after the
+# last of them, and generates the rest: changing N_STUDENT or the output format loads everything,
+# changing N_COMPANY regenerates Company and the stages after it.
+#
+# An entry is a directory named by its key: manifest.json (row count and column layout of each
+# table, the RNG state) plus one raw file per column buffer, the ColumnTable arrays as they are in
+# memory. Loading maps the files (mmap) instead of reading them, so a hit costs about one open()
+# per column, and the tables stay read-only views of the page cache.
+#
+# Entries are evicted least recently used first (a hit touches the manifest) once the cache
+# grows past max_bytes.
+
+import hashlib
+import json
+import mmap
+import os
+import shutil
+from array import array
+
+from columns import ColumnTable, NumberColumn, DateColumn, CategoryColumn, TextColumn
+
+FORMAT = 1  # layout of the entries; part of every key
+
+
+def chain_key(previous, stage, settings):
+    text = json.dumps([previous, stage, settings], sort_keys=True, default=str)
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def source_key(*parts):
+    # first link of the chain: anything every stage depends on (seed, text pool, generator source)
+    return chain_key(f"dimcache-{FORMAT}", "source", [str(p) for p in parts])
+
+
+def source_hash(paths):
+    # one digest over the source files the cached rows come out of
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as f:
+            digest.update(hashlib.sha256(f.read()).digest())
+    return digest.hexdigest()
+
+
+def typecode(buf):
+    # an array's, or a mapped column's (a memoryview cast to the same code)
+    return buf.typecode if isinstance(buf, array) else buf.format
+
+
+def column_buffers(col):
+    # (kind, {file suffix: buffer}, extra layout) of one column
+    if isinstance(col, NumberColumn):
+        return "number", {"": col.data}, {"typecode": typecode(col.data), "nullable": col.nullable}
+    if isinstance(col, DateColumn):
+        return "date", {"": col.data}, {}
+    if isinstance(col, CategoryColumn):
+        return "category", {"": col.codes}, {"typecode": typecode(col.codes), "values": col.index.values}
+    return "text", {"": col.buf, ".ends": col.ends}, {}
+
+
+def mapped(path, typecode=None):
+    # the file as a read-only memory map, cast to typecode's items
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return array(typecode) if typecode else b""  # mmap can't map an empty file
+        view = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return memoryview(view).cast(typecode) if typecode else view
+
+
+def mapped_column(path, kind, layout):
+    if kind == "number":
+        col = NumberColumn(layout["typecode"], layout["nullable"])
+        col.data = mapped(path, layout["typecode"])
+    elif kind == "date":
+        col = DateColumn()
+        col.data = mapped(path, "i")
+    elif kind == "category":
+        col = CategoryColumn()
+        col.codes = mapped(path, layout["typecode"])
+        col.index.values = layout["values"]
+    else:
+        col = TextColumn()
+        col.buf = mapped(path)
+        col.ends = mapped(path + ".ends", "q")
+    return col
+
+
+class DimensionCache:
+    def __init__(self, root, max_bytes):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.used = set()  # keys this run loaded or stored: never evicted by it
+
+    def path(self, key):
+        return os.path.join(self.root, key)
+
+    def load(self, key):
+        # ({table: ColumnTable}, RNG state) of a cached stage, or None
+        path = self.path(key)
+        try:
+            with open(os.path.join(path, "manifest.json"), encoding="utf-8") as f:
+                manifest = json.load(f)
+            tables = {}
+            for name, spec in manifest["tables"].items():
+                table = ColumnTable(name)
+                for k, (col, kind, layout) in enumerate(spec["columns"]):
+                    table.columns[col] = mapped_column(os.path.join(path, f"{name}.{k}"), kind, layout)
+                table.size = spec["rows"]
+                tables[name] = table
+            os.utime(os.path.join(path, "manifest.json"))
+        except (OSError, ValueError, KeyError):
+            return None  # missing, or left half-evicted by another run
+        self.used.add(key)
+        state = manifest["rng"]
+        return tables, (state[0], tuple(state[1]), state[2])
+
+    def store(self, key, tables, rng_state):
+        path = self.path(key)
+        if os.path.exists(path):
+            return
+        tmp = f"{path}.tmp{os.getpid()}"
+        os.makedirs(tmp, exist_ok=True)
+        manifest = {"tables": {}, "rng": rng_state}
+        for name, table in tables.items():
+            table.flush()
+            columns = []
+            for k, (col_name, col) in enumerate(table.columns.items()):
+                kind, buffers, layout = column_buffers(col)
+                for suffix, buf in buffers.items():
+                    with open(os.path.join(tmp, f"{name}.{k}{suffix}"), "wb") as f:
+                        f.write(buf)
+                columns.append((col_name, kind, layout))
+            manifest["tables"][name] = {"rows": len(table), "columns": columns}
+        with open(os.path.join(tmp, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, default=str)
+        try:
+            os.replace(tmp, path)
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)  # another run stored it first
+        self.used.add(key)
+
+    def evict(self):
+        # drop least recently used entries until the cache fits in max_bytes
+        entries = []
+        for key in os.listdir(self.root) if os.path.isdir(self.root) else ():
+            path = self.path(key)
+            try:
+                size = sum(e.stat().st_size for e in os.scandir(path))
+                used = os.path.getmtime(os.path.join(path, "manifest.json"))
+            except OSError:
+                continue
+            entries.append((used, key, size))
+        total = sum(size for _, _, size in entries)
+        for _, key, size in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if key not in self.used:
+                shutil.rmtree(self.path(key), ignore_errors=True)
+                total -= size
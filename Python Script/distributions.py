@@ -0,0 +1,136 @@
+# ---------- Skewed distributions ----------
+# Every foreign-key pick is uniform unless DISTRIBUTIONS (--skew REL=SPEC) gives its relationship a
+# spec. Keys are ranked in ID order, so ID 1 (the first Track_Branch_Intake combination, the first
+# date of the range) is the hottest. Specs:
+#   uniform           the default: the generators' own uniform picks, unchanged
+#   zipf:S            weight of rank k is 1 / k**S
+#   pareto:A          discretized Pareto: rank k gets P(k <= X < k+1) for X ~ Pareto(A), X >= 1
+#   weights:W1,W2,... explicit weights of the first keys; later keys all take the last weight
+#   months:W1,...,W12 dates only: each day weighs its month's weight (exam seasons, issuing peaks)
+# A spec becomes one cumulative weight table, built once in the main process; a pick is one
+# random() plus a bisect (numpy: one searchsorted per column), whatever the skew.
+
+import math
+from array import array
+from bisect import bisect_right
+from datetime import date
+from heapq import nlargest
+from itertools import accumulate
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# relationship -> what its keys are
+RELATIONSHIPS = {
+    "Student.Track_Branch_Intake": "the (branch, intake, track) combination a student joins",
+    "Student.Faculty_ID": "faculty IDs",
+    "Student.company_id": "company IDs, unemployed (NULL) first",
+    "Exam.Crs_ID": "course IDs",
+    "Result.Exam_ID": "exam IDs, sampled without replacement among the student's track exams",
+    "Certificate.student_id": "student IDs",
+    "Freelance.student_id": "student IDs",
+    "Exam.Exam_Date": "dates",
+    "Certificate.issued_date": "dates",
+}
+DATE_RELATIONSHIPS = {"Exam.Exam_Date", "Certificate.issued_date"}
+
+
+def parse_spec(rel, spec):
+    # "zipf:1.1" -> ("zipf", [1.1]); raises SystemExit with the accepted forms otherwise
+    if rel not in RELATIONSHIPS:
+        raise SystemExit(f"--skew: unknown relationship {rel!r}, expected one of {', '.join(RELATIONSHIPS)}")
+    kind, _, args = spec.partition(":")
+    try:
+        values = [float(v) for v in args.split(",")] if args else []
+    except ValueError:
+        values = None
+    ok = {"uniform": values == [], "zipf": values is not None and len(values) == 1 and values[0] > 0,
+          "pareto": values is not None and len(values) == 1 and values[0] > 0,
+          "weights": bool(values) and min(values) >= 0 and max(values) > 0,
+          "months": rel in DATE_RELATIONSHIPS and values is not None and len(values) == 12
+                    and min(values) >= 0 and max(values) > 0}
+    if not ok.get(kind):
+        raise SystemExit(f"--skew {rel}={spec}: expected uniform, zipf:S, pareto:A, weights:W1,W2,..."
+                         + (" or months:W1,...,W12" if rel in DATE_RELATIONSHIPS else ""))
+    return kind, values
+
+
+def rank_weights(kind, values, n):
+    if kind == "zipf":
+        s = values[0]
+        return (k ** -s for k in range(1, n + 1))
+    if kind == "pareto":
+        a = values[0]
+        return (k ** -a - (k + 1) ** -a for k in range(1, n + 1))
+    if kind == "weights":
+        return (values[min(k, len(values) - 1)] for k in range(n))
+    raise ValueError(kind)
+
+
+class Sampler:
+    # picks an index in [0, n) from cumulative weights
+    def __init__(self, weights):
+        self.cdf = array("d", accumulate(weights))
+        self.total = self.cdf[-1]
+
+    def __len__(self):
+        return len(self.cdf)
+
+    def pick(self, rng):
+        return bisect_right(self.cdf, rng.random() * self.total)
+
+    def np_pick(self, rng, n):
+        return np.searchsorted(np.frombuffer(self.cdf), rng.random(n) * self.total, side="right")
+
+    def weight(self, i):
+        return self.cdf[i] - (self.cdf[i-1] if i else 0.0)
+
+
+def make_sampler(rel, spec, n):
+    # None for uniform: the caller keeps its own pick, so unskewed output doesn't change
+    kind, values = parse_spec(rel, spec)
+    if kind == "uniform":
+        return None
+    return Sampler(rank_weights(kind, values, n))
+
+
+def make_date_sampler(rel, spec, first, last):
+    # picks a day offset from `first`
+    kind, values = parse_spec(rel, spec)
+    if kind == "uniform":
+        return None
+    n = (last - first).days + 1
+    if kind != "months":
+        return Sampler(rank_weights(kind, values, n))
+    start = first.toordinal()
+    return Sampler(values[date.fromordinal(start + d).month - 1] for d in range(n))
+
+
+def sample_distinct(rng, items, weight, k):
+    # k distinct items, item i drawn with probability proportional to weight(i) (Efraimidis-Spirakis:
+    # the k largest log(u) / w); zero weights come last
+    def key(item):
+        w = weight(item)
+        return math.log(1.0 - rng.random()) / w if w > 0 else -math.inf
+    return nlargest(k, items, key=key)
+
+
+def np_sample_distinct(rng, tracks, offsets, flat, weights, k):
+    # sample_distinct for a block of students at once, over their track exam lists padded to the
+    # longest; returns (row of the student in the block, exam) pairs like np_sample_track_exams
+    n = len(tracks)
+    start, length = offsets[tracks - 1], offsets[tracks] - offsets[tracks - 1]
+    width = max(1, int(length.max())) if n else 1
+    inside = np.arange(width) < length[:, None]
+    exams = flat[np.where(inside, start[:, None] + np.arange(width), 0)]
+    w = weights[exams]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        keys = np.where(w > 0, np.log1p(-rng.random((n, width))) / w, -1e308)  # zero weights last
+    keys[~inside] = -np.inf  # padding after every real exam
+    kk = min(k, width)
+    order = np.argsort(-keys, axis=1, kind="stable")[:, :kk]
+    valid = np.arange(kk) < np.minimum(length, kk)[:, None]
+    rows = np.nonzero(valid)[0]
+    return rows, exams[rows, order[valid]]
@@ -0,0 +1,224 @@
+# ---------- Run metrics ----------
+# Flat, mergeable counters ("rows.Result", "time.write.Result", "time.phase.dimensions", ...) so
+# every worker can count its own shards and hand the numbers back to the main process with the
+# shard results. to_json() groups them per table and phase for the metrics file.
+#
+# Timers per table: generate_s (building rows), write_s (everything inside the sink: formatting,
+# encoding, I/O) and io_s, the part of write_s spent in file writes / database calls.
+
+import cProfile
+import json
+import os
+import pstats
+import re
+import sys
+import threading
+from contextlib import contextmanager
+from time import perf_counter
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+class Metrics:
+    def __init__(self, data=None):
+        self.data = dict(data or {})
+        self.phase = None  # the phase being timed, for the progress display
+
+    def add(self, name, value):
+        self.data[name] = self.data.get(name, 0) + value
+
+    def merge(self, data):
+        for name, value in data.items():
+            self.add(name, value)
+
+    @contextmanager
+    def timer(self, name):
+        if name.startswith("time.phase."):
+            self.phase = name[len("time.phase."):]
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, perf_counter() - start)
+
+    def to_json(self, **extra):
+        tables, phases = {}, {}
+        for name, value in sorted(self.data.items()):
+            kind, _, key = name.partition(".")
+            if kind == "time" and key.startswith("phase."):
+                phases[key[len("phase."):]] = value
+            elif kind == "time":
+                stage, _, table = key.partition(".")
+                tables.setdefault(table, {})[f"{stage}_s"] = value
+            else:
+                tables.setdefault(key, {})[kind] = value
+        return {**extra, "phases": phases, "tables": tables, "peak_rss_bytes": peak_rss()}
+
+    def write(self, path, **extra):
+        # replaced atomically: the file is re-read by monitors while a long run is going
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(self.to_json(**extra), f, indent=2)
+        os.replace(path + ".tmp", path)
+
+
+class Laps:
+    # back-to-back sections without re-indenting them: lap(name) books the time since the last lap
+    def __init__(self, metrics):
+        self.metrics = metrics
+        self.last = perf_counter()
+
+    def lap(self, name):
+        now = perf_counter()
+        self.metrics.add(name, now - self.last)
+        self.last = now
+
+
+class TimedWriter:
+    # file wrapper the sinks use to book time spent in write() as I/O
+    def __init__(self, f, metrics, name):
+        self.f = f
+        self.metrics = metrics
+        self.name = name
+
+    def write(self, s):
+        start = perf_counter()
+        n = self.f.write(s)
+        self.metrics.add(self.name, perf_counter() - start)
+        return n
+
+    def close(self):
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def timed_rows(rows, metrics, name):
+    # time spent producing rows from a lazy iterator (Result) counts as generation, not writing
+    it = iter(rows)
+    spent = 0.0
+    try:
+        while True:
+            start = perf_counter()
+            try:
+                row = next(it)
+            except StopIteration:
+                return
+            finally:
+                spent += perf_counter() - start
+            yield row
+    finally:
+        metrics.add(name, spent)
+
+
+def counted_rows(rows, counter, every=5000):
+    # adds to a shared multiprocessing.Value every `every` rows, for the progress display
+    n = 0
+    try:
+        for row in rows:
+            yield row
+            n += 1
+            if n == every:
+                with counter.get_lock():
+                    counter.value += n
+                n = 0
+    finally:
+        with counter.get_lock():
+            counter.value += n
+
+
+class Progress:
+    # live "rows written / projected" line with rate and ETA on stderr, and a running snapshot in
+    # the metrics file, refreshed from a background thread of the main process
+    def __init__(self, counter, expected, metrics, show=True, metrics_path=None, interval=1.0):
+        self.counter = counter
+        self.expected = max(1, expected)
+        self.metrics = metrics
+        self.show = show
+        self.metrics_path = metrics_path
+        self.interval = interval
+        self.started = perf_counter()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stopped.set()
+        self.thread.join()
+        if self.show:
+            self.draw()
+            sys.stderr.write("\n")
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            if self.show:
+                self.draw()
+            if self.metrics_path:
+                self.snapshot()
+
+    def status(self):
+        done = self.counter.value
+        elapsed = perf_counter() - self.started
+        rate = done / elapsed if elapsed else 0
+        eta = max(0, self.expected - done) / rate if rate else None
+        return done, elapsed, rate, eta
+
+    def draw(self):
+        done, elapsed, rate, eta = self.status()
+        eta_text = f"ETA {eta:.0f}s" if eta is not None else "ETA -"
+        sys.stderr.write(f"\r[{self.metrics.phase or 'starting'}] {done:,}/{self.expected:,} rows "
+                         f"({min(1, done / self.expected):.0%}), {rate:,.0f} rows/s, {elapsed:.0f}s elapsed, {eta_text}   ")
+        sys.stderr.flush()
+
+    def snapshot(self):
+        done, elapsed, rate, eta = self.status()
+        self.metrics.write(self.metrics_path, status="running", phase=self.metrics.phase, rows_done=done,
+                           rows_expected=self.expected, elapsed_s=elapsed, rows_per_s=rate, eta_s=eta)
+
+
+def profile_shard(func, task, path):
+    # run one shard under cProfile and leave its stats next to the final profile
+    prof = cProfile.Profile()
+    try:
+        return prof.runcall(func, task)
+    finally:
+        prof.dump_stats(path)
+
+
+def merge_profiles(path):
+    # folds the shard profiles left at <path>.<table>.<shard> into the main profile at <path>
+    # (exactly the names profile_shard is given: an output such as <path>.sql is no profile)
+    folder = os.path.dirname(os.path.abspath(path))
+    shard = re.compile(re.escape(os.path.basename(path)) + r"\.[A-Za-z_]\w*\.\d{4}")
+    parts = [os.path.join(folder, f) for f in sorted(os.listdir(folder)) if shard.fullmatch(f)]
+    stats = pstats.Stats(path, *parts)
+    stats.dump_stats(path)
+    for p in parts:
+        os.remove(p)
+    return stats
+
+
+def peak_rss():
+    # bytes: the larger of this process and its largest finished child (pool workers)
+    if resource is None:
+        return None
+    scale = 1 if sys.platform == "darwin" else 1024  # ru_maxrss is KiB on Linux, bytes on macOS
+    return scale * max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                       resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+
+
+def path_bytes(path):
+    if path is None or not os.path.exists(path):
+        return 0
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(path) for f in files)
@@ -0,0 +1,201 @@
+# ---------- Run plan: projected rows, bytes, memory and runtime ----------
+# Closed-form expectations of what a configuration will produce, so disk, memory and worker counts
+# can be sized before a large run. Row counts follow the generators' distributions; bytes, time and
+# memory per row were measured on a reference machine (one core, CPython 3.11) and scale linearly.
+
+import os
+from datetime import date
+
+from schema import LOAD_ORDER, STAR_LOAD_ORDER
+
+DIMENSIONS = ["Branch", "Department", "Faculty", "Track", "Intake", "Course", "Company", "Instructor",
+              "Instructor_Branch", "Teach", "Crs_Track", "Instructor_Crs", "Exam", "Track_Branch_Intake"]
+
+# average bytes of one row in the INSERT script, VALUES tuple plus its share of the INSERT header
+SQL_ROW_BYTES = {
+    "Branch": 69, "Department": 33, "Faculty": 63, "Track": 91, "Intake": 49, "Course": 105,
+    "Company": 38, "Instructor": 149, "Instructor_Branch": 10, "Teach": 11, "Crs_Track": 10,
+    "Instructor_Crs": 11, "Student": 214, "Phone_Student": 24, "Exam": 76, "Question": 55,
+    "Question_Choices": 150, "Exam_Question": 15, "Topic": 22, "Result": 53, "Certificate": 91,
+    "Freelance": 73, "Track_Branch_Intake": 13,
+    "Dim_Date": 70, "Dim_Branch": 74, "Dim_Track": 116, "Dim_Course": 129, "Dim_Instructor": 79,
+    "Dim_Exam": 53, "Dim_Question": 54, "Dim_Student": 239, "Fact_ExamActivity": 73,
+    "Fact_Certificate": 88, "Fact_Freelance": 67,
+    "Agg_Exam_Track": 32, "Agg_Student": 40, "Agg_Certificate_Platform": 45, "Agg_Freelance_Student_Country": 42,
+}
+# output size relative to the SQL script
+FORMAT_BYTES = {"sql": 1.0, "bulk": 0.8, "parquet": 0.2, "sqlite": 1.2, "odbc": 1.2}
+COMPRESSION_BYTES = {None: 1.0, "gzip": 0.26, "zstd": 0.19}
+
+# microseconds per row, generation plus SQL formatting, by backend
+ROW_MICROS = {
+    "python": {"Student": 45, "Phone_Student": 1.5, "Question": 9, "Question_Choices": 2.6, "Exam_Question": 1.1,
+               "Topic": 1.1, "Result": 3.6, "Certificate": 8.5, "Freelance": 11.4, "Fact_ExamActivity": 6.2},
+    "counter": {"Student": 46, "Phone_Student": 1.5, "Question": 16, "Question_Choices": 2.6, "Exam_Question": 1.1,
+                "Topic": 1.1, "Result": 4.6, "Certificate": 11, "Freelance": 20, "Fact_ExamActivity": 7.2},
+    "numpy": {"Student": 8, "Phone_Student": 0.6, "Question": 2.6, "Question_Choices": 1.7, "Exam_Question": 1.0,
+              "Topic": 0.9, "Result": 2.2, "Certificate": 2.6, "Freelance": 4.0, "Fact_ExamActivity": 5.0},
+}
+DIMENSION_MICROS = 20
+AGGREGATE_MICROS = 1.1  # --aggregates: summing each Result row into its sitting
+FORMAT_TIME = {"sql": 1.0, "bulk": 0.85, "parquet": 0.65, "sqlite": 1.15, "odbc": 1.15}
+COMPRESSION_TIME = {None: 1.0, "gzip": 4.0, "zstd": 1.75}
+TEXT_POOL_SECONDS = 1.5  # building the Faker pools when they aren't cached
+MERGE_BYTES_PER_SECOND = 400e6  # copying parts into the merged script
+
+# resident memory
+PROCESS_BYTES = {"python": 76e6, "counter": 76e6, "numpy": 83e6}  # interpreter, Faker, text pool (and NumPy)
+DIMENSION_ROW_BYTES = 150  # dimension rows are held as column tables in the main process
+# rows a shard holds at once (python, counter: the whole shard's rows as column tables, Result is streamed)
+HELD_ROW_BYTES = {
+    "python": {"Student": 250, "Question": 60, "Certificate": 40, "Freelance": 60},
+    "counter": {"Student": 250, "Question": 60, "Certificate": 40, "Freelance": 60},
+    "numpy": {"Student": 600, "Question": 500, "Certificate": 300, "Freelance": 300},
+}
+NP_RESULT_ROW_BYTES = 570  # numpy backend: one NP_RESULT_BLOCK of Result rows
+
+# star tables (--model star) and the OLTP table whose rows they are made from, one for one
+STAR_SOURCES = {
+    "Dim_Branch": "Branch", "Dim_Track": "Track", "Dim_Course": "Course", "Dim_Instructor": "Instructor",
+    "Dim_Exam": "Exam", "Dim_Question": "Question", "Dim_Student": "Student", "Fact_ExamActivity": "Result",
+    "Fact_Certificate": "Certificate", "Fact_Freelance": "Freelance",
+}
+
+DELTA_TABLES = ["Intake", "Student", "Phone_Student", "Exam", "Question", "Question_Choices", "Exam_Question",
+                "Topic", "Result", "Track_Branch_Intake"]
+
+
+def projected_rows(cfg):
+    a = cfg["AVG_Q_PER_EXAM"]
+    q_per_exam = (max(5, a - 4) + a + 4) / 2
+    questions = cfg["N_EXAM"] * q_per_exam
+    # each course belongs to 1-3 tracks, so a track sees about 2 * N_EXAM / N_TRACK exams
+    exams_per_student = min(cfg["AVG_EXAMS_PER_STUDENT"], 2 * cfg["N_EXAM"] / cfg["N_TRACK"])
+    rows = {
+        "Branch": cfg["N_BRANCH"], "Department": cfg["N_DEPT"], "Faculty": cfg["N_FACULTY"],
+        "Track": cfg["N_TRACK"], "Intake": cfg["N_INTAKE"], "Course": cfg["N_COURSE"],
+        "Company": cfg["N_COMPANY"], "Instructor": cfg["N_INSTRUCTOR"],
+        "Instructor_Branch": cfg["N_INSTRUCTOR"] * 2, "Teach": cfg["N_COURSE"] * 2.5,
+        "Crs_Track": cfg["N_COURSE"] * 2, "Instructor_Crs": cfg["N_COURSE"] * 2.5,
+        "Student": cfg["N_STUDENT"], "Phone_Student": cfg["N_STUDENT"] * 4 / 3,
+        "Exam": cfg["N_EXAM"], "Question": questions, "Question_Choices": questions / 4,
+        "Exam_Question": questions, "Topic": questions,
+        "Result": cfg["N_STUDENT"] * exams_per_student * q_per_exam,
+        "Certificate": cfg["N_CERT"], "Freelance": cfg["N_FREELANCE"],
+        "Track_Branch_Intake": cfg["N_TRACK"] * 4,
+    }
+    return {t: int(round(rows[t])) for t in LOAD_ORDER}
+
+
+def projected_delta_rows(cfg):
+    # --delta: one intake at every track's branches, DELTA_EXAMS exams and DELTA_STUDENTS students
+    rows = projected_rows({**cfg, "N_STUDENT": cfg["DELTA_STUDENTS"], "N_EXAM": cfg["DELTA_EXAMS"]})
+    delta = {t: rows[t] for t in DELTA_TABLES}
+    delta["Intake"] = 1
+    delta["Track_Branch_Intake"] = cfg["N_TRACK"] * 2
+    return {t: delta[t] for t in LOAD_ORDER if t in delta}
+
+
+def projected_star_rows(cfg, rows):
+    # rows: the projected OLTP rows; Dim_Date has one row per day of STAR_DATE_YEARS
+    first, last = cfg["STAR_DATE_YEARS"]
+    star = {t: rows[source] for t, source in STAR_SOURCES.items()}
+    star["Dim_Date"] = (date(last, 12, 31) - date(first, 1, 1)).days + 1
+    return {t: star[t] for t in STAR_LOAD_ORDER}
+
+
+def projected_aggregate_rows(rows):
+    # an exam's course belongs to about 2 tracks; 4 certificate platforms x 3 levels
+    agg = {"Agg_Exam_Track": rows["Exam"] * 2, "Agg_Student": rows["Student"]}
+    if "Certificate" in rows:
+        agg["Agg_Certificate_Platform"] = 12
+        agg["Agg_Freelance_Student_Country"] = rows["Freelance"]
+    return agg
+
+
+def projected_output_rows(cfg):
+    # the rows a run with this configuration writes, per output table
+    oltp = projected_delta_rows(cfg) if cfg["DELTA"] else projected_rows(cfg)
+    rows = projected_star_rows(cfg, oltp) if cfg["MODEL"] == "star" else dict(oltp)
+    if cfg["AGGREGATES"]:
+        rows.update(projected_aggregate_rows(oltp))
+    return rows
+
+
+def formats(cfg):
+    return [cfg["OUTPUT_FORMAT"]] + cfg["ALSO_FORMATS"]
+
+
+def output_bytes(cfg, table, rows):
+    # every format's output adds up
+    scale = 0
+    for fmt in formats(cfg):
+        scale += FORMAT_BYTES[fmt] * (COMPRESSION_BYTES[cfg["SQL_COMPRESSION"]] if fmt == "sql" else 1)
+    return rows * SQL_ROW_BYTES[table] * scale
+
+
+def table_seconds(cfg, table, rows):
+    # star tables cost what their OLTP source does, plus reshaping where that shows (facts)
+    micros = ROW_MICROS[cfg["BACKEND"]].get(table) or ROW_MICROS[cfg["BACKEND"]].get(STAR_SOURCES.get(table))
+    if micros is None:
+        # dimensions are generated and written by the main process alone
+        return rows * DIMENSION_MICROS / 1e6
+    # with several formats the writers run side by side: the slowest one sets the pace
+    scale = max(FORMAT_TIME[fmt] * (COMPRESSION_TIME[cfg["SQL_COMPRESSION"]] if fmt == "sql" else 1)
+                for fmt in formats(cfg))
+    if cfg["AGGREGATES"] and table in ("Result", "Fact_ExamActivity"):
+        micros += AGGREGATE_MICROS
+    return rows * micros * scale / 1e6 / min(max(1, cfg["N_WORKERS"]), os.cpu_count() or 1)
+
+
+def peak_memory(cfg, rows):
+    backend = cfg["BACKEND"]
+    workers = max(1, cfg["N_WORKERS"])
+    # compact question/student attributes every process holds for phase 2
+    shared = rows["Question"] * 3 + rows["Student"] * 8
+    held = max(rows.get(t, 0) / workers * b for t, b in HELD_ROW_BYTES[backend].items())
+    if backend == "numpy":
+        result_block = cfg["NP_RESULT_BLOCK"] * rows["Result"] / max(1, rows["Student"])
+        held = max(held, result_block * NP_RESULT_ROW_BYTES)
+    main = PROCESS_BYTES[backend] + sum(rows.get(t, 0) for t in DIMENSIONS) * DIMENSION_ROW_BYTES + shared
+    if workers == 1:
+        return main + held, main + held, 0
+    worker = PROCESS_BYTES[backend] + shared + held
+    return main + workers * worker, main, worker
+
+
+def human(n, unit=""):
+    for prefix in ("", "k", "M", "G", "T"):
+        if abs(n) < 1000 or prefix == "T":
+            return f"{n:.0f} {prefix}{unit}" if prefix == "" else f"{n:.1f} {prefix}{unit}"
+        n /= 1000
+
+
+def print_plan(cfg, output):
+    oltp = projected_delta_rows(cfg) if cfg["DELTA"] else projected_rows(cfg)
+    rows = projected_output_rows(cfg)
+    what = f"delta {cfg['DELTA']}, " if cfg["DELTA"] else ""
+    if cfg["MODEL"] == "star":
+        what += "star schema, "
+    print(f"Plan: {what}{' + '.join(formats(cfg))} output to {output}, {cfg['BACKEND']} backend, "
+          f"{cfg['N_WORKERS']} worker(s), seed {cfg['SEED']}")
+    print(f"{'Table':<31}{'Rows':>12}{'Bytes':>12}{'Time':>10}")
+    total_bytes = total_seconds = 0
+    for table in rows:
+        b = output_bytes(cfg, table, rows[table])
+        s = table_seconds(cfg, table, rows[table])
+        total_bytes += b
+        total_seconds += s
+        print(f"{table:<31}{human(rows[table]):>12}{human(b, 'B'):>12}{s:>9.1f}s")
+    if not cfg["TEXT_POOL_CACHE"]:
+        total_seconds += TEXT_POOL_SECONDS
+    if "sql" in formats(cfg) and cfg["MERGE_PARTS"] and not (cfg["SQL_SPLIT_ROWS"] or cfg["SQL_SPLIT_BYTES"]):
+        total_seconds += total_bytes / MERGE_BYTES_PER_SECOND
+    print(f"{'Total':<31}{human(sum(rows.values())):>12}{human(total_bytes, 'B'):>12}{total_seconds:>9.1f}s")
+    peak, main, worker = peak_memory(cfg, oltp)
+    if worker:
+        print(f"Peak memory: ~{human(peak, 'B')} (main {human(main, 'B')} + {cfg['N_WORKERS']} x {human(worker, 'B')} per worker)")
+    else:
+        print(f"Peak memory: ~{human(peak, 'B')}")
+    if "sql" in formats(cfg) and cfg["MERGE_PARTS"]:
+        print(f"Disk: ~{human(2 * total_bytes, 'B')} while the parts are merged")
@@ -0,0 +1,35 @@
+# ---------- Relationship indexes ----------
+# Built once over the bridge tables (Teach, Crs_Track, Instructor_Branch, Track_Branch_Intake)
+# so generators can draw FK-consistent combinations with a dict/list lookup instead of
+# scanning the bridge lists for every row.
+
+
+def group(table, key, value):
+    out = {}
+    for k, v in zip(table.column(key), table.column(value)):
+        out.setdefault(k, []).append(v)
+    return out
+
+
+class RelationshipIndex:
+    def __init__(self, teach, crs_track, instr_branch, track_branch_intake):
+        self.course_instructors = group(teach, "Crs_ID", "Instructor_id")
+        self.track_courses = group(crs_track, "Track_ID", "Crs_ID")
+        self.branch_instructors = group(instr_branch, "Branch_ID", "Instructor_ID")
+        self.track_branches = {t: sorted(set(b)) for t, b in group(track_branch_intake, "Track_ID", "Branch_ID").items()}
+        # valid (Branch_ID, intake_id, Track_ID) triples; a student picks one of these
+        self.tbi = list(zip(*(track_branch_intake.column(c) for c in ("Branch_ID", "intake_id", "Track_ID"))))
+        self.track_exams = {}
+
+    def track_instructors(self, track_id):
+        # instructors working at any branch the track runs in
+        found = set()
+        for b in self.track_branches.get(track_id, ()):
+            found.update(self.branch_instructors.get(b, ()))
+        return sorted(found)
+
+    def add_exams(self, exams):
+        # exams a student of each track can sit: those of the courses in the track
+        course_exams = group(exams, "Crs_ID", "Exam_ID")
+        self.track_exams = {t: sorted(e for c in crs for e in course_exams.get(c, ()))
+                            for t, crs in self.track_courses.items()}
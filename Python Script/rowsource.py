@@ -0,0 +1,113 @@
+# ---------- Random-access rows ----------
+# With the counter backend (streams.py) row i of a generated table is a pure function of
+# (SEED, table, i) and of the small layout every run draws first (dimensions, question counts).
+# RowSource draws that layout once, then produces any row or ID range on its own, equal to what
+# --backend counter writes with the same settings:
+#
+#   source = RowSource(["--seed", "7", "-s", "10"])
+#   source.row("Student", 123456)           # one tuple, in schema column order
+#   list(source.rows("Result", 500, 510))   # the Result rows of students 500..509
+#
+# rows(table, lo, hi) takes the IDs of the rows' owner: Student_ID for Student, Phone_Student
+# and Result, Question_ID for Question, Question_Choices, Exam_Question and Topic, the table's
+# own ID for Certificate and Freelance. Dimension tables are read by position (their ID where
+# they have one). Result and Certificate rows need their student's track and their questions'
+# marks, which a bulk run hands over from phase 1: here those rows are recomputed on first use
+# and cached. Birth dates count back from the run's date; pass `today` to reproduce another day's.
+
+import importlib.util
+import os
+from bisect import bisect_right
+from datetime import datetime
+from functools import lru_cache
+from itertools import islice
+from operator import itemgetter
+
+from schema import TABLES_BY_NAME
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Python Script.py")
+CACHED_ROWS = 1 << 16  # students and questions kept for Result / Certificate lookups
+
+
+def load_generator():
+    # a fresh copy of the script per RowSource: settings and the worker context are module globals
+    spec = importlib.util.spec_from_file_location("iti_generator", SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class Lookup:
+    # stands in for an attribute array of phase 1: lookup[k] is computed when asked for
+    def __init__(self, value):
+        self.value = value
+
+    def __getitem__(self, k):
+        return self.value(k)
+
+
+class RowSource:
+    def __init__(self, argv=(), today=None):
+        g = self.g = load_generator()
+        args = g.parse_args(["--backend", "counter", *argv])
+        if args.delta:
+            raise SystemExit("RowSource serves the rows of full runs, not of a --delta")
+        config = g.configure(args)
+        if g.BACKEND != "counter":
+            raise SystemExit("RowSource serves the counter backend's rows: leave out --backend")
+        if g.MODEL != "oltp":
+            raise SystemExit("RowSource serves the OLTP tables: leave out --model")
+        text = g.TextPool(g.SEED, g.TEXT_POOL_SIZE, g.TEXT_POOL_CACHE)
+        rel, self.dims = g.generate_dimensions(text, g.Metrics())
+        exam_nq, self.exam_first_q, next_q = g.question_counts(self.dims["Exam"], 1)
+        self.serials = g.national_id_serials()
+        self.student = lru_cache(maxsize=CACHED_ROWS)(self.student)
+        self.question = lru_cache(maxsize=CACHED_ROWS)(self.question)
+        attributes = lru_cache(maxsize=CACHED_ROWS)(lambda qid: g.question_attributes(self.question(qid)[0]))
+        g._ctx.clear()
+        g._ctx.update(g.row_context(rel, self.dims, text, today or datetime.today(), exam_nq, self.exam_first_q),
+                      config=config,
+                      q_marks=Lookup(lambda k: attributes(k + 1)[0]),
+                      q_kind=Lookup(lambda k: attributes(k + 1)[1]),
+                      q_correct=Lookup(lambda k: attributes(k + 1)[2]),
+                      student_track=Lookup(lambda k: self.student(k + 1)[0]["Track_ID"]))
+        self.get = {t: itemgetter(*TABLES_BY_NAME[t].column_names)
+                    for t in ("Student", "Phone_Student", "Question", "Question_Choices", "Certificate", "Freelance")}
+        # table -> (owner IDs, rows of one owner)
+        self.owners = {
+            "Student": (g.N_STUDENT, lambda i: [self.get["Student"](self.student(i)[0])]),
+            "Phone_Student": (g.N_STUDENT, lambda i: list(map(self.get["Phone_Student"], self.student(i)[1]))),
+            "Result": (g.N_STUDENT, lambda i: g.student_results(i, g.row_rng("Result", i))),
+            "Question": (next_q - 1, lambda i: [self.get["Question"](self.question(i)[0])]),
+            "Question_Choices": (next_q - 1, lambda i: [self.get["Question_Choices"](c) for c in self.question(i)[1:] if c]),
+            "Exam_Question": (next_q - 1, lambda i: [(i, self.question(i)[0]["Exam_ID"])]),
+            "Topic": (next_q - 1, lambda i: [(i, *itemgetter("question_topic", "Crs_id")(self.question(i)[0]))]),
+            "Certificate": (g.N_CERT, lambda i: [self.get["Certificate"](g.certificate_row(i, g.row_rng("Certificate", i)))]),
+            "Freelance": (g.N_FREELANCE, lambda i: [self.get["Freelance"](g.freelance_row(i, g.row_rng("Freelance", i)))]),
+        }
+
+    def student(self, sid):
+        # (Student row, Phone_Student rows) as dicts
+        return self.g.student_row(sid, self.g.row_rng("Student", sid), self.serials)
+
+    def question(self, qid):
+        # (Question row, Question_Choices row or None) as dicts
+        exam_id = bisect_right(self.exam_first_q, qid) - 1
+        return self.g.question_row(qid, exam_id, self.g.row_rng("Question", qid))
+
+    def rows(self, table, lo, hi):
+        # the rows of the owner IDs in [lo, hi), in the order a run writes them
+        if table in self.dims:
+            return islice(self.dims[table].rows(), lo - 1, hi - 1)
+        if table not in self.owners:
+            raise ValueError(f"unknown table {table!r}")
+        last, owner_rows = self.owners[table]
+        if not 1 <= lo <= hi <= last + 1:
+            raise ValueError(f"{table} IDs [{lo}, {hi}) outside [1, {last + 1})")
+        return (row for i in range(lo, hi) for row in owner_rows(i))
+
+    def row(self, table, i):
+        # the row with ID i, None for an ID without one (Question_Choices of a non-MCQ question)
+        if table in ("Phone_Student", "Result"):
+            raise ValueError(f"{table} has several rows per student: use rows()")
+        return next(iter(self.rows(table, i, i + 1)), None)
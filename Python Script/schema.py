@@ -0,0 +1,336 @@
+# ---------- ITI Examination System schema ----------
+# Single source of truth for the generated tables: the CREATE TABLE / FOREIGN KEY
+# statements are rendered from here and every writer takes its column order from it.
+
+from bisect import bisect_right
+
+
+class Table:
+    def __init__(self, name, columns, pk=(), identity=None):
+        self.name = name
+        # (column name, SQL type, modifier) - modifier is "", "NOT NULL", "NULL" or "UNIQUE"
+        self.columns = [c if len(c) == 3 else (c[0], c[1], "") for c in columns]
+        self.pk = tuple(pk)
+        self.identity = identity
+
+    @property
+    def column_names(self):
+        return [c[0] for c in self.columns]
+
+    def key_sql(self):
+        # the PRIMARY KEY and UNIQUE constraints of a table created with keys=False
+        out = [f"ALTER TABLE {self.name} ADD CONSTRAINT PK_{self.name} PRIMARY KEY CLUSTERED ({', '.join(self.pk)});"]
+        for name, _, modifier in self.columns:
+            if modifier == "UNIQUE":
+                out.append(f"ALTER TABLE {self.name} ADD CONSTRAINT UQ_{self.name}_{name} UNIQUE ({name});")
+        return out
+
+    def create_sql(self, identity=True, foreign_keys=(), checks=(), on=None, keys=True):
+        # identity=False and inline foreign_keys are for engines without IDENTITY / ALTER TABLE ADD CONSTRAINT;
+        # on: the filegroup or partition scheme the table is created on; keys=False: a bare heap without
+        # PRIMARY KEY / UNIQUE, whose key columns are NOT NULL so key_sql() can add them after the load
+        parts = []
+        inline_pk = keys and len(self.pk) == 1
+        for name, sql_type, modifier in self.columns:
+            col = f"{name} {sql_type}"
+            if identity and name == self.identity:
+                col += " IDENTITY(1,1)"
+            if inline_pk and name == self.pk[0]:
+                col += " PRIMARY KEY"
+            if not keys and name in self.pk:
+                modifier = "NOT NULL"
+            elif not keys and modifier == "UNIQUE":
+                modifier = ""
+            if modifier:
+                col += " " + modifier
+            parts.append(col)
+        if keys and len(self.pk) > 1:
+            parts.append(f"PRIMARY KEY ({', '.join(self.pk)})")
+        for _, _, col, ref_table, ref_col in foreign_keys:
+            parts.append(f"FOREIGN KEY ({col}) REFERENCES {ref_table}({ref_col})")
+        for check in checks:
+            parts.append(f"CHECK ({check})")
+        return f"CREATE TABLE {self.name} ({', '.join(parts)})" + (f" ON {on}" if on else "") + ";"
+
+
+TABLES = [
+    Table("Branch", [("Branch_ID", "INT"), ("Branch_Name", "NVARCHAR(100)", "NOT NULL"), ("Branch_Loc", "NVARCHAR(150)", "NOT NULL")],
+          pk=["Branch_ID"], identity="Branch_ID"),
+    Table("Department", [("Dept_id", "INT"), ("Name", "NVARCHAR(150)", "NOT NULL")],
+          pk=["Dept_id"], identity="Dept_id"),
+    Table("Faculty", [("Faculty_ID", "INT"), ("Faculty_Name", "NVARCHAR(150)"), ("University_Name", "NVARCHAR(150)"), ("city", "NVARCHAR(100)")],
+          pk=["Faculty_ID"], identity="Faculty_ID"),
+    Table("Track", [("Track_ID", "INT"), ("Track_Name", "NVARCHAR(150)", "NOT NULL"), ("Description", "NVARCHAR(250)"),
+                    ("supervisor_instruct", "INT", "NULL"), ("Dept_id", "INT", "NULL")],
+          pk=["Track_ID"], identity="Track_ID"),
+    Table("Intake", [("id", "INT"), ("Start_date", "DATE"), ("End_date", "DATE"), ("Type", "NVARCHAR(50)")],
+          pk=["id"], identity="id"),
+    Table("Course", [("Crs_ID", "INT"), ("Crs_Name", "NVARCHAR(150)", "NOT NULL"), ("Description", "NVARCHAR(250)"), ("Hours", "INT"), ("Dept_id", "INT")],
+          pk=["Crs_ID"], identity="Crs_ID"),
+    Table("Instructor", [("Instructor_ID", "INT"), ("First_Name", "NVARCHAR(50)"), ("Last_Name", "NVARCHAR(50)"), ("Gender", "CHAR(1)"),
+                         ("Email", "NVARCHAR(100)", "UNIQUE"), ("Phone", "NVARCHAR(20)"), ("Hire_Date", "DATE"), ("salary", "DECIMAL(12,2)"),
+                         ("Dept_id", "INT"), ("user_id", "NVARCHAR(50)"), ("Password", "NVARCHAR(100)"), ("city", "NVARCHAR(100)"),
+                         ("working_status", "NVARCHAR(50)")],
+          pk=["Instructor_ID"], identity="Instructor_ID"),
+    Table("Instructor_Branch", [("Instructor_ID", "INT"), ("Branch_ID", "INT")], pk=["Instructor_ID", "Branch_ID"]),
+    Table("Student", [("Student_ID", "INT"), ("Student_First_Name", "NVARCHAR(50)"), ("Student_Last_Name", "NVARCHAR(50)"), ("Gender", "CHAR(1)"),
+                      ("Birth_date", "DATE"), ("Email", "NVARCHAR(100)"), ("National_ID", "VARCHAR(14)", "UNIQUE"), ("governorate", "NVARCHAR(50)"),
+                      ("Gpa", "DECIMAL(3,2)"), ("Graduation_Status", "NVARCHAR(50)"), ("Branch_ID", "INT"), ("Track_ID", "INT"), ("Faculty_ID", "INT"),
+                      ("intack_id", "INT"), ("company_id", "INT", "NULL"), ("user_id", "NVARCHAR(50)"), ("Password", "NVARCHAR(100)"),
+                      ("student_url", "NVARCHAR(250)")],
+          pk=["Student_ID"], identity="Student_ID"),
+    Table("Phone_Student", [("Student_ID", "INT"), ("Phone", "NVARCHAR(20)")], pk=["Student_ID", "Phone"]),
+    Table("Teach", [("Instructor_id", "INT"), ("Crs_ID", "INT")], pk=["Instructor_id", "Crs_ID"]),
+    Table("Crs_Track", [("Track_ID", "INT"), ("Crs_ID", "INT")], pk=["Track_ID", "Crs_ID"]),
+    Table("Instructor_Crs", [("Crs_ID", "INT"), ("Instructor_ID", "INT")], pk=["Crs_ID", "Instructor_ID"]),
+    Table("Company", [("company_id", "INT"), ("name", "NVARCHAR(150)"), ("city", "NVARCHAR(100)")],
+          pk=["company_id"], identity="company_id"),
+    Table("Exam", [("Exam_ID", "INT"), ("Exam_Name", "NVARCHAR(200)"), ("Exam_Type", "NVARCHAR(50)"), ("Exam_Date", "DATE"), ("Duration", "INT"),
+                   ("Total_degree", "INT"), ("Crs_ID", "INT"), ("No_question", "INT"), ("instructor_id", "INT")],
+          pk=["Exam_ID"], identity="Exam_ID"),
+    Table("Question", [("Question_ID", "INT"), ("Exam_ID", "INT"), ("Question_Type", "NVARCHAR(50)"), ("Question_Difficulty", "NVARCHAR(20)"),
+                       ("Marks", "INT"), ("Correct_Answer", "NVARCHAR(50)"), ("Crs_id", "INT"), ("question_topic", "NVARCHAR(100)")],
+          pk=["Question_ID"]),
+    Table("Question_Choices", [("Question_ID", "INT"), ("choices_id", "INT"), ("A", "NVARCHAR(500)"), ("B", "NVARCHAR(500)"),
+                               ("C", "NVARCHAR(500)"), ("D", "NVARCHAR(500)")],
+          pk=["Question_ID", "choices_id"]),
+    Table("Exam_Question", [("Question_ID", "INT"), ("Exam_ID", "INT")], pk=["Question_ID", "Exam_ID"]),
+    Table("Result", [("student_id", "INT"), ("Exam_ID", "INT"), ("questions_id", "INT"), ("degree", "DECIMAL(6,2)"),
+                     ("student_ans", "NVARCHAR(500)"), ("pass", "BIT")],
+          pk=["student_id", "Exam_ID", "questions_id"]),
+    Table("Certificate", [("Certificate_ID", "INT"), ("Name", "NVARCHAR(200)"), ("platform", "NVARCHAR(100)"), ("duration", "INT"),
+                          ("issued_date", "DATE"), ("level", "NVARCHAR(50)"), ("student_id", "INT")],
+          pk=["Certificate_ID"], identity="Certificate_ID"),
+    Table("Freelance", [("freelance_id", "INT"), ("platform", "NVARCHAR(100)"), ("payment", "DECIMAL(12,2)"), ("revenue", "DECIMAL(12,2)"),
+                        ("duration", "INT"), ("client_country", "NVARCHAR(100)"), ("Date", "DATE"), ("Rating", "INT"), ("student_id", "INT")],
+          pk=["freelance_id"], identity="freelance_id"),
+    Table("Topic", [("topic_id", "INT"), ("topic_name", "NVARCHAR(200)"), ("crs_id", "INT")], pk=["topic_id"]),
+    Table("Track_Branch_Intake", [("Branch_ID", "INT"), ("intake_id", "INT"), ("Track_ID", "INT")], pk=["Branch_ID", "intake_id", "Track_ID"]),
+]
+TABLES_BY_NAME = {t.name: t for t in TABLES}
+
+# (table, constraint name, column, referenced table, referenced column)
+FOREIGN_KEYS = [
+    ("Track", "FK_Track_Dept", "Dept_id", "Department", "Dept_id"),
+    ("Track", "FK_Track_Supervisor", "supervisor_instruct", "Instructor", "Instructor_ID"),
+    ("Course", "FK_Course_Dept", "Dept_id", "Department", "Dept_id"),
+    ("Instructor", "FK_Instr_Dept", "Dept_id", "Department", "Dept_id"),
+    ("Student", "FK_Student_Branch", "Branch_ID", "Branch", "Branch_ID"),
+    ("Student", "FK_Student_Track", "Track_ID", "Track", "Track_ID"),
+    ("Student", "FK_Student_Faculty", "Faculty_ID", "Faculty", "Faculty_ID"),
+    ("Student", "FK_Student_Intake", "intack_id", "Intake", "id"),
+    ("Student", "FK_Student_Company", "company_id", "Company", "company_id"),
+    ("Teach", "FK_Teach_Instr", "Instructor_id", "Instructor", "Instructor_ID"),
+    ("Teach", "FK_Teach_Crs", "Crs_ID", "Course", "Crs_ID"),
+    ("Crs_Track", "FK_CrsTrack_Track", "Track_ID", "Track", "Track_ID"),
+    ("Crs_Track", "FK_CrsTrack_Crs", "Crs_ID", "Course", "Crs_ID"),
+    ("Instructor_Branch", "FK_InstrBranch_Instr", "Instructor_ID", "Instructor", "Instructor_ID"),
+    ("Instructor_Branch", "FK_InstrBranch_Branch", "Branch_ID", "Branch", "Branch_ID"),
+    ("Instructor_Crs", "FK_InstrCrs_Crs", "Crs_ID", "Course", "Crs_ID"),
+    ("Instructor_Crs", "FK_InstrCrs_Instr", "Instructor_ID", "Instructor", "Instructor_ID"),
+    ("Exam", "FK_Exam_Crs", "Crs_ID", "Course", "Crs_ID"),
+    ("Exam", "FK_Exam_Instr", "instructor_id", "Instructor", "Instructor_ID"),
+    ("Question", "FK_Question_Exam", "Exam_ID", "Exam", "Exam_ID"),
+    ("Question", "FK_Question_Crs", "Crs_id", "Course", "Crs_ID"),
+    ("Question_Choices", "FK_QChoices_Q", "Question_ID", "Question", "Question_ID"),
+    ("Exam_Question", "FK_ExamQuestion_Q", "Question_ID", "Question", "Question_ID"),
+    ("Exam_Question", "FK_ExamQuestion_Exam", "Exam_ID", "Exam", "Exam_ID"),
+    ("Result", "FK_Result_Student", "student_id", "Student", "Student_ID"),
+    ("Result", "FK_Result_Exam", "Exam_ID", "Exam", "Exam_ID"),
+    ("Result", "FK_Result_Q", "questions_id", "Question", "Question_ID"),
+    ("Certificate", "FK_Cert_Student", "student_id", "Student", "Student_ID"),
+    ("Freelance", "FK_Freelance_Student", "student_id", "Student", "Student_ID"),
+    ("Topic", "FK_Topic_Crs", "crs_id", "Course", "Crs_ID"),
+    ("Track_Branch_Intake", "FK_TBI_Track", "Track_ID", "Track", "Track_ID"),
+    ("Track_Branch_Intake", "FK_TBI_Branch", "Branch_ID", "Branch", "Branch_ID"),
+    ("Track_Branch_Intake", "FK_TBI_Intake", "intake_id", "Intake", "id"),
+]
+
+
+def foreign_key_sql(fk):
+    table, name, col, ref_table, ref_col = fk
+    return f"ALTER TABLE {table} ADD CONSTRAINT {name} FOREIGN KEY ({col}) REFERENCES {ref_table}({ref_col});"
+
+def checked_foreign_keys_sql(foreign_keys):
+    # one ALTER TABLE ... WITH CHECK per table: its FKs are validated against the loaded rows
+    # together and come out trusted, so the optimizer can use them (join elimination)
+    by_table = {}
+    for table, name, col, ref_table, ref_col in foreign_keys:
+        by_table.setdefault(table, []).append(f"CONSTRAINT {name} FOREIGN KEY ({col}) REFERENCES {ref_table}({ref_col})")
+    return [f"ALTER TABLE {table} WITH CHECK ADD {', '.join(fks)};" for table, fks in by_table.items()]
+
+# columns the dashboards read next to a foreign key, carried in that key's index so the join
+# and the measure come from the index alone
+DASHBOARD_INCLUDES = {
+    ("Result", "Exam_ID"): ["degree", "pass"],
+    ("Result", "questions_id"): ["degree", "pass"],
+    ("Question", "Exam_ID"): ["Marks", "Question_Difficulty"],
+    ("Student", "Track_ID"): ["Branch_ID", "intack_id", "Gpa"],
+    ("Student", "Branch_ID"): ["Track_ID", "Gpa"],
+    ("Exam", "Crs_ID"): ["Exam_Date", "Total_degree"],
+    ("Certificate", "student_id"): ["platform", "level", "duration"],
+    ("Freelance", "student_id"): ["payment", "revenue", "Rating"],
+    ("Fact_ExamActivity", "Exam_SK"): ["QuestionScore", "MaxMarks", "Percent_Score", "Exam_Result"],
+    ("Fact_ExamActivity", "Course_SK"): ["QuestionScore", "MaxMarks", "IsCorrect"],
+    ("Fact_ExamActivity", "DateKey"): ["QuestionScore", "MaxMarks"],
+    ("Fact_Certificate", "Student_SK"): ["Platform", "Level", "Duration"],
+    ("Fact_Freelance", "Student_SK"): ["Payment", "Revenue", "Rating"],
+}
+
+def dashboard_index_sql(tables, foreign_keys):
+    # a nonclustered index on every FK column the table's clustered key doesn't lead with, i.e.
+    # every join path from a dimension into a larger table, covering DASHBOARD_INCLUDES
+    leading = {t.name: t.pk[0] for t in tables if t.pk}
+    out = []
+    for table, _, col, _, _ in foreign_keys:
+        if leading.get(table) == col:
+            continue
+        include = DASHBOARD_INCLUDES.get((table, col))
+        out.append(f"CREATE NONCLUSTERED INDEX IX_{table}_{col} ON {table} ({col})"
+                   + (f" INCLUDE ({', '.join(include)})" if include else "") + ";")
+    return out
+
+class RangePartitions:
+    # a table partitioned by ranges of one INT column (RANGE RIGHT: partition k holds
+    # bounds[k] <= column < bounds[k+1]) and loaded through one staging table per partition,
+    # switched in once loaded. The staging tables carry the CHECK constraint SWITCH requires.
+    def __init__(self, table, column, bounds):
+        self.table = TABLES_BY_NAME[table]
+        self.column = column
+        self.key_index = self.table.column_names.index(column)
+        self.bounds = list(bounds)
+        self.function = f"pf_{table}_{column}"
+        self.scheme = f"ps_{table}_{column}"
+
+    def __len__(self):
+        return len(self.bounds)
+
+    def partition(self, key):
+        return max(0, bisect_right(self.bounds, key) - 1)
+
+    def stage(self, k):
+        return f"{self.table.name}_Stage_{k+1:03d}"
+
+    def create_sql(self):
+        values = ", ".join(map(str, self.bounds[1:]))
+        return [f"CREATE PARTITION FUNCTION {self.function} (INT) AS RANGE RIGHT FOR VALUES ({values});",
+                f"CREATE PARTITION SCHEME {self.scheme} AS PARTITION {self.function} ALL TO ([PRIMARY]);",
+                self.table.create_sql(on=f"{self.scheme}({self.column})")]
+
+    def stage_create_sql(self, k):
+        check = f"{self.column} >= {self.bounds[k]}"
+        if k + 1 < len(self.bounds):
+            check += f" AND {self.column} < {self.bounds[k+1]}"
+        stage = Table(self.stage(k), self.table.columns, self.table.pk)
+        return stage.create_sql(checks=[check], on="[PRIMARY]")
+
+    def switch_sql(self, k):
+        return [f"ALTER TABLE {self.stage(k)} SWITCH TO {self.table.name} PARTITION {k+1};",
+                f"DROP TABLE {self.stage(k)};"]
+
+# INSERT / load order
+# (Instructor before Track: Track.supervisor_instruct references it)
+LOAD_ORDER = ["Branch", "Department", "Faculty", "Instructor", "Track", "Intake", "Course", "Company",
+              "Instructor_Branch", "Teach", "Crs_Track", "Instructor_Crs", "Student", "Phone_Student",
+              "Exam", "Question", "Question_Choices", "Exam_Question", "Topic", "Result",
+              "Certificate", "Freelance", "Track_Branch_Intake"]
+
+
+# ---------- Star schema (DWH) ----------
+# The warehouse model of assets/DWH schema.png, emitted directly with --model star: a date
+# dimension keyed yyyymmdd, denormalized dimensions with surrogate keys (*_SK, assigned densely
+# in natural-key order) and fact tables keyed by them.
+STAR_TABLES = [
+    Table("Dim_Date", [("DateKey", "INT"), ("Full_Date", "DATE", "NOT NULL"), ("Year", "INT"), ("Quarter", "INT"), ("Month", "INT"),
+                       ("Month_Name", "NVARCHAR(10)"), ("Day", "INT"), ("Day_Of_Week", "INT"), ("Day_Name", "NVARCHAR(10)"),
+                       ("Is_Weekend", "BIT")],
+          pk=["DateKey"]),
+    Table("Dim_Branch", [("Branch_SK", "INT"), ("Branch_ID", "INT", "NOT NULL"), ("Branch_Name", "NVARCHAR(100)"), ("Branch_Loc", "NVARCHAR(150)")],
+          pk=["Branch_SK"]),
+    Table("Dim_Track", [("Track_SK", "INT"), ("Track_ID", "INT", "NOT NULL"), ("Track_Name", "NVARCHAR(150)"), ("Track_Description", "NVARCHAR(250)"),
+                        ("SuperV_Inst", "INT", "NULL"), ("Department_Name", "NVARCHAR(150)")],
+          pk=["Track_SK"]),
+    Table("Dim_Course", [("Course_SK", "INT"), ("Crs_ID", "INT", "NOT NULL"), ("Crs_Name", "NVARCHAR(150)"), ("Description", "NVARCHAR(250)"),
+                         ("Hours", "INT"), ("Department_Name", "NVARCHAR(150)")],
+          pk=["Course_SK"]),
+    Table("Dim_Instructor", [("Instructor_SK", "INT"), ("Inst_ID", "INT", "NOT NULL"), ("Inst_Fname", "NVARCHAR(50)"), ("Inst_Lname", "NVARCHAR(50)"),
+                             ("Gender", "CHAR(1)"), ("City", "NVARCHAR(100)"), ("Working_Status", "NVARCHAR(50)"), ("Salary", "DECIMAL(12,2)"),
+                             ("Hire_DateKey", "INT")],
+          pk=["Instructor_SK"]),
+    Table("Dim_Exam", [("Exam_SK", "INT"), ("Exam_ID", "INT", "NOT NULL"), ("Exam_Name", "NVARCHAR(200)"), ("Exam_Type", "NVARCHAR(50)"),
+                       ("Duration", "INT"), ("No_Question", "INT")],
+          pk=["Exam_SK"]),
+    Table("Dim_Question", [("Question_SK", "INT"), ("Ques_ID", "INT", "NOT NULL"), ("Ques_Type", "NVARCHAR(50)"), ("Difficulty", "NVARCHAR(20)"),
+                           ("Correct_Answer", "NVARCHAR(50)"), ("Marks", "INT"), ("Question_Topic", "NVARCHAR(100)"), ("Course_SK", "INT")],
+          pk=["Question_SK"]),
+    Table("Dim_Student", [("Student_SK", "INT"), ("St_ID", "INT", "NOT NULL"), ("Student_Full_Name", "NVARCHAR(101)"), ("Gender", "CHAR(1)"),
+                          ("Birth_Date", "DATE"), ("Governorate", "NVARCHAR(50)"), ("GPA", "DECIMAL(3,2)"), ("Graduation_Status", "NVARCHAR(50)"),
+                          ("Email", "NVARCHAR(100)"), ("National_ID", "VARCHAR(14)"), ("Branch_SK", "INT"), ("Track_SK", "INT"),
+                          ("Faculty_Name", "NVARCHAR(150)"), ("University_Name", "NVARCHAR(150)"), ("Company_Name", "NVARCHAR(150)", "NULL"),
+                          ("Intake_ID", "INT"), ("Intake_Type", "NVARCHAR(50)"), ("Intake_Start_Date", "DATE"), ("Intake_End_Date", "DATE")],
+          pk=["Student_SK"]),
+    Table("Fact_ExamActivity", [("Student_SK", "INT"), ("Exam_SK", "INT"), ("Question_SK", "INT"), ("Course_SK", "INT"), ("Instructor_SK", "INT"),
+                                ("DateKey", "INT"), ("QuestionScore", "DECIMAL(6,2)"), ("MaxMarks", "INT"), ("IsCorrect", "BIT"),
+                                ("Exam_TotalDegree", "INT"), ("Student_TotalScore", "DECIMAL(8,2)"), ("Percent_Score", "DECIMAL(5,2)"),
+                                ("Exam_Result", "NVARCHAR(10)")],
+          pk=["Student_SK", "Exam_SK", "Question_SK"]),
+    Table("Fact_Certificate", [("Certificate_ID", "INT"), ("Student_SK", "INT"), ("Track_SK", "INT"), ("Issued_DateKey", "INT"),
+                               ("Name", "NVARCHAR(200)"), ("Platform", "NVARCHAR(100)"), ("Level", "NVARCHAR(50)"), ("Duration", "INT")],
+          pk=["Certificate_ID"]),
+    Table("Fact_Freelance", [("Freelance_ID", "INT"), ("Student_SK", "INT"), ("DateKey", "INT"), ("Platform", "NVARCHAR(100)"),
+                             ("Client_Country", "NVARCHAR(100)"), ("Payment", "DECIMAL(12,2)"), ("Revenue", "DECIMAL(12,2)"),
+                             ("Duration", "INT"), ("Rating", "INT")],
+          pk=["Freelance_ID"]),
+]
+TABLES_BY_NAME.update({t.name: t for t in STAR_TABLES})
+
+STAR_FOREIGN_KEYS = [
+    ("Dim_Instructor", "FK_DimInstr_HireDate", "Hire_DateKey", "Dim_Date", "DateKey"),
+    ("Dim_Question", "FK_DimQuestion_Course", "Course_SK", "Dim_Course", "Course_SK"),
+    ("Dim_Student", "FK_DimStudent_Branch", "Branch_SK", "Dim_Branch", "Branch_SK"),
+    ("Dim_Student", "FK_DimStudent_Track", "Track_SK", "Dim_Track", "Track_SK"),
+    ("Fact_ExamActivity", "FK_FactExam_Student", "Student_SK", "Dim_Student", "Student_SK"),
+    ("Fact_ExamActivity", "FK_FactExam_Exam", "Exam_SK", "Dim_Exam", "Exam_SK"),
+    ("Fact_ExamActivity", "FK_FactExam_Question", "Question_SK", "Dim_Question", "Question_SK"),
+    ("Fact_ExamActivity", "FK_FactExam_Course", "Course_SK", "Dim_Course", "Course_SK"),
+    ("Fact_ExamActivity", "FK_FactExam_Instructor", "Instructor_SK", "Dim_Instructor", "Instructor_SK"),
+    ("Fact_ExamActivity", "FK_FactExam_Date", "DateKey", "Dim_Date", "DateKey"),
+    ("Fact_Certificate", "FK_FactCert_Student", "Student_SK", "Dim_Student", "Student_SK"),
+    ("Fact_Certificate", "FK_FactCert_Track", "Track_SK", "Dim_Track", "Track_SK"),
+    ("Fact_Certificate", "FK_FactCert_Date", "Issued_DateKey", "Dim_Date", "DateKey"),
+    ("Fact_Freelance", "FK_FactFreelance_Student", "Student_SK", "Dim_Student", "Student_SK"),
+    ("Fact_Freelance", "FK_FactFreelance_Date", "DateKey", "Dim_Date", "DateKey"),
+]
+
+STAR_LOAD_ORDER = [t.name for t in STAR_TABLES]
+
+# the fact table each model can partition (RESULT_PARTITIONS), and its partitioning column
+PARTITIONED = {"oltp": ("Result", "Exam_ID"), "star": ("Fact_ExamActivity", "Exam_SK")}
+
+# tables, foreign keys and load order of each output model
+MODELS = {
+    "oltp": (TABLES, FOREIGN_KEYS, LOAD_ORDER),
+    "star": (STAR_TABLES, STAR_FOREIGN_KEYS, STAR_LOAD_ORDER),
+}
+
+
+# ---------- Aggregate tables ----------
+# Dashboard summaries summed while Result, Certificate and Freelance rows stream to the sink
+# (AGGREGATES = True / --aggregates), written next to either model. Keys are the natural IDs,
+# which are also the star schema's surrogate keys.
+AGGREGATE_TABLES = [
+    Table("Agg_Exam_Track", [("Exam_ID", "INT"), ("Track_ID", "INT"), ("Sittings", "INT"), ("Passed", "INT"),
+                             ("Pass_Rate", "DECIMAL(5,2)"), ("Avg_Percent", "DECIMAL(5,2)")],
+          pk=["Exam_ID", "Track_ID"]),
+    Table("Agg_Student", [("Student_ID", "INT"), ("Exams", "INT"), ("Answers", "INT"), ("Total_Degree", "DECIMAL(12,2)"),
+                          ("Total_Marks", "INT"), ("Avg_Degree", "DECIMAL(6,2)"), ("Avg_Percent", "DECIMAL(5,2)")],
+          pk=["Student_ID"]),
+    Table("Agg_Certificate_Platform", [("Platform", "NVARCHAR(100)"), ("Level", "NVARCHAR(50)"), ("Certificates", "INT"),
+                                       ("Avg_Duration", "DECIMAL(6,2)")],
+          pk=["Platform", "Level"]),
+    Table("Agg_Freelance_Student_Country", [("Student_ID", "INT"), ("Client_Country", "NVARCHAR(100)"), ("Jobs", "INT"),
+                                            ("Payment", "DECIMAL(14,2)"), ("Revenue", "DECIMAL(14,2)"), ("Avg_Rating", "DECIMAL(4,2)")],
+          pk=["Student_ID", "Client_Country"]),
+]
+TABLES_BY_NAME.update({t.name: t for t in AGGREGATE_TABLES})
+AGGREGATE_LOAD_ORDER = [t.name for t in AGGREGATE_TABLES]
@@ -0,0 +1,964 @@
+# ---------- Output sinks ----------
+# A sink turns table rows (tuples in schema column order) into one output format. Shard workers
+# call write_part() for their slice of a table - the sink reaches them pickled, so it only holds
+# plain settings - and the main process calls open() before generation and close() at the end
+# with every table's parts in shard order.
+
+import gzip
+import importlib
+import os
+import queue
+import shutil
+import sqlite3
+import threading
+from datetime import date, datetime
+from itertools import islice
+from time import perf_counter
+
+from schema import (MODELS, AGGREGATE_TABLES, AGGREGATE_LOAD_ORDER, TABLES_BY_NAME, foreign_key_sql,
+                    checked_foreign_keys_sql, dashboard_index_sql)
+from metrics import TimedWriter
+
+try:
+    import zstandard
+except ImportError:  # only needed for SQL_COMPRESSION = "zstd"
+    zstandard = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # only needed for OUTPUT_FORMAT = "parquet"
+    pa = pq = None
+
+
+def ichunked(iterable, n):
+    # like chunked() but for generators: only one chunk is ever held in memory
+    it = iter(iterable)
+    while True:
+        chunk = list(islice(it, n))
+        if not chunk:
+            return
+        yield chunk
+
+
+PARTITION_FLUSH_ROWS = 10000  # rows a partitioned shard buffers per partition before writing them
+
+
+class Sink:
+    metrics = None  # set in each worker when run metrics are collected
+    append = False  # delta runs: the tables and constraints already exist, only rows are added
+    resume = False  # resumed runs: keep the part files of finished shards
+    model = "oltp"  # which schema.MODELS entry is written: the OLTP tables or the star schema
+    aggregates = False  # the aggregate tables are written too
+    partitions = None  # schema.RangePartitions: that table is loaded through staging tables switched into partitions
+    load_optimized = False  # tables are created bare and get their keys, FKs, indexes and statistics after the load
+
+    def __init__(self, out):
+        self.out = out
+        self.parts_dir = out + ".parts"
+        self.started = datetime.now()  # "Generated on"; a resumed run keeps the interrupted run's
+
+    @property
+    def tables(self):
+        return MODELS[self.model][0] + (AGGREGATE_TABLES if self.aggregates else [])
+
+    @property
+    def foreign_keys(self):
+        return MODELS[self.model][1]
+
+    @property
+    def load_order(self):
+        return MODELS[self.model][2] + (AGGREGATE_LOAD_ORDER if self.aggregates else [])
+
+    def open(self):
+        if self.resume:
+            os.makedirs(self.parts_dir, exist_ok=True)
+            return
+        shutil.rmtree(self.parts_dir, ignore_errors=True)
+        os.makedirs(self.parts_dir)
+
+    def part_path(self, table, shard, ext):
+        return os.path.join(self.parts_dir, f"{table}.{shard:04d}.{ext}")
+
+    def create_sql(self, t):
+        # the partitioned table keeps its key: SWITCH needs it on the table and its staging tables alike
+        return t.create_sql(keys=not self.load_optimized or self.partitioned(t.name))
+
+    def post_load_sql(self):
+        # LOAD_OPTIMIZED_DDL: keys on the loaded heaps, then the dashboard indexes, then the FKs
+        # (whose validation can scan those narrower indexes), then statistics for the first queries
+        out = [sql for t in self.tables if not self.partitioned(t.name) for sql in t.key_sql()]
+        out += dashboard_index_sql(self.tables, self.foreign_keys)
+        out += checked_foreign_keys_sql(self.foreign_keys)
+        out += [f"UPDATE STATISTICS {t.name} WITH FULLSCAN;" for t in self.tables]
+        return out
+
+    def partitioned(self, table):
+        return self.partitions is not None and table == self.partitions.table.name
+
+    def write_partitioned(self, table, shard, rows, ext, open_part, write_rows):
+        # routes a shard of the partitioned table into one part file per partition its rows fall in
+        # (write_rows(f, partition, rows)); returns ([(path, rows), ...], rows) in partition order
+        parts = self.partitions
+        key = parts.key_index
+        pending, files, paths, counts = {}, {}, {}, {}
+
+        def flush(k):
+            if k not in files:
+                paths[k] = self.part_path(table, shard, f"p{k+1:03d}.{ext}")
+                files[k] = self.timed(open_part(paths[k]), table)
+                counts[k] = 0
+            counts[k] += write_rows(files[k], k, pending.pop(k))
+
+        for row in rows:
+            k = parts.partition(row[key])
+            buf = pending.get(k)
+            if buf is None:
+                buf = pending[k] = []
+            buf.append(row)
+            if len(buf) >= PARTITION_FLUSH_ROWS:
+                flush(k)
+        for k in list(pending):
+            flush(k)
+        for f in files.values():
+            f.close()
+        return [(paths[k], counts[k]) for k in sorted(files)], sum(counts.values())
+
+    def partition_parts(self, parts):
+        # [(path, rows), ...] of every shard, grouped by partition
+        by_partition = [[] for _ in range(len(self.partitions))]
+        for shard_files, _ in parts:
+            for path, n in shard_files:
+                by_partition[int(os.path.basename(path).split(".")[2][1:]) - 1].append((path, n))
+        return by_partition
+
+    def timed(self, f, table):
+        # file writes count as the table's I/O time
+        return TimedWriter(f, self.metrics, f"time.io.{table}") if self.metrics else f
+
+    def write_part(self, table, shard, rows):
+        # returns (path or None, number of rows written); a sink that splits a part into several
+        # files returns them as [(path, rows), ...] in place of the path
+        raise NotImplementedError
+
+    def close(self, part_files):
+        # part_files: {table: [(path, rows), ...]} in shard order
+        pass
+
+
+# ---------- T-SQL INSERT script ----------
+def write_line(f, s=""):
+    f.write(s + "\n")
+
+def escape(s):
+    if s is None:
+        return "NULL"
+    return "'" + str(s).replace("'", "''") + "'"
+
+def sql_value(v):
+    if v is None:
+        return "NULL"
+    if isinstance(v, (int, float)):
+        return str(v)
+    return escape(v)
+
+# enum and code columns the generators fill from fixed lists or IDs: they never hold a quote, so
+# they are quoted without escaping. Names, emails, URLs and titles come from the Faker pools,
+# whose contents change with the library version, and are always escaped
+PLAIN_TEXT_COLUMNS = {
+    "Gender", "governorate", "city", "Graduation_Status", "Type", "working_status", "Exam_Type",
+    "Question_Type", "Question_Difficulty", "Correct_Answer", "platform", "level", "client_country",
+    "National_ID", "Phone", "user_id",
+    # star schema
+    "Governorate", "City", "Working_Status", "Intake_Type", "Ques_Type", "Difficulty", "Platform", "Level",
+    "Client_Country", "Month_Name", "Day_Name", "Exam_Result",
+}
+WRITE_BUFFER_BYTES = 1 << 20  # INSERT batches are gathered into writes of about this size
+_row_formatters = {}
+
+def row_formatter(table):
+    # compiled once per table: "(%s, '%s', ...)" % (r[0], r[1], ...) with numbers formatted as
+    # they are, dates and PLAIN_TEXT_COLUMNS quoted as they are, and NULL only checked for in
+    # nullable columns - the same text sql_value() gives, without its per-value type checks
+    if table not in _row_formatters:
+        fmt, args = [], []
+        for i, (name, sql_type, modifier) in enumerate(TABLES_BY_NAME[table].columns):
+            v = f"r[{i}]"
+            if modifier == "NULL":
+                fmt.append("%s")
+                args.append(f"sql_value({v})")
+            elif sql_type in ("INT", "BIT") or sql_type.startswith("DECIMAL"):
+                fmt.append("%s")
+                args.append(v)
+            elif sql_type == "DATE" or name in PLAIN_TEXT_COLUMNS:
+                fmt.append("'%s'")
+                args.append(v)
+            else:
+                fmt.append("'%s'")
+                args.append(f"{v}.replace(\"'\", \"''\")")
+        src = f"lambda r: {'(' + ', '.join(fmt) + ')'!r} % ({', '.join(args)},)"
+        _row_formatters[table] = eval(src, {"sql_value": sql_value})
+    return _row_formatters[table]
+
+def insert_batches(table, rows, batch_size, target=None, tablock=False):
+    # rows are consumed lazily; yields (statement text, row count), batch_size rows per INSERT ... VALUES;
+    # target: the table inserted into when it isn't `table` itself (a staging table with its columns)
+    hint = " WITH (TABLOCK)" if tablock else ""
+    header = f"INSERT INTO {target or table}{hint} ({', '.join(TABLES_BY_NAME[table].column_names)}) VALUES\n"
+    fmt = row_formatter(table)
+    for chunk in ichunked(rows, batch_size):
+        yield header + ",\n".join(map(fmt, chunk)) + ";\n", len(chunk)
+
+def write_inserts(f, table, rows, batch_size, target=None, tablock=False):
+    # fewer, larger writes: one encoder / compressor / file call per WRITE_BUFFER_BYTES
+    n, buf, size = 0, [], 0
+    for text, k in insert_batches(table, rows, batch_size, target, tablock):
+        buf.append(text)
+        size += len(text)
+        n += k
+        if size >= WRITE_BUFFER_BYTES:
+            f.write("".join(buf))
+            buf, size = [], 0
+    if buf:
+        f.write("".join(buf))
+    return n
+
+
+COMPRESSION_EXT = {None: "", "gzip": ".gz", "zstd": ".zst"}
+
+def open_text(path, compression=None, mode="w"):
+    # gzip members and zstd frames can be concatenated, so mode="a" appends an independently
+    # compressed block and part files can be merged by copying their bytes
+    if compression is None:
+        return open(path, mode, encoding="utf-8")
+    if compression == "gzip":
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    if compression == "zstd":
+        if zstandard is None:
+            raise SystemExit('SQL_COMPRESSION = "zstd" needs zstandard: pip install zstandard')
+        return zstandard.open(path, mode + "t", encoding="utf-8")
+    raise SystemExit(f"unknown SQL_COMPRESSION {compression!r}")
+
+
+def write_partitioned_tables(f, parts):
+    # partition function and scheme, the partitioned table on the scheme, and its staging tables
+    for sql in parts.create_sql():
+        write_line(f, sql)
+    for k in range(len(parts)):
+        write_line(f, parts.stage_create_sql(k))
+
+
+class SqlScriptSink(Sink):
+    # one T-SQL script: DDL, FKs and INSERT batches inside a single transaction. With split_rows /
+    # split_bytes the shard parts roll over into numbered files that each run on their own.
+    def __init__(self, out, batch_size, merge_parts=True, compression=None, split_rows=None, split_bytes=None):
+        super().__init__(out)
+        self.batch_size = batch_size
+        self.merge_parts = merge_parts  # False: keep the part files and pull them in with sqlcmd ":r"
+        self.compression = compression
+        self.ext = COMPRESSION_EXT[compression]
+        self.split_rows = split_rows
+        self.split_bytes = split_bytes  # uncompressed; both thresholds are checked after whole batches
+
+    @property
+    def split(self):
+        return bool(self.split_rows or self.split_bytes)
+
+    def write_part(self, table, shard, rows):
+        if self.split:
+            return self.write_split_part(table, shard, rows)
+        if self.partitioned(table):
+            stage = self.partitions.stage
+            return self.write_partitioned(table, shard, rows, "sql" + self.ext,
+                                          lambda path: open_text(path, self.compression),
+                                          lambda f, k, chunk: write_inserts(f, table, chunk, self.batch_size, stage(k),
+                                                                            self.load_optimized))
+        path = self.part_path(table, shard, "sql" + self.ext)
+        with self.timed(open_text(path, self.compression), table) as f:
+            n = write_inserts(f, table, rows, self.batch_size, tablock=self.load_optimized)
+        return path, n
+
+    def write_split_part(self, table, shard, rows):
+        # returns [(path, rows), ...]: every file is a complete batch with its own transaction and
+        # IDENTITY_INSERT, so files of different tables can be loaded concurrently
+        identity = TABLES_BY_NAME[table].identity
+        files, n, f = [], 0, None
+        for text, k in insert_batches(table, rows, self.batch_size, tablock=self.load_optimized):
+            if f is None:
+                path = self.part_path(table, shard, f"{len(files):04d}.sql{self.ext}")
+                f = self.timed(open_text(path, self.compression), table)
+                f.write("SET NOCOUNT ON;\nSET XACT_ABORT ON;\nBEGIN TRANSACTION;\n")
+                if identity:
+                    f.write(f"SET IDENTITY_INSERT {table} ON;\n")
+                file_rows = file_bytes = 0
+            f.write(text)
+            n += k
+            file_rows += k
+            file_bytes += len(text)
+            if (self.split_rows and file_rows >= self.split_rows) or (self.split_bytes and file_bytes >= self.split_bytes):
+                self.end_split_file(f, table, identity)
+                files.append((path, file_rows))
+                f = None
+        if f is not None:
+            self.end_split_file(f, table, identity)
+            files.append((path, file_rows))
+        return files, n
+
+    def end_split_file(self, f, table, identity):
+        if identity:
+            f.write(f"SET IDENTITY_INSERT {table} OFF;\n")
+        f.write("COMMIT;\nGO\n")
+        f.close()
+
+    def write_header(self, f):
+        write_line(f, "-- ITI Examination System large dataset SQL (generated)")
+        write_line(f, f"-- Generated on: {self.started.isoformat()}")
+        write_line(f, "SET NOCOUNT ON;")
+        write_line(f, "")
+        if self.append:
+            write_line(f, "-- delta: rows only, for tables created by an earlier full run")
+            write_line(f, "")
+        if self.ext and (self.split or not self.merge_parts or self.partitions):
+            write_line(f, f"-- the part files are {self.compression}-compressed: decompress them in place before running this script")
+            write_line(f, "")
+
+    def write_create_tables(self, f):
+        # CREATE TABLE statements (T-SQL)
+        write_line(f, "-- CREATE TABLES")
+        for t in self.tables:
+            if self.partitioned(t.name):
+                write_partitioned_tables(f, self.partitions)
+            else:
+                write_line(f, self.create_sql(t))
+        write_line(f, "")
+
+    def write_foreign_keys(self, f):
+        # Foreign key constraints (add after tables creation); the partitioned table gets its own
+        # once its partitions are switched in
+        if self.load_optimized:
+            return self.write_post_load(f)
+        write_line(f, "-- FOREIGN KEYS")
+        for fk in self.foreign_keys:
+            if not self.partitioned(fk[0]):
+                write_line(f, foreign_key_sql(fk))
+        write_line(f, "")
+
+    def write_post_load(self, f):
+        write_line(f, "-- KEYS, INDEXES, FOREIGN KEYS AND STATISTICS (after the load)")
+        for sql in self.post_load_sql():
+            write_line(f, sql)
+        write_line(f, "")
+
+    def include(self, path):
+        # sqlcmd reads plain text only, so compressed parts are referenced by their decompressed name
+        return f':r "{os.path.abspath(path[:len(path) - len(self.ext)])}"'
+
+    def close(self, part_files):
+        if self.split:
+            return self.close_split(part_files)
+        out = self.out + self.ext if self.merge_parts else self.out
+        print(f"Writing SQL to {out} ...")
+        f = open_text(out, self.compression if self.merge_parts else None)
+        try:
+            self.write_header(f)
+            if not self.append:
+                self.write_create_tables(f)
+                if not self.load_optimized:
+                    self.write_foreign_keys(f)
+
+            # INSERTS (use IDENTITY_INSERT and explicit ids)
+            write_line(f, "/* ---------- INSERT DATA ---------- */")
+            write_line(f, "BEGIN TRANSACTION;")
+            write_line(f, "")
+
+            for table in self.load_order:
+                if (self.append and table not in part_files) or self.partitioned(table):
+                    continue
+                identity = TABLES_BY_NAME[table].identity
+                if identity:
+                    write_line(f, f"SET IDENTITY_INSERT {table} ON;")
+                for path, _ in part_files.get(table, []):
+                    if not self.merge_parts:
+                        write_line(f, self.include(path))
+                    elif self.ext:
+                        # compressed parts are appended as-is, no recompression
+                        f.close()
+                        with open(out, "ab") as dst, open(path, "rb") as part:
+                            shutil.copyfileobj(part, dst)
+                        f = open_text(out, self.compression, "a")
+                    else:
+                        with open(path, encoding="utf-8") as part:
+                            shutil.copyfileobj(part, f)
+                if identity:
+                    write_line(f, f"SET IDENTITY_INSERT {table} OFF;")
+                write_line(f, "")
+
+            # Finalize transaction
+            write_line(f, "COMMIT;")
+            if self.partitions:
+                write_line(f, "")
+                self.write_partition_loads(f, part_files)
+            if self.load_optimized and not self.append:
+                write_line(f, "")
+                self.write_post_load(f)
+            write_line(f, "-- End of generated data")
+        finally:
+            f.close()
+        if self.merge_parts:
+            shutil.rmtree(self.parts_dir)
+
+    def write_partition_loads(self, f, part_files):
+        # one script per staging table under <out>.partitions: they touch nothing but their own
+        # table, so they may run in parallel sqlcmd sessions instead of the :r below. Each staging
+        # table is then switched into its partition, a metadata-only change.
+        parts = self.partitions
+        table = parts.table.name
+        stage_dir = self.out + ".partitions"
+        shutil.rmtree(stage_dir, ignore_errors=True)
+        os.makedirs(stage_dir)
+        write_line(f, f"/* ---------- PARTITIONED LOAD: {table}, {len(parts)} partitions on {parts.column} ---------- */")
+        for k, files in enumerate(self.partition_parts(part_files.get(table, []))):
+            path = os.path.join(stage_dir, f"{parts.stage(k)}.sql" + (self.ext if self.merge_parts else ""))
+            with open_text(path, self.compression if self.merge_parts else None) as s:
+                s.write("SET NOCOUNT ON;\nSET XACT_ABORT ON;\nBEGIN TRANSACTION;\n")
+                if not self.merge_parts:
+                    for part, _ in files:
+                        write_line(s, self.include(part))
+            if self.merge_parts:
+                with open(path, "ab") as dst:
+                    for part, _ in files:
+                        with open(part, "rb") as src:
+                            shutil.copyfileobj(src, dst)
+            with open_text(path, self.compression if self.merge_parts else None, "a") as s:
+                s.write("COMMIT;\n")
+            write_line(f, f"-- {parts.stage(k)}: {sum(n for _, n in files)} rows")
+            write_line(f, self.include(path) if self.merge_parts else f':r "{os.path.abspath(path)}"')
+        write_line(f, "GO")
+        for k in range(len(parts)):
+            for line in parts.switch_sql(k):
+                write_line(f, line)
+        for fk in self.foreign_keys if not self.load_optimized else ():
+            if fk[0] == table:
+                write_line(f, foreign_key_sql(fk))
+        write_line(f, "")
+
+    def close_split(self, part_files):
+        # <parts>/schema.sql and <parts>/foreign_keys.sql bracket the self-contained data files;
+        # the main script is a sqlcmd driver running all three in load order
+        schema_path = os.path.join(self.parts_dir, "schema.sql")
+        fk_path = os.path.join(self.parts_dir, "foreign_keys.sql")
+        with open(schema_path, "w", encoding="utf-8") as f:
+            write_line(f, "SET NOCOUNT ON;")
+            self.write_create_tables(f)
+        with open(fk_path, "w", encoding="utf-8") as f:
+            self.write_foreign_keys(f)
+        files = [(table, path, n) for table in self.load_order for shard in part_files.get(table, []) for path, n in shard[0]]
+        print(f"Writing {len(files)} SQL part files under {self.parts_dir}, driver {self.out} ...")
+        with open(self.out, "w", encoding="utf-8") as f:
+            self.write_header(f)
+            if not self.append:
+                write_line(f, f':r "{os.path.abspath(schema_path)}"')
+                write_line(f, "")
+            write_line(f, "/* ---------- INSERT DATA ---------- */")
+            for table, path, n in files:
+                write_line(f, f"-- {table}: {n} rows")
+                write_line(f, self.include(path))
+            write_line(f, "")
+            if not self.append:
+                write_line(f, f':r "{os.path.abspath(fk_path)}"')
+            write_line(f, "-- End of generated data")
+
+
+# ---------- Bulk load: delimited data + bcp format files ----------
+FIELD_TERMINATOR = "\t"
+ROW_TERMINATOR = "\r\n"
+
+def bulk_value(v):
+    # bcp character format has no quoting: NULL is an empty field and the terminators may not
+    # appear inside a value. Empty strings load as NULL too.
+    if v is None:
+        return ""
+    if isinstance(v, str):
+        if "\t" in v or "\n" in v or "\r" in v:
+            return v.replace("\t", " ").replace("\r", " ").replace("\n", " ")
+        return v
+    return str(v)
+
+def write_data(f, rows):
+    f.write("".join(FIELD_TERMINATOR.join(map(bulk_value, r)) + ROW_TERMINATOR for r in rows))
+    return len(rows)
+
+def host_length(sql_type):
+    # max characters of a column's text form in the data file (UTF-8, so up to 3 bytes per char)
+    base = sql_type.split("(")[0]
+    if base in ("INT", "BIT"):
+        return 12
+    if base == "DATE":
+        return 10
+    if base == "DECIMAL":
+        return int(sql_type[sql_type.index("(")+1:].split(",")[0]) + 2
+    return int(sql_type[sql_type.index("(")+1:-1]) * 3
+
+def format_file(table):
+    # non-XML bcp format file: every field is character data ending at its terminator
+    cols = table.columns
+    lines = ["14.0", str(len(cols))]
+    for i, (name, sql_type, _) in enumerate(cols, 1):
+        term = ROW_TERMINATOR if i == len(cols) else FIELD_TERMINATOR
+        term = '"' + term.replace("\t", "\\t").replace("\r", "\\r").replace("\n", "\\n") + '"'
+        lines.append(f'{i:<8}SQLCHAR{"":<6}0{"":<7}{host_length(sql_type):<8}{term:<9}{i:<6}{name:<24}""')
+    return "\n".join(lines) + "\n"
+
+
+class BulkSink(Sink):
+    # one delimited data file per table shard, a bcp format file per table and a load.sql
+    # driver of minimally logged BULK INSERT ... WITH (TABLOCK, BATCHSIZE=...) statements
+    def __init__(self, out_dir, batch_size, data_path=None):
+        super().__init__(out_dir)
+        self.parts_dir = out_dir
+        self.batch_size = batch_size
+        # directory the SQL Server instance sees the files under (defaults to out_dir)
+        self.data_path = data_path
+
+    def open(self):
+        os.makedirs(self.out, exist_ok=True)
+        for name in os.listdir(self.out) if not self.resume else ():
+            if name.endswith((".dat", ".fmt")):
+                os.remove(os.path.join(self.out, name))
+
+    def write_part(self, table, shard, rows):
+        if self.partitioned(table):
+            return self.write_partitioned(table, shard, rows, "dat",
+                                          lambda path: open(path, "w", encoding="utf-8", newline=""),
+                                          lambda f, k, chunk: write_data(f, chunk))
+        path = self.part_path(table, shard, "dat")
+        n = 0
+        with self.timed(open(path, "w", encoding="utf-8", newline=""), table) as f:
+            for chunk in ichunked(rows, 10000):
+                n += write_data(f, chunk)
+        return path, n
+
+    def close(self, part_files):
+        data_path = self.data_path or os.path.abspath(self.out)
+        sep = "\\" if "\\" in data_path else "/"
+        for t in self.tables:
+            with open(os.path.join(self.out, f"{t.name}.fmt"), "w", encoding="utf-8") as f:
+                f.write(format_file(t))
+
+        driver = os.path.join(self.out, "load.sql")
+        print(f"Writing bulk load driver to {driver} ...")
+        with open(driver, "w", encoding="utf-8") as f:
+            write_line(f, "-- ITI Examination System bulk load (generated); run with sqlcmd")
+            write_line(f, f"-- Generated on: {self.started.isoformat()}")
+            write_line(f, f':setvar DataDir "{data_path}"')
+            write_line(f, "SET NOCOUNT ON;")
+            write_line(f, "")
+            if not self.append:
+                write_line(f, "-- CREATE TABLES")
+                for t in self.tables:
+                    if self.partitioned(t.name):
+                        write_partitioned_tables(f, self.partitions)
+                    else:
+                        write_line(f, self.create_sql(t))
+                write_line(f, "")
+
+            def bulk_insert(table, path, target=None):
+                keep_identity = ", KEEPIDENTITY" if TABLES_BY_NAME[table].identity else ""
+                write_line(f, f"BULK INSERT {target or table} FROM '$(DataDir){sep}{os.path.basename(path)}' "
+                              f"WITH (FORMATFILE = '$(DataDir){sep}{table}.fmt', CODEPAGE = '65001', "
+                              f"TABLOCK, BATCHSIZE = {self.batch_size}{keep_identity});")
+
+            write_line(f, "-- LOAD DATA (TABLOCK + batches keep the load minimally logged under SIMPLE/BULK_LOGGED recovery)")
+            for table in self.load_order:
+                if self.partitioned(table):
+                    continue
+                for path, _ in part_files.get(table, []):
+                    bulk_insert(table, path)
+            write_line(f, "")
+
+            if self.partitions:
+                # each partition's files load into its own staging table (the loads are independent
+                # and may run in parallel sessions), which is then switched into the partition
+                parts = self.partitions
+                table = parts.table.name
+                write_line(f, f"-- PARTITIONED LOAD: {table}, {len(parts)} partitions on {parts.column}")
+                for k, files in enumerate(self.partition_parts(part_files.get(table, []))):
+                    for path, _ in files:
+                        bulk_insert(table, path, parts.stage(k))
+                for k in range(len(parts)):
+                    for line in parts.switch_sql(k):
+                        write_line(f, line)
+                write_line(f, "")
+
+            # constraints are added once the data is in, so the load never pays per-row FK checks
+            if not self.append and self.load_optimized:
+                write_line(f, "-- KEYS, INDEXES, FOREIGN KEYS AND STATISTICS (after the load)")
+                for sql in self.post_load_sql():
+                    write_line(f, sql)
+            elif not self.append:
+                write_line(f, "-- FOREIGN KEYS")
+                for fk in self.foreign_keys:
+                    write_line(f, foreign_key_sql(fk))
+            write_line(f, "-- End of generated load script")
+
+
+# ---------- Direct database load ----------
+class DbSink(Sink):
+    # rows go straight into a database through parameterized executemany batches. Every shard
+    # part opens its own connections, so parts of independent tables load concurrently across
+    # the worker pool, and each part can spread its batches over `connections` threads.
+    def __init__(self, batch_size, commit_every, connections=1):
+        super().__init__("")
+        self.batch_size = batch_size
+        self.commit_every = commit_every
+        self.connections = connections
+
+    def connect(self):
+        raise NotImplementedError
+
+    def create_tables(self, conn):
+        raise NotImplementedError
+
+    def prepare(self, table, chunk):
+        # driver-specific value conversion; rows pass through unchanged by default
+        return chunk
+
+    def begin_load(self, cur, table):
+        pass
+
+    def open(self):
+        if self.append:
+            return
+        conn = self.connect()
+        self.create_tables(conn)
+        conn.commit()
+        conn.close()
+
+    def insert_sql(self, table):
+        cols = TABLES_BY_NAME[table].column_names
+        return f"INSERT INTO {table} ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))})"
+
+    def load_chunks(self, table, chunks):
+        # one connection draining an iterator of row batches; commits every commit_every rows
+        conn = self.connect()
+        try:
+            cur = conn.cursor()
+            self.begin_load(cur, table)
+            sql = self.insert_sql(table)
+            n = uncommitted = 0
+            spent = 0.0
+            for chunk in chunks:
+                chunk = self.prepare(table, chunk)
+                start = perf_counter()
+                cur.executemany(sql, chunk)
+                n += len(chunk)
+                uncommitted += len(chunk)
+                if uncommitted >= self.commit_every:
+                    conn.commit()
+                    uncommitted = 0
+                spent += perf_counter() - start
+            start = perf_counter()
+            conn.commit()
+            spent += perf_counter() - start
+            if self.metrics:
+                self.metrics.add(f"time.io.{table}", spent)
+            return n
+        finally:
+            conn.close()
+
+    def write_part(self, table, shard, rows):
+        chunks = ichunked(rows, self.batch_size)
+        if self.connections <= 1:
+            return None, self.load_chunks(table, chunks)
+        # bounded queue between the row generator and the loader threads keeps memory flat
+        q = queue.Queue(maxsize=self.connections * 2)
+        counts, errors = [], []
+
+        def drain():
+            while True:
+                chunk = q.get()
+                if chunk is None:
+                    return
+                yield chunk
+
+        def loader():
+            try:
+                counts.append(self.load_chunks(table, drain()))
+            except Exception as e:  # re-raised in the producer below
+                errors.append(e)
+                for _ in drain():  # keep the producer from blocking on a full queue
+                    pass
+
+        threads = [threading.Thread(target=loader) for _ in range(self.connections)]
+        for t in threads:
+            t.start()
+        try:
+            for chunk in chunks:
+                q.put(chunk)
+        finally:
+            for _ in threads:
+                q.put(None)
+            for t in threads:
+                t.join()
+        if errors:
+            raise errors[0]
+        return None, sum(counts)
+
+
+class SqliteSink(DbSink):
+    # local stand-in for SQL Server: same tables, PKs and (unenforced) FKs in one SQLite file
+    def __init__(self, path, batch_size, commit_every, connections=1):
+        super().__init__(batch_size, commit_every, connections)
+        self.out = path
+
+    def connect(self):
+        conn = sqlite3.connect(self.out, timeout=600)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=OFF")
+        return conn
+
+    def open(self):
+        if self.append and not os.path.exists(self.out):
+            raise SystemExit(f"{self.out} does not exist: a delta is appended to the database of a full run")
+        for suffix in ("", "-wal", "-shm"):
+            if not self.append and os.path.exists(self.out + suffix):
+                os.remove(self.out + suffix)
+        super().open()
+
+    def create_tables(self, conn):
+        # SQLite has no IDENTITY and no ALTER TABLE ADD CONSTRAINT, so FKs are declared inline
+        for t in self.tables:
+            conn.execute(t.create_sql(identity=False, foreign_keys=[fk for fk in self.foreign_keys if fk[0] == t.name]))
+
+    def prepare(self, table, chunk):
+        # sqlite3's implicit date adapter is deprecated; store ISO strings like SQL Server would print
+        dates = [i for i, c in enumerate(TABLES_BY_NAME[table].columns) if c[1] == "DATE"]
+        if not dates:
+            return chunk
+        out = []
+        for r in chunk:
+            r = list(r)
+            for i in dates:
+                if isinstance(r[i], date):
+                    r[i] = r[i].isoformat()
+            out.append(r)
+        return out
+
+    def close(self, part_files):
+        conn = self.connect()
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        conn.close()
+        print(f"Loaded {sum(n for parts in part_files.values() for _, n in parts)} rows into {self.out}")
+
+
+class OdbcSink(DbSink):
+    # SQL Server (or any DB-API driver with qmark params) through pyodbc with fast_executemany;
+    # tables are created bare of FKs and the FKs are added once everything is loaded
+    def __init__(self, conn_str, batch_size, commit_every, connections=1, module="pyodbc"):
+        super().__init__(batch_size, commit_every, connections)
+        self.out = conn_str
+        self.module = module
+
+    def connect(self):
+        try:
+            driver = importlib.import_module(self.module)
+        except ImportError:
+            raise SystemExit(f'OUTPUT_FORMAT = "odbc" needs {self.module}: pip install {self.module}')
+        return driver.connect(self.out, autocommit=False)
+
+    def create_tables(self, conn):
+        cur = conn.cursor()
+        for t in self.tables:
+            cur.execute(self.create_sql(t))
+
+    def begin_load(self, cur, table):
+        cur.fast_executemany = True
+        if TABLES_BY_NAME[table].identity:
+            cur.execute(f"SET IDENTITY_INSERT {table} ON")
+
+    def close(self, part_files):
+        if not self.append:
+            conn = self.connect()
+            cur = conn.cursor()
+            for sql in self.post_load_sql() if self.load_optimized else map(foreign_key_sql, self.foreign_keys):
+                cur.execute(sql)
+            conn.commit()
+            conn.close()
+        print(f"Loaded {sum(n for parts in part_files.values() for _, n in parts)} rows through ODBC")
+
+
+# ---------- Parquet export ----------
+# low-cardinality text columns: stored as Arrow dictionaries (categoricals in Power BI / pandas)
+# and dictionary-encoded in the file; every other column is written plain
+DICTIONARY_COLUMNS = {"Gender", "governorate", "city", "Graduation_Status", "Question_Type",
+                      "Question_Difficulty", "platform", "client_country"}
+
+
+def arrow_type(sql_type):
+    if sql_type == "INT":
+        return pa.int32()
+    if sql_type == "BIT":
+        return pa.bool_()
+    if sql_type == "DATE":
+        return pa.date32()
+    if sql_type.startswith("DECIMAL("):
+        precision, scale = sql_type[len("DECIMAL("):-1].split(",")
+        return pa.decimal128(int(precision), int(scale))
+    return pa.string()
+
+
+def arrow_schema(table):
+    fields = []
+    for name, sql_type, modifier in TABLES_BY_NAME[table].columns:
+        typ = arrow_type(sql_type)
+        if name in DICTIONARY_COLUMNS:
+            typ = pa.dictionary(pa.int32(), typ)
+        fields.append(pa.field(name, typ, nullable=modifier != "NOT NULL"))
+    return pa.schema(fields)
+
+
+def arrow_column(values, field):
+    typ = field.type
+    if pa.types.is_dictionary(typ):
+        return pa.array(values, typ.value_type).dictionary_encode().cast(typ)
+    if pa.types.is_decimal(typ):
+        # generators produce rounded floats; go through float64 so Decimal objects aren't needed
+        return pa.array(values, pa.float64()).cast(typ)
+    if pa.types.is_boolean(typ):
+        # BIT columns are generated as 0/1
+        return pa.array(values, pa.int8()).cast(typ)
+    if pa.types.is_date(typ) and values and isinstance(values[0], str):
+        return pa.array(values, pa.string()).cast(typ)
+    return pa.array(values, typ)
+
+
+class ParquetSink(Sink):
+    # one dataset directory per table (<out>/<Table>/part-NNNN.parquet), one file per shard part,
+    # row_group_size rows per row group
+    def __init__(self, out_dir, row_group_size, compression="zstd"):
+        super().__init__(out_dir)
+        self.parts_dir = out_dir
+        self.row_group_size = row_group_size
+        self.compression = compression
+
+    def open(self):
+        if pa is None:
+            raise SystemExit('OUTPUT_FORMAT = "parquet" needs pyarrow: pip install pyarrow')
+        super().open()
+
+    def write_part(self, table, shard, rows):
+        schema = arrow_schema(table)
+        os.makedirs(os.path.join(self.parts_dir, table), exist_ok=True)
+        path = os.path.join(self.parts_dir, table, f"part-{shard:04d}.parquet")
+        dict_cols = [f.name for f in schema if pa.types.is_dictionary(f.type)]
+        n = 0
+        with pq.ParquetWriter(path, schema, compression=self.compression,
+                              use_dictionary=dict_cols or False) as w:
+            for chunk in ichunked(rows, self.row_group_size):
+                cols = [arrow_column(list(c), f) for c, f in zip(zip(*chunk), schema)]
+                start = perf_counter()
+                w.write_table(pa.Table.from_arrays(cols, schema=schema), row_group_size=self.row_group_size)
+                if self.metrics:
+                    self.metrics.add(f"time.io.{table}", perf_counter() - start)
+                n += len(chunk)
+        return path, n
+
+    def close(self, part_files):
+        total = sum(n for parts in part_files.values() for _, n in parts)
+        print(f"Wrote {total} rows as Parquet datasets under {self.parts_dir}")
+
+
+# ---------- Several formats in one pass ----------
+FANOUT_BATCH_ROWS = 5000  # rows per batch handed to every writer
+FANOUT_QUEUE_BATCHES = 4  # batches queued per writer before the generator waits for it
+
+
+class FanOutSink(Sink):
+    # the same rows written by several sinks at once: every part is generated once, cut into
+    # batches, and each batch is put on one bounded queue per sink, drained by that sink's own
+    # writer thread. A full queue blocks the generator, so the slowest writer sets the pace and
+    # memory stays at a few batches per writer (the batches are shared, not copied). Formatting
+    # is Python code holding the GIL; writers overlap where they release it (file and database
+    # I/O, gzip/zstd, Parquet encoding), and a run then takes about as long as its slowest writer.
+    SHARED = ("metrics", "append", "resume", "model", "aggregates", "partitions", "load_optimized", "started")
+
+    def __init__(self, sinks, batch_rows=FANOUT_BATCH_ROWS, queue_batches=FANOUT_QUEUE_BATCHES):
+        super().__init__(sinks[0].out)
+        self.parts_dir = sinks[0].parts_dir
+        self.sinks = sinks
+        self.batch_rows = batch_rows
+        self.queue_batches = queue_batches
+
+    def share(self):
+        # settings made on the fan-out after it was built (run metrics, resume) reach every sink
+        for sink in self.sinks:
+            for name in self.SHARED:
+                setattr(sink, name, getattr(self, name))
+
+    def open(self):
+        self.share()
+        for sink in self.sinks:
+            sink.open()
+
+    def write_part(self, table, shard, rows):
+        # returns (tuple of every sink's path, rows)
+        self.share()
+        queues = [queue.Queue(maxsize=self.queue_batches) for _ in self.sinks]
+        finished = [False] * len(self.sinks)
+        results, errors = [None] * len(self.sinks), []
+
+        def drain(k):
+            while True:
+                batch = queues[k].get()
+                if batch is None:
+                    finished[k] = True
+                    return
+                yield from batch
+
+        def writer(k):
+            try:
+                results[k] = self.sinks[k].write_part(table, shard, drain(k))
+            except Exception as e:  # re-raised in the producer below
+                errors.append(e)
+            finally:
+                if not finished[k]:
+                    for _ in drain(k):  # keep the producer from blocking on a full queue
+                        pass
+
+        threads = [threading.Thread(target=writer, args=(k,)) for k in range(len(self.sinks))]
+        for t in threads:
+            t.start()
+        try:
+            for batch in ichunked(rows, self.batch_rows):
+                if errors:
+                    break
+                for q in queues:
+                    q.put(batch)
+        finally:
+            for q in queues:
+                q.put(None)
+            for t in threads:
+                t.join()
+        if errors:
+            raise errors[0]
+        return tuple(path for path, _ in results), results[0][1]
+
+    def close(self, part_files):
+        # every sink finishes its own output (merging, format files, driver scripts) on its own thread
+        self.share()
+        errors = []
+
+        def close(k):
+            try:
+                self.sinks[k].close({table: [(paths[k], n) for paths, n in parts]
+                                     for table, parts in part_files.items()})
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=close, args=(k,)) for k in range(len(self.sinks))]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        if errors:
+            raise errors[0]
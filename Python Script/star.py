@@ -0,0 +1,144 @@
+# ---------- Star schema output ----------
+# With --model star the shards' rows are reshaped into the warehouse tables (schema.STAR_TABLES)
+# on their way to the sink, so the DWH is generated in the same streaming pass as the OLTP data
+# would be, and the OLTP tables are never written. Surrogate keys equal the natural IDs, which
+# are dense from 1, so facts are keyed without any lookup; dates become yyyymmdd DateKeys.
+#
+# Every transform takes the OLTP rows (tuples in schema column order) and the worker context,
+# whose "star" entry holds the dimension attributes the denormalized rows pull in.
+
+from datetime import timedelta
+from itertools import groupby
+from operator import itemgetter
+
+MONTH_NAMES = ["January", "February", "March", "April", "May", "June", "July", "August",
+               "September", "October", "November", "December"]
+DAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+def date_key(d):
+    # numpy shards hand dates over as ISO strings
+    if isinstance(d, str):
+        return int(d[:4] + d[5:7] + d[8:10])
+    return d.year * 10000 + d.month * 100 + d.day
+
+
+def date_rows(first, last):
+    d = first
+    while d <= last:
+        weekday = d.weekday()
+        yield (date_key(d), d, d.year, (d.month - 1) // 3 + 1, d.month, MONTH_NAMES[d.month - 1],
+               d.day, weekday + 1, DAY_NAMES[weekday], 1 if weekday >= 5 else 0)
+        d += timedelta(days=1)
+
+
+def star_lookups(dims):
+    # per-ID attributes of the OLTP dimensions (index 0 unused), shipped to the workers
+    def by_id(table, *columns):
+        return [None] + list(zip(*(dims[table].column(c) for c in columns)))
+    return {
+        "department": [None] + list(dims["Department"].column("Name")),
+        "faculty": by_id("Faculty", "Faculty_Name", "University_Name"),
+        "company": [None] + list(dims["Company"].column("name")),
+        "intake": by_id("Intake", "Type", "Start_date", "End_date"),
+        "exam": by_id("Exam", "Crs_ID", "instructor_id", "Exam_Date"),
+    }
+
+
+def dim_branch(rows, ctx):
+    for branch_id, name, loc in rows:
+        yield branch_id, branch_id, name, loc
+
+
+def dim_track(rows, ctx):
+    departments = ctx["star"]["department"]
+    for track_id, name, description, supervisor, dept in rows:
+        yield track_id, track_id, name, description, supervisor, departments[dept]
+
+
+def dim_course(rows, ctx):
+    departments = ctx["star"]["department"]
+    for crs_id, name, description, hours, dept in rows:
+        yield crs_id, crs_id, name, description, hours, departments[dept]
+
+
+def dim_instructor(rows, ctx):
+    for iid, fn, ln, gender, _, _, hire, salary, _, _, _, city, status in rows:
+        yield iid, iid, fn, ln, gender, city, status, salary, date_key(hire)
+
+
+def dim_exam(rows, ctx):
+    # No_Question is the exam's actual question count, not the configured average
+    exam_nq = ctx["exam_nq"]
+    for exam_id, name, exam_type, _, duration, _, _, _, _ in rows:
+        yield exam_id, exam_id, name, exam_type, duration, exam_nq[exam_id]
+
+
+def dim_question(rows, ctx):
+    for qid, _, qtype, difficulty, marks, correct, crs, topic in rows:
+        yield qid, qid, qtype, difficulty, correct, marks, topic, crs
+
+
+def dim_student(rows, ctx):
+    faculties, companies, intakes = ctx["star"]["faculty"], ctx["star"]["company"], ctx["star"]["intake"]
+    for (sid, fn, ln, gender, birth, email, nid, governorate, gpa, grad,
+         branch, track, faculty, intake, company, _, _, _) in rows:
+        yield (sid, sid, f"{fn} {ln}", gender, birth, governorate, gpa, grad, email, nid, branch, track,
+               *faculties[faculty], companies[company] if company else None, intake, *intakes[intake])
+
+
+def fact_exam_activity(rows, ctx):
+    # one row per answered question, carrying the totals of the student's sitting of the exam:
+    # a student's answers to one exam arrive together, so only one exam (<= ~20 rows) is held
+    q_marks, exams = ctx["q_marks"], ctx["star"]["exam"]
+    for (sid, exam_id), answers in groupby(rows, key=itemgetter(0, 1)):
+        answers = [(qid, degree, q_marks[qid-1]) for _, _, qid, degree, _, _ in answers]
+        total = sum(marks for _, _, marks in answers)
+        score = sum(degree for _, degree, _ in answers)
+        percent = round(100 * score / total, 2)
+        verdict = "Pass" if score * 2 >= total else "Fail"
+        score = round(score, 2)
+        crs, inst, exam_date = exams[exam_id]
+        key = date_key(exam_date)
+        for qid, degree, marks in answers:
+            yield (sid, exam_id, qid, crs, inst, key, degree, marks, 1 if degree == marks else 0,
+                   total, score, percent, verdict)
+
+
+def fact_certificate(rows, ctx):
+    student_track = ctx["student_track"]
+    for cert_id, name, platform, duration, issued, level, st in rows:
+        yield cert_id, st, student_track[st-1], date_key(issued), name, platform, level, duration
+
+
+def fact_freelance(rows, ctx):
+    for fid, platform, payment, revenue, duration, country, day, rating, st in rows:
+        yield fid, st, date_key(day), platform, country, payment, revenue, duration, rating
+
+
+# OLTP table -> (star table, transform); OLTP tables missing here have no star counterpart
+# (their attributes are folded into the dimensions above)
+TRANSFORMS = {
+    "Branch": ("Dim_Branch", dim_branch),
+    "Track": ("Dim_Track", dim_track),
+    "Course": ("Dim_Course", dim_course),
+    "Instructor": ("Dim_Instructor", dim_instructor),
+    "Exam": ("Dim_Exam", dim_exam),
+    "Question": ("Dim_Question", dim_question),
+    "Student": ("Dim_Student", dim_student),
+    "Result": ("Fact_ExamActivity", fact_exam_activity),
+    "Certificate": ("Fact_Certificate", fact_certificate),
+    "Freelance": ("Fact_Freelance", fact_freelance),
+}
+
+
+def star_part(table, rows, ctx):
+    # (star table, its rows) for rows generated for `table`, or (None, None) when the star schema
+    # leaves the table out; rows already generated as star rows (Dim_Date) and the aggregate
+    # tables pass through
+    if table.startswith(("Dim_", "Fact_", "Agg_")):
+        return table, rows
+    if table not in TRANSFORMS:
+        return None, None
+    star_table, transform = TRANSFORMS[table]
+    return star_table, transform(rows, ctx)
@@ -0,0 +1,36 @@
+# ---------- Run state ----------
+# What a delta run needs to know about the dataset it extends: the highest ID of every table and
+# the keys new rows may reference (each track's branches and courses, each course's instructors).
+# Every run writes it as JSON next to its output; --delta reads it back and writes it updated.
+
+import json
+import os
+
+
+def run_state(seed, deltas, max_id, last_intake_start, track_branches, track_courses, course_instructors):
+    return {
+        "seed": seed,
+        "deltas": deltas,
+        "max_id": max_id,
+        "last_intake_start": last_intake_start.isoformat(),
+        "track_branches": track_branches,
+        "track_courses": track_courses,
+        "course_instructors": course_instructors,
+    }
+
+
+def save_state(path, state):
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(state, f, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+
+def load_state(path):
+    if not os.path.exists(path):
+        raise SystemExit(f"no run state at {path}: generate the full dataset first (or pass --state)")
+    with open(path, encoding="utf-8") as f:
+        state = json.load(f)
+    # JSON object keys are strings; the ID maps are keyed by int everywhere else
+    for key in ("track_branches", "track_courses", "course_instructors"):
+        state[key] = {int(k): v for k, v in state[key].items()}
+    return state
@@ -0,0 +1,71 @@
+# ---------- Counter-based random streams ----------
+# BACKEND = "counter" gives every row its own random stream instead of one per shard: draw n of
+# row i of a table is splitmix64(row_key(seed, table, i) + n * GOLDEN), a pure function of its
+# coordinates. A row therefore comes out the same whichever shard, worker or caller produces it
+# and whatever rows were produced before, which is what random access (rowsource.RowSource) needs.
+# CounterRandom is a random.Random, so choice/randint/uniform/sample/gauss and the TextPool
+# methods draw from it unchanged, at about three times the Mersenne Twister's cost per draw.
+
+import hashlib
+import random
+from functools import lru_cache
+
+MASK64 = (1 << 64) - 1
+GOLDEN = 0x9E3779B97F4A7C15
+
+
+def splitmix64(x):
+    x = (x + GOLDEN) & MASK64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & MASK64
+    return x ^ (x >> 31)
+
+
+@lru_cache(maxsize=None)
+def table_key(seed, table):
+    digest = hashlib.sha256(f"{seed}:rows:{table}".encode()).digest()
+    return int.from_bytes(digest[:8], "big")
+
+
+def row_key(seed, table, i):
+    return splitmix64((table_key(seed, table) + i) & MASK64)
+
+
+class CounterRandom(random.Random):
+    def __init__(self, key):
+        super().__init__(key)
+
+    def seed(self, a=None, version=2):
+        self.key = (a or 0) & MASK64
+        self.n = 0
+        self.gauss_next = None
+
+    def getstate(self):
+        return self.key, self.n, self.gauss_next
+
+    def setstate(self, state):
+        self.key, self.n, self.gauss_next = state
+
+    def next64(self):
+        # splitmix64, inlined: every draw goes through here
+        self.n += 1
+        x = (self.key + (self.n + 1) * GOLDEN) & MASK64
+        x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+        x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & MASK64
+        return x ^ (x >> 31)
+
+    def random(self):
+        return (self.next64() >> 11) * (1.0 / (1 << 53))
+
+    def _randbelow(self, n):
+        # choice/randint/sample: multiply-shift instead of rejection sampling, bias below n / 2**64
+        return (self.next64() * n) >> 64
+
+    def getrandbits(self, k):
+        if k <= 64:
+            return self.next64() >> (64 - k)
+        bits, have = 0, 0
+        while have < k:
+            bits = (bits << 64) | self.next64()
+            have += 64
+        return bits >> (have - k)
@@ -0,0 +1,67 @@
+# ---------- Checkpoint / --resume regression tests ----------
+# A run is stopped once its phase 1 shards (Question, Student) are checkpointed, as Ctrl+C would
+# stop it, then resumed: the output must equal an uninterrupted run's, and a resume with
+# different settings must be refused. Run with `python -m pytest` (needs Faker for the text pool).
+
+import os
+
+import pytest
+
+from rowsource import load_generator
+
+ARGS = ["--scale-factor", "0.05", "--workers", "1", "--state", "state.json"]
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    # outputs, state and caches of every run stay in the test's directory
+    monkeypatch.chdir(tmp_path)
+
+
+def run(*argv):
+    load_generator().main([*ARGS, *argv])
+
+
+def interrupted(*argv):
+    # a run that stops right after phase 1
+    g = load_generator()
+    run_tasks = g.run_tasks
+
+    def phase1(*args):
+        g.run_tasks = stop
+        return run_tasks(*args)
+
+    def stop(*args):
+        raise KeyboardInterrupt
+
+    g.run_tasks = phase1
+    with pytest.raises(KeyboardInterrupt):
+        g.main([*ARGS, *argv])
+
+
+def body(path):
+    # the output without its "Generated on" header line
+    with open(path, encoding="utf-8") as f:
+        return [line for line in f if "Generated on" not in line]
+
+
+def test_resume_matches_uninterrupted_run(capsys):
+    run("--output", "full.sql")
+    interrupted("--output", "resumed.sql")
+    assert sorted(os.listdir("resumed.sql.checkpoint")) == ["Question.0000.pickle", "Student.0000.pickle", "run.json"]
+    run("--output", "resumed.sql", "--resume")
+    assert "2 of 2 shards taken from the checkpoint" in capsys.readouterr().out
+    assert not os.path.exists("resumed.sql.checkpoint")
+    assert body("resumed.sql") == body("full.sql")
+
+
+@pytest.mark.parametrize("changed, setting", [
+    (["--seed", "7"], "SEED"),
+    (["--rows", "Student=300"], "N_STUDENT"),
+    (["--also", "bulk"], "ALSO_FORMATS"),
+])
+def test_resume_rejects_changed_settings(changed, setting):
+    interrupted("--output", "r.sql")
+    with pytest.raises(SystemExit, match=f"settings differ from the interrupted run .*{setting}"):
+        run("--output", "r.sql", "--resume", *changed)
+    assert os.path.exists("r.sql.checkpoint")
@@ -0,0 +1,72 @@
+# ---------- Cached text pools ----------
+# Faker is by far the slowest part of generating a row, so every free-text value is drawn from
+# pools built once per (seed, size) and sampled by index. Each kind of text gets its own Faker
+# seeded from (seed, kind), so pools are reproducible and adding a kind never shifts the others.
+# Pools can be persisted as JSON so later runs skip Faker entirely.
+
+import hashlib
+import json
+import os
+
+import faker
+from faker import Faker
+
+SENTENCE_LENGTHS = (5, 6, 8, 10)
+
+BUILDERS = {
+    "word": lambda fk: fk.word(),
+    "city": lambda fk: fk.city(),
+    "street_address": lambda fk: fk.street_address(),
+    "password": lambda fk: fk.password(length=10),
+}
+for _n in SENTENCE_LENGTHS:
+    BUILDERS[f"sentence_{_n}"] = lambda fk, n=_n: fk.sentence(nb_words=n)
+
+
+def kind_seed(seed, kind):
+    digest = hashlib.sha256(f"{seed}:text:{kind}".encode()).digest()
+    return int.from_bytes(digest[:8], "big")
+
+
+def build_pool(seed, kind, size):
+    fk = Faker()
+    fk.seed_instance(kind_seed(seed, kind))
+    build = BUILDERS[kind]
+    return [build(fk) for _ in range(size)]
+
+
+class TextPool:
+    def __init__(self, seed, size, cache_dir=None):
+        self.seed = seed
+        self.size = size
+        # Faker's word lists change between releases, so its version is part of the key
+        self.key = f"textpool-{seed}-{size}-{faker.VERSION}"
+        path = None
+        if cache_dir:
+            path = os.path.join(cache_dir, f"{self.key}.json")
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.pools = json.load(f)
+        else:
+            self.pools = {kind: build_pool(seed, kind, size) for kind in BUILDERS}
+            if path:
+                os.makedirs(cache_dir, exist_ok=True)
+                with open(path + ".tmp", "w", encoding="utf-8") as f:
+                    json.dump(self.pools, f)
+                os.replace(path + ".tmp", path)
+
+    # rng is anything with .choice(): the random module or a random.Random
+    def word(self, rng):
+        return rng.choice(self.pools["word"])
+
+    def sentence(self, rng, nb_words=6):
+        return rng.choice(self.pools[f"sentence_{nb_words}"])
+
+    def city(self, rng):
+        return rng.choice(self.pools["city"])
+
+    def street_address(self, rng):
+        return rng.choice(self.pools["street_address"])
+
+    def password(self, rng):
+        return rng.choice(self.pools["password"])
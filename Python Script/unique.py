@@ -0,0 +1,85 @@
+# ---------- Unique value allocation ----------
+# Values of UNIQUE / PRIMARY KEY columns that the generators build from random parts (names,
+# digits) are made distinct here, deterministically, so a load never fails on a duplicate key:
+#   NameCounter        per-prefix counters: the k-th repeat of a name gets the suffix k ("mona.gamal2"),
+#                      memory grows with the distinct prefixes only (first x last names)
+#   SerialPermutation  a keyed permutation of [0, n): serials derived from a row ID are distinct by
+#                      construction, in every shard and delta, with nothing to remember
+#   distinct_second    a row's second value never repeats its first (composite keys such as
+#                      (Student_ID, Phone))
+
+import hashlib
+from math import isqrt
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class NameCounter(dict):
+    # prefix -> times handed out
+    def allocate(self, prefix):
+        k = self.get(prefix, 0) + 1
+        self[prefix] = k
+        return prefix if k == 1 else f"{prefix}{k}"
+
+
+def mix(x, key):
+    # Feistel round function on uint64 arrays (inlined for ints in SerialPermutation.__call__)
+    x = ((x + key) * 0x2545F491) & 0xFFFFFFFF
+    x ^= x >> 15
+    x = (x * 0x27D4EB2D) & 0xFFFFFFFF
+    return x ^ (x >> 13)
+
+
+class SerialPermutation:
+    # a 4-round Feistel network on the digits of x in base m = ceil(sqrt(n)), adding round values
+    # modulo m, cycle-walked into [0, n): walking stays inside the permutation of [0, m*m), so the
+    # n inputs map onto n distinct outputs. m*m is barely above n, so walks are rare (none for
+    # n = 10**8, m = 10**4).
+    def __init__(self, key, n):
+        self.n = n
+        self.m = isqrt(n - 1) + 1 if n > 1 else 1
+        digest = hashlib.sha256(key.encode()).digest()
+        self.keys = [int.from_bytes(digest[4*r:4*r+4], "big") for r in range(4)]
+
+    def __call__(self, i):
+        if not 0 <= i < self.n:
+            raise ValueError(f"serial {i} outside [0, {self.n})")
+        m, n, keys = self.m, self.n, self.keys
+        while True:
+            left, right = divmod(i, m)
+            for key in keys:
+                h = ((right + key) * 0x2545F491) & 0xFFFFFFFF
+                h ^= h >> 15
+                h = (h * 0x27D4EB2D) & 0xFFFFFFFF
+                left, right = right, (left + (h ^ (h >> 13))) % m
+            i = left * m + right
+            if i < n:
+                return i
+
+    def np_apply(self, ids):
+        ids = np.asarray(ids, dtype=np.uint64)
+        if len(ids) and int(ids.max()) >= self.n:
+            raise ValueError(f"serial {int(ids.max())} outside [0, {self.n})")
+        out = self.np_feistel(ids)
+        walk = out >= self.n
+        while walk.any():
+            out[walk] = self.np_feistel(out[walk])
+            walk = out >= self.n
+        return out
+
+    def np_feistel(self, x):
+        m = np.uint64(self.m)
+        left, right = x // m, x % m
+        for key in self.keys:
+            left, right = right, (left + mix(right, np.uint64(key))) % m
+        return left * m + right
+
+
+def distinct_second(first, second):
+    # second, with its last digit stepped when it equals first
+    if second != first:
+        return second
+    return second[:-1] + str((int(second[-1]) + 1) % 10)